@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+asyncio front end for the keyboard, back zone / performance and EC paths.
+
+Each device gets a single-thread executor: every HID call runs on the
+HID thread and every EC access on the EC thread, so writes to one device
+are serialized in submission order while the two devices never wait on
+each other, and the event loop never blocks on I/O. The ShadowState is
+only touched from the HID thread (same rule as InfinixHID).
+
+    async with AsyncInfinix() as dev:
+        await dev.set_performance("gaming")
+        await dev.set_zone(2, 255, 0, 0)
+        await dev.ec_write(FAN_BOOST_ADDR, 1)
+        async for action, node in dev.hotplug_events(): ...
+        async for sample in dev.telemetry(rate=5): ...
+"""
+import argparse
+import asyncio
+import colorsys
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared device code lives next to the original scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Original Script"))
+
+from infinix_hid_session import HIDSession
+from infinix_hotplug import HotplugWatcher
+from infinix_protocol import PERFORMANCE_MODES, ZONE_STATIC_PARAM
+from infinix_shadow_state import ShadowState
+from infinix_ec_telemetry import TelemetrySampler
+from maxfan import open_port, ec_ram_transaction, ec_ram_read, FAN_BOOST_ADDR
+
+
+class AsyncInfinix:
+    def __init__(self, session=None, port_path="/dev/port"):
+        self.session = session or HIDSession()
+        self.state = ShadowState(self.session)
+        self.port_path = port_path
+        self._port = None
+        self._hid = ThreadPoolExecutor(max_workers=1, thread_name_prefix="infinix-hid")
+        self._ec = ThreadPoolExecutor(max_workers=1, thread_name_prefix="infinix-ec")
+
+    async def _run(self, executor, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    # --- Keyboard / back zone (HID thread) ---
+
+    def _commit_light(self, mode, r, g, b, brightness):
+        self.state.set_light(mode, r, g, b, brightness)
+        return self.state.commit()
+
+    def _commit_zone(self, zone_id, mode, r, g, b, brightness):
+        self.state.set_zone(zone_id, mode, r, g, b, brightness)
+        return self.state.commit()
+
+    def _commit_performance(self, mode_byte):
+        self.state.set_performance(mode_byte)
+        return self.state.commit()
+
+    async def set_rgb(self, mode, r, g, b, brightness):
+        """Global keyboard light. Returns (success, msg)."""
+        return await self._run(self._hid, self._commit_light, mode, r, g, b, brightness)
+
+    async def set_zone(self, zone_id, r, g, b, brightness=200, mode=None):
+        """Zone 0-4 (0 = whole keyboard), static color unless mode is given."""
+        if zone_id not in ZONE_STATIC_PARAM:
+            return False, "Invalid Zone. Use 0-4."
+        if mode is None:
+            mode = ZONE_STATIC_PARAM[zone_id]
+        return await self._run(self._hid, self._commit_zone, zone_id, mode, r, g, b, brightness)
+
+    async def set_performance(self, mode):
+        """mode: 'office' / 'balance' / 'gaming' or the raw 0x40-0x42 byte."""
+        if isinstance(mode, str):
+            if mode not in PERFORMANCE_MODES:
+                return False, f"Invalid mode. Available modes: {list(PERFORMANCE_MODES)}"
+            mode = PERFORMANCE_MODES[mode]
+        return await self._run(self._hid, self._commit_performance, mode)
+
+    async def resync(self):
+        return await self._run(self._hid, self.state.commit, True)
+
+    # --- EC (EC thread) ---
+
+    def _ec_port(self):
+        if self._port is None:
+            self._port = open_port(self.port_path)
+        return self._port
+
+    def _ec_write(self, writes):
+        return ec_ram_transaction(self._ec_port(), writes)
+
+    def _ec_read(self, addresses):
+        return ec_ram_read(self._ec_port(), addresses)
+
+    async def ec_write(self, address, value):
+        """One EC RAM write (send_ec_ram_cmd). Returns the latency report."""
+        return await self._run(self._ec, self._ec_write, [(address, value)])
+
+    async def ec_write_many(self, writes):
+        """Several (address, value) writes in one EC transaction."""
+        return await self._run(self._ec, self._ec_write, list(writes))
+
+    async def ec_read(self, addresses):
+        """Raises maxfan.ECReadDisabled unless INFINIX_EC_EXPERIMENTAL_READ=1 (unverified read trigger)."""
+        return await self._run(self._ec, self._ec_read, list(addresses))
+
+    # --- Event streams ---
+
+    async def hotplug_events(self):
+        """Yields ("add"|"remove", "/dev/hidrawN"); the watcher fd is driven by the loop itself."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def on_event(action, node):
+            # Device state is unknown after a replug; drop the shadow on the HID thread
+            self._hid.submit(self.state.invalidate)
+            queue.put_nowait((action, node))
+
+        watcher = HotplugWatcher(on_event, session=self.session)
+        loop.add_reader(watcher.fileno(), watcher.dispatch)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            loop.remove_reader(watcher.fileno())
+            watcher.stop()
+
+    async def telemetry(self, rate=10, sysfs_root="/sys", port_path=None, capacity=600, ec_read=False):
+        """
+        Yields one {"t": ..., channel: value} dict per sample on a drift-free
+        schedule. Samples run on the EC thread so EC reads (ec_read=True,
+        unverified protocol) never interleave with ec_write().
+        """
+        sampler = TelemetrySampler(rate, capacity, sysfs_root, port_path, ec_read)
+        ring = sampler.ring
+        names = ["t"] + sampler.names
+        period = 1.0 / rate
+        start = time.monotonic()
+        n = 0
+        try:
+            while True:
+                delay = start + n * period - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self._run(self._ec, sampler.sample)
+                row = ((ring.head - 1) % ring.capacity) * ring.width
+                yield dict(zip(names, ring.data[row:row + ring.width]))
+                n = max(n + 1, int((time.monotonic() - start) / period) + 1)
+        finally:
+            sampler.close()
+
+    # --- Lifetime ---
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._hid, self.session.close)
+        if self._port is not None:
+            await loop.run_in_executor(self._ec, self._port.close)
+        self._hid.shutdown()
+        self._ec.shutdown()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+# --- Demo: animation, telemetry and hotplug in one loop ---
+
+async def _demo(args):
+    port_path = None if args.port == "none" else args.port
+    async with AsyncInfinix(port_path=port_path) as dev:
+        async def animate():
+            start = time.monotonic()
+            while True:
+                t = time.monotonic() - start
+                for zone in (1, 2, 3, 4):
+                    r, g, b = (int(c * 255) for c in colorsys.hsv_to_rgb((t * 0.25 + zone * 0.25) % 1.0, 1, 1))
+                    await dev.set_zone(zone, r, g, b, args.bri)
+                await asyncio.sleep(1 / 30)
+
+        async def watch_hotplug():
+            async for action, node in dev.hotplug_events():
+                print(f"[+] Connected: {node}" if action == "add" else f"[-] Disconnected: {node}")
+                if action == "add":
+                    await dev.resync()
+
+        async def watch_telemetry():
+            async for sample in dev.telemetry(args.rate, args.sysfs, port_path, ec_read=args.experimental_ec_read):
+                print("[*] " + " ".join(f"{k}={v:.1f}" for k, v in sample.items() if k != "t"))
+
+        print(f"[*] Performance: {(await dev.set_performance(args.mode))[1]}")
+        if port_path and args.fan_boost is not None:
+            report = await dev.ec_write(FAN_BOOST_ADDR, args.fan_boost)
+            print(f"[*] Fan boost {args.fan_boost}: {report['latency_ms']:.2f} ms")
+        tasks = [asyncio.create_task(c()) for c in (animate, watch_hotplug, watch_telemetry)]
+        try:
+            await asyncio.wait(tasks, timeout=args.duration, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in tasks:
+                task.cancel()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(result, asyncio.CancelledError):
+                raise result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - asyncio demo (animation + telemetry + hotplug)")
+    parser.add_argument("--mode", default="balance", choices=list(PERFORMANCE_MODES))
+    parser.add_argument("--bri", type=int, default=100, help="Brightness (0-255)")
+    parser.add_argument("--rate", type=float, default=1.0, help="Telemetry samples per second")
+    parser.add_argument("--sysfs", default="/sys", help="sysfs root (fake tree for testing)")
+    parser.add_argument("--port", default="/dev/port", help="EC port file ('none' to skip the EC)")
+    parser.add_argument("--fan-boost", type=int, choices=(0, 1), default=None)
+    parser.add_argument("--experimental-ec-read", action="store_true",
+                        help="Include EC 0x40/0x41 in telemetry (unverified read trigger)")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after N seconds")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_demo(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Audio-reactive keyboard zones.
+
+PCM (s16le mono) comes from a PipeWire or ALSA monitor source, a WAV
+file or stdin. Every hop the newest window is FFT'd; when the reader
+hands over several hops at once they are transformed as one batch.
+Four band energies map left to right onto zones 1-4 and the frame goes
+out through the rate-limited CoalescingWriter, so a slow write only ever
+delays the newest frame.
+
+    pw-record / arecord   -> read hop -> FFT batch -> bands -> colors -> writer -> wire
+
+Every stage is timed; the summary on exit shows mean/max per stage,
+audio-to-wire latency and CPU use as a share of one core.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import wave
+
+import numpy as np
+
+# Shared device code lives next to the original scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Original Script"))
+
+from infinix_hid_session import default_session
+from infinix_hid_writer import CoalescingWriter
+from infinix_protocol import PacketCodec, ZONE_MAPPING
+from infinix_zone_animation import ZONE_MODE
+
+SAMPLE_RATE = 48000
+WINDOW = 1024         # FFT size (21 ms)
+HOP = 256             # new samples per frame (5.3 ms)
+MAX_BATCH = 8         # hops transformed together when the reader fell behind
+MAX_RATE = 60         # frames per second to the controller
+
+# Zone (left to right) -> band in Hz and the color it lights up in
+ZONES = tuple(z for z in sorted(ZONE_MAPPING) if z)
+BANDS = ((20, 150), (150, 600), (600, 2500), (2500, 10000))
+PALETTE = ((255, 0, 0), (255, 140, 0), (0, 255, 80), (0, 120, 255))
+
+ATTACK = 0.6          # EMA weight when a band gets louder
+RELEASE = 0.15        # EMA weight when it gets quieter
+GAIN_DECAY = 0.995    # per-hop decay of the auto-gain peak
+NOISE_FLOOR = 1e-3    # auto-gain never amplifies below this band energy
+LEVEL_STEPS = 32      # quantization; unchanged zones are not resent
+
+
+# --- Sources ---
+# A source fills a caller-owned bytearray and returns the byte count.
+
+class StreamSource:
+    """Raw s16le mono from a pipe or file object (stdin, pw-record, arecord)."""
+
+    def __init__(self, stream, proc=None):
+        self.stream = stream
+        self.proc = proc
+
+    @classmethod
+    def pipewire(cls, target=None, rate=SAMPLE_RATE):
+        cmd = ["pw-record", "--rate", str(rate), "--channels", "1", "--format", "s16", "--latency", f"{HOP}/{rate}"]
+        if target:
+            cmd += ["--target", target]
+        return cls._spawn(cmd + ["-"])
+
+    @classmethod
+    def alsa(cls, device="default", rate=SAMPLE_RATE):
+        return cls._spawn(["arecord", "-q", "-D", device, "-f", "S16_LE", "-r", str(rate), "-c", "1",
+                           "-t", "raw", "--buffer-size", str(HOP * 4)])
+
+    @classmethod
+    def _spawn(cls, cmd):
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, bufsize=0)
+        return cls(proc.stdout, proc)
+
+    def readinto(self, buf):
+        return self.stream.readinto(buf) or 0
+
+    def close(self):
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait()
+
+
+class WavSource:
+    """WAV file, down-mixed to mono, optionally paced like a live source."""
+
+    def __init__(self, path, realtime=True):
+        self.wav = wave.open(path, "rb")
+        if self.wav.getsampwidth() != 2:
+            raise ValueError("Only 16-bit WAV files are supported")
+        self.channels = self.wav.getnchannels()
+        self.rate = self.wav.getframerate()
+        self.realtime = realtime
+        self._start = None
+        self._samples = 0
+
+    def readinto(self, buf):
+        frames = min(len(buf) // 2, HOP)
+        data = self.wav.readframes(frames)
+        if not data:
+            return 0
+        if self.channels > 1:
+            pcm = np.frombuffer(data, dtype="<i2").reshape(-1, self.channels)
+            data = pcm.mean(axis=1).astype("<i2").tobytes()
+        n = len(data)
+        buf[:n] = data
+        if self.realtime:
+            if self._start is None:
+                self._start = time.monotonic()
+            self._samples += n // 2
+            delay = self._start + self._samples / self.rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return n
+
+    def close(self):
+        self.wav.close()
+
+
+# --- Instrumentation ---
+
+class StageStats:
+    STAGES = ("read", "fft", "map", "queue", "write", "audio_to_wire")
+
+    def __init__(self):
+        self.count = dict.fromkeys(self.STAGES, 0)
+        self.total = dict.fromkeys(self.STAGES, 0.0)
+        self.worst = dict.fromkeys(self.STAGES, 0.0)
+        self.wall = time.monotonic()
+        self.cpu = time.process_time()
+
+    def add(self, stage, seconds):
+        self.count[stage] += 1
+        self.total[stage] += seconds
+        if seconds > self.worst[stage]:
+            self.worst[stage] = seconds
+
+    def report(self):
+        lines = [f"{'stage':<15}{'mean ms':>9}{'max ms':>9}{'count':>8}"]
+        for stage in self.STAGES:
+            n = self.count[stage]
+            mean = self.total[stage] / n * 1000 if n else 0.0
+            lines.append(f"{stage:<15}{mean:>9.3f}{self.worst[stage] * 1000:>9.3f}{n:>8}")
+        wall = time.monotonic() - self.wall
+        cpu = time.process_time() - self.cpu
+        lines.append(f"CPU: {cpu / wall * 100 if wall else 0:.1f}% of one core over {wall:.1f} s")
+        return "\n".join(lines)
+
+
+# --- Analysis ---
+
+class BandAnalyzer:
+    """Sliding-window FFT -> four smoothed, auto-gained band levels (0..1)."""
+
+    def __init__(self, rate=SAMPLE_RATE, window=WINDOW, hop=HOP):
+        self.window = window
+        self.hop = hop
+        self.hann = np.hanning(window).astype(np.float32)
+        self.history = np.zeros(window - hop, dtype=np.float32)
+        freqs = np.fft.rfftfreq(window, 1.0 / rate)
+        # bins x bands matrix: band energy of a batch is one matmul
+        self.band_matrix = np.zeros((len(freqs), len(BANDS)), dtype=np.float32)
+        for i, (lo, hi) in enumerate(BANDS):
+            mask = (freqs >= lo) & (freqs < hi)
+            self.band_matrix[mask, i] = 1.0 / max(1, mask.sum())
+        self.level = np.zeros(len(BANDS), dtype=np.float32)
+        self.peak = np.full(len(BANDS), NOISE_FLOOR, dtype=np.float32)
+
+    def process(self, pcm):
+        """pcm: int16 samples, a multiple of hop. Returns levels for the newest hop."""
+        samples = np.concatenate((self.history, pcm.astype(np.float32) / 32768.0))
+        self.history = samples[-(self.window - self.hop):]
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.window)[::self.hop]
+        spectrum = np.abs(np.fft.rfft(frames * self.hann, axis=1)) ** 2
+        energy = spectrum @ self.band_matrix
+        for row in energy:
+            weight = np.where(row > self.level, ATTACK, RELEASE)
+            self.level += (row - self.level) * weight
+            self.peak = np.maximum(np.maximum(self.peak * GAIN_DECAY, self.level), NOISE_FLOOR)
+        return self.level / self.peak
+
+
+class AudioReactive:
+    def __init__(self, source, session=None, brightness=100, max_rate=MAX_RATE):
+        self.source = source
+        self.session = session or default_session()
+        self.codec = PacketCodec()
+        self.analyzer = BandAnalyzer(getattr(source, "rate", SAMPLE_RATE))
+        self.brightness = brightness
+        self.writer = CoalescingWriter(max_rate=max_rate)
+        self.stats = StageStats()
+        self._sent = [None] * len(ZONES)
+        self._running = False
+
+    def colors(self, levels):
+        steps = np.round(np.clip(levels, 0.0, 1.0) * LEVEL_STEPS).astype(int)
+        return [tuple(c * int(s) // LEVEL_STEPS for c in PALETTE[i]) for i, s in enumerate(steps)]
+
+    def _write(self, colors, captured, posted):
+        start = time.monotonic()
+        self.stats.add("queue", start - posted)
+        changed = [(i, rgb) for i, rgb in enumerate(colors) if rgb != self._sent[i]]
+        if not changed:
+            return True, "Up to date"
+        try:
+            with self.session.transaction() as tx:
+                for i, (r, g, b) in changed:
+                    tx.write(self.codec.zone(ZONES[i], ZONE_MODE, r, g, b, self.brightness))
+                    self._sent[i] = (r, g, b)
+        except IOError as e:
+            self._sent = [None] * len(ZONES)
+            return False, str(e)
+        done = time.monotonic()
+        self.stats.add("write", done - start)
+        self.stats.add("audio_to_wire", done - captured)
+        return True, "Success"
+
+    def run(self, duration=None):
+        hop_bytes = HOP * 2
+        buf = bytearray(hop_bytes * MAX_BATCH)
+        view = memoryview(buf)
+        n = 0
+        self.writer.start()
+        self._running = True
+        self.stats = StageStats()
+        start = time.monotonic()
+        try:
+            while self._running:
+                t0 = time.monotonic()
+                # At least one hop; whatever else is already buffered rides along
+                while n < hop_bytes:
+                    got = self.source.readinto(view[n:])
+                    if not got:
+                        return
+                    n += got
+                captured = time.monotonic()
+                self.stats.add("read", captured - t0)
+
+                usable = n - n % hop_bytes
+                levels = self.analyzer.process(np.frombuffer(buf, dtype="<i2", count=usable // 2))
+                buf[:n - usable] = buf[usable:n]
+                n -= usable
+                t1 = time.monotonic()
+                self.stats.add("fft", t1 - captured)
+
+                colors = self.colors(levels)
+                t2 = time.monotonic()
+                self.stats.add("map", t2 - t1)
+                self.writer.post("frame", self._write, colors, captured, t2)
+                if duration is not None and t2 - start >= duration:
+                    break
+        finally:
+            self.writer.stop(flush=True)
+            self.source.close()
+
+    def stop(self):
+        self._running = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Audio-reactive keyboard zones")
+    src = parser.add_mutually_exclusive_group()
+    src.add_argument("--pipewire", nargs="?", const="", metavar="TARGET",
+                     help="Record from PipeWire (default; TARGET e.g. a sink's monitor)")
+    src.add_argument("--alsa", metavar="DEVICE", help="Record from an ALSA device (e.g. a loopback monitor)")
+    src.add_argument("--wav", help="Play a 16-bit WAV file (paced in real time)")
+    src.add_argument("--stdin", action="store_true", help=f"Raw s16le mono at {SAMPLE_RATE} Hz on stdin")
+    parser.add_argument("--fast", action="store_true", help="With --wav: do not pace, process as fast as possible")
+    parser.add_argument("--bri", type=int, default=100, help="Brightness (0-100)")
+    parser.add_argument("--rate", type=int, default=MAX_RATE, help="Max frames per second to the controller")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after N seconds")
+    args = parser.parse_args()
+
+    if args.wav:
+        source = WavSource(args.wav, realtime=not args.fast)
+    elif args.stdin:
+        source = StreamSource(sys.stdin.buffer)
+    elif args.alsa:
+        source = StreamSource.alsa(args.alsa)
+    else:
+        source = StreamSource.pipewire(args.pipewire or None)
+
+    pipeline = AudioReactive(source, brightness=args.bri, max_rate=args.rate)
+    print("[*] Running (Ctrl+C to stop)")
+    try:
+        pipeline.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    print(pipeline.stats.report())
+    print(f"[+] writer: {pipeline.writer.sent} frames sent, {pipeline.writer.coalesced} coalesced")
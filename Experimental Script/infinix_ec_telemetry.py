@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+
+from maxfan import open_port, ec_ram_read, PERF_MODE_ADDR, FAN_BOOST_ADDR
+
+MAX_RATE = 100  # Hz
+BINARY_MAGIC = b"GTTL"
+BINARY_VERSION = 1
+
+
+class RingBuffer:
+    """
+    Fixed-size history of samples in one preallocated array('d').
+    Row layout: [timestamp, channel0, channel1, ...]. Appending overwrites
+    the oldest row once full; nothing is allocated per sample.
+    """
+
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.width = width
+        self.data = array("d", bytes(8 * capacity * width))
+        self.head = 0   # next row to write
+        self.count = 0
+
+    def next_row(self):
+        """Offset of the row to fill; call advance() once it is written."""
+        return self.head * self.width
+
+    def advance(self):
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def snapshot(self):
+        """Copy of the stored rows, oldest first, as one flat array('d')."""
+        w = self.width
+        if self.count < self.capacity:
+            return self.data[:self.count * w]
+        split = self.head * w
+        return self.data[split:] + self.data[:split]
+
+    def rows(self):
+        flat = self.snapshot()
+        w = self.width
+        for i in range(0, len(flat), w):
+            yield flat[i:i + w]
+
+
+class SysfsChannel:
+    """Integer sysfs attribute read with pread into a reused buffer."""
+
+    __slots__ = ("name", "fd", "scale", "_buf")
+
+    def __init__(self, name, path, scale=1.0):
+        self.name = name
+        self.fd = os.open(path, os.O_RDONLY)
+        self.scale = scale
+        self._buf = bytearray(32)
+
+    def read(self):
+        try:
+            n = os.preadv(self.fd, [self._buf], 0)
+            return int(self._buf[:n]) * self.scale
+        except (OSError, ValueError):
+            # e.g. EIO/ENODATA from a sensor that is asleep; one bad read must not stop sampling
+            return float("nan")
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _read_text(path, default=""):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def discover_sysfs_channels(sysfs_root="/sys"):
+    """hwmon fans/temps and thermal zones. Temperatures in °C, fans in RPM."""
+    channels = []
+    for hwmon in sorted(glob.glob(os.path.join(sysfs_root, "class/hwmon/hwmon*"))):
+        chip = _read_text(os.path.join(hwmon, "name"), os.path.basename(hwmon))
+        for path in sorted(glob.glob(os.path.join(hwmon, "fan*_input"))):
+            label = os.path.basename(path)[:-len("_input")]
+            channels.append((f"{chip}_{label}_rpm", path, 1.0))
+        for path in sorted(glob.glob(os.path.join(hwmon, "temp*_input"))):
+            label = _read_text(path[:-len("input")] + "label") or os.path.basename(path)[:-len("_input")]
+            channels.append((f"{chip}_{label.replace(' ', '_')}_c", path, 0.001))
+    for zone in sorted(glob.glob(os.path.join(sysfs_root, "class/thermal/thermal_zone*"))):
+        kind = _read_text(os.path.join(zone, "type"), os.path.basename(zone))
+        channels.append((f"{os.path.basename(zone)}_{kind}_c", os.path.join(zone, "temp"), 0.001))
+    return channels
+
+
+class TelemetrySampler:
+    """
+    Samples fan speed and hwmon/thermal temperatures into a RingBuffer at a
+    fixed rate. With ec_read=True and a port_path it also reads EC registers
+    0x40 (performance mode) / 0x41 (fan boost) through the unverified read
+    trigger (see maxfan.CMD_TRIGGER_READ); by default it is sysfs only.
+
+    sysfs_root and port_path can point at fake trees/files for testing.
+    """
+
+    def __init__(self, rate=10, capacity=6000, sysfs_root="/sys", port_path=None, ec_read=False):
+        if not 0 < rate <= MAX_RATE:
+            raise ValueError(f"rate must be between 0 and {MAX_RATE} Hz")
+        self.rate = rate
+        self.channels = [SysfsChannel(*c) for c in discover_sysfs_channels(sysfs_root)]
+        self.port = open_port(port_path) if port_path and ec_read else None
+        self.names = [c.name for c in self.channels]
+        if self.port is not None:
+            self.names += ["ec_perf_mode", "ec_fan_boost"]
+        self.ring = RingBuffer(capacity, len(self.names) + 1)
+        self._ec_addrs = (PERF_MODE_ADDR, FAN_BOOST_ADDR)
+        self._stop = threading.Event()
+
+    def sample(self):
+        ring = self.ring
+        data = ring.data
+        i = ring.next_row()
+        data[i] = time.monotonic()
+        for ch in self.channels:
+            i += 1
+            data[i] = ch.read()
+        if self.port is not None:
+            for value in ec_ram_read(self.port, self._ec_addrs, experimental=True):
+                i += 1
+                data[i] = value
+        ring.advance()
+
+    def run(self, duration=None):
+        """Drift-free sampling loop; missed slots are skipped."""
+        period = 1.0 / self.rate
+        start = time.monotonic()
+        n = 0
+        self._stop.clear()
+        while not self._stop.is_set():
+            deadline = start + n * period
+            delay = deadline - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                break
+            if duration is not None and time.monotonic() - start >= duration:
+                break
+            self.sample()
+            n = max(n + 1, int((time.monotonic() - start) / period) + 1)
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        for ch in self.channels:
+            ch.close()
+        if self.port is not None:
+            self.port.close()
+
+    # --- Export ---
+
+    def export_csv(self, path):
+        with open(path, "w") as f:
+            f.write(",".join(["t"] + self.names) + "\n")
+            for row in self.ring.rows():
+                f.write(",".join(f"{v:.6g}" for v in row) + "\n")
+
+    def export_binary(self, path):
+        """
+        Header: magic, u16 version, u16 columns, u32 rows, u32 name-block
+        length, newline-joined column names; then rows of float64 (native
+        order), timestamp first.
+        """
+        flat = self.ring.snapshot()
+        names = "\n".join(["t"] + self.names).encode()
+        with open(path, "wb") as f:
+            f.write(BINARY_MAGIC)
+            f.write(struct.pack("<HHII", BINARY_VERSION, self.ring.width, self.ring.count, len(names)))
+            f.write(names)
+            flat.tofile(f)
+
+
+def load_binary(path):
+    """Reads an export_binary() file back: (column names, flat array('d'))."""
+    with open(path, "rb") as f:
+        if f.read(4) != BINARY_MAGIC:
+            raise ValueError("not a telemetry capture")
+        _, width, rows, name_len = struct.unpack("<HHII", f.read(12))
+        names = f.read(name_len).decode().split("\n")
+        data = array("d")
+        data.fromfile(f, width * rows)
+    return names, data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - EC/thermal telemetry sampler")
+    parser.add_argument("--rate", type=float, default=10, help=f"Samples per second (max {MAX_RATE})")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to sample")
+    parser.add_argument("--capacity", type=int, default=6000, help="Ring buffer rows")
+    parser.add_argument("--sysfs", default="/sys", help="sysfs root (fake tree for testing)")
+    parser.add_argument("--port", default="/dev/port", help="EC port file for --experimental-ec-read")
+    parser.add_argument("--experimental-ec-read", action="store_true",
+                        help="Also read EC 0x40/0x41 with the unverified read trigger (root)")
+    parser.add_argument("--csv", help="Write CSV snapshot")
+    parser.add_argument("--bin", help="Write binary snapshot")
+    args = parser.parse_args()
+
+    try:
+        sampler = TelemetrySampler(args.rate, args.capacity, args.sysfs,
+                                   None if args.port == "none" else args.port, args.experimental_ec_read)
+    except PermissionError:
+        print("[-] Error: EC access needs root. Run with sudo or drop --experimental-ec-read.")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"[-] {e}")
+        sys.exit(1)
+
+    print(f"[*] Sampling {len(sampler.names)} channels at {args.rate} Hz for {args.duration}s...")
+    try:
+        sampler.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    print(f"[+] {sampler.ring.count} samples")
+    last = sampler.ring.snapshot()[-sampler.ring.width:]
+    for name, value in zip(sampler.names, last[1:]):
+        print(f"    {name:<32} {value:g}")
+    if args.csv:
+        sampler.export_csv(args.csv)
+        print(f"[+] CSV written to {args.csv}")
+    if args.bin:
+        sampler.export_binary(args.bin)
+        print(f"[+] Binary written to {args.bin}")
+    sampler.close()
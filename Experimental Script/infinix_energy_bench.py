@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Energy cost of the keyboard lighting: effect modes, brightness levels and colors.
+
+Each lighting state is applied through the normal ShadowState/PacketCodec
+path, left to settle, then system power is sampled for a fixed dwell from
+/sys/class/power_supply (power_now, or current_now x voltage_now) and the
+RAPL powercap energy counters. States are measured in interleaved rounds
+(shuffled with --seed, so a run can be repeated) so slow drift (battery
+level, temperature) spreads over all of them instead of biasing whichever
+ran last. Each round's dwell is reduced to its mean; results are the mean
++/- 95% confidence interval over those per-round means, with the delta to
+"Off". Samples inside one dwell are autocorrelated and are not counted as
+independent. The starting light is put back at the end.
+
+Run on battery with the screen brightness fixed and nothing else running;
+on AC the battery reads the charge current instead of the draw.
+
+    python infinix_energy_bench.py run --suite modes,brightness --dwell 20 --json before.json
+    python infinix_energy_bench.py run --compare before.json
+    python infinix_energy_bench.py run --dry-run --dwell 1 --interval 0.1
+"""
+import argparse
+import csv
+import glob
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# Shared device code lives next to the original scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Original Script"))
+
+from infinix_hid_session import BACKEND_ENV, HIDSession
+from infinix_shadow_state import LIGHT, ZONE_KEYS, ShadowState
+from infinix_ec_telemetry import _read_text
+
+BRIGHTNESS_LEVELS = (0, 25, 50, 75, 100)
+SUITES = ("modes", "brightness", "colors")
+BASELINE = "Off"
+DEFAULT_LIGHT = (1, 255, 255, 255, 100)
+
+# Two-sided 95% Student t critical values by degrees of freedom
+_T95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+        9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120,
+        17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086, 21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064,
+        25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048, 29: 2.045, 30: 2.042, 40: 2.021, 60: 2.000,
+        120: 1.980}
+
+
+def t95(df):
+    """Critical value for the largest tabulated df <= df (rounding down keeps the interval conservative)."""
+    if df <= 0:
+        return float("nan")
+    return _T95[max(key for key in _T95 if key <= df)]
+
+
+def mean_ci(values):
+    """(mean, 95% CI half-width, n). NaN samples are ignored."""
+    values = [v for v in values if v == v]
+    n = len(values)
+    if n == 0:
+        return float("nan"), float("nan"), 0
+    mean = sum(values) / n
+    if n == 1:
+        return mean, float("nan"), 1
+    var = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, t95(n - 1) * math.sqrt(var / n), n
+
+
+# --- Power readers ---
+
+class PowerSupplyReader:
+    """
+    Instantaneous draw of every battery in watts: power_now (uW), or
+    current_now (uA) x voltage_now (uV) on batteries that only expose those.
+    """
+
+    def __init__(self, sysfs_root="/sys"):
+        self.batteries = []
+        for supply in sorted(glob.glob(os.path.join(sysfs_root, "class/power_supply/*"))):
+            if _read_text(os.path.join(supply, "type")) != "Battery":
+                continue
+            if os.path.exists(os.path.join(supply, "power_now")):
+                self.batteries.append((os.path.basename(supply), supply, True))
+            elif os.path.exists(os.path.join(supply, "current_now")):
+                self.batteries.append((os.path.basename(supply), supply, False))
+        self.names = [f"{name}_w" for name, _, _ in self.batteries]
+        self.on_ac = any(_read_text(os.path.join(s, "online")) == "1"
+                         for s in glob.glob(os.path.join(sysfs_root, "class/power_supply/*"))
+                         if _read_text(os.path.join(s, "type")) == "Mains")
+
+    def read(self):
+        values = []
+        for _, path, has_power in self.batteries:
+            try:
+                if has_power:
+                    values.append(int(_read_text(os.path.join(path, "power_now"))) / 1e6)
+                else:
+                    values.append(int(_read_text(os.path.join(path, "current_now")))
+                                  * int(_read_text(os.path.join(path, "voltage_now"))) / 1e12)
+            except ValueError:
+                values.append(float("nan"))
+        return values
+
+
+class RaplReader:
+    """
+    Average power of each RAPL domain (package, core, uncore, dram) since the
+    previous read, from the energy_uj counters; handles the counter wrap at
+    max_energy_range_uj. The first read only primes the counters (NaN).
+    """
+
+    def __init__(self, sysfs_root="/sys"):
+        self.domains = []
+        for zone in sorted(glob.glob(os.path.join(sysfs_root, "class/powercap/intel-rapl:*"))):
+            energy = os.path.join(zone, "energy_uj")
+            if not os.path.exists(energy):
+                continue
+            name = _read_text(os.path.join(zone, "name"), os.path.basename(zone))
+            wrap = int(_read_text(os.path.join(zone, "max_energy_range_uj"), "0") or 0)
+            self.domains.append([f"rapl_{os.path.basename(zone)[len('intel-rapl:'):]}_{name}_w".replace(":", "_"),
+                                 energy, wrap, None, None])
+        self.names = [d[0] for d in self.domains]
+
+    def read(self):
+        values = []
+        now = time.monotonic()
+        for domain in self.domains:
+            _, path, wrap, last_uj, last_t = domain
+            try:
+                uj = int(_read_text(path))
+            except ValueError:
+                values.append(float("nan"))
+                continue
+            if last_uj is None or now <= last_t:
+                values.append(float("nan"))
+            else:
+                delta = uj - last_uj
+                if delta < 0 and wrap:
+                    delta += wrap
+                values.append(delta / 1e6 / (now - last_t))
+            domain[3], domain[4] = uj, now
+        return values
+
+    def reset(self):
+        for domain in self.domains:
+            domain[3] = domain[4] = None
+
+
+class PowerSampler:
+    """All battery and RAPL channels as one row of watts."""
+
+    def __init__(self, sysfs_root="/sys"):
+        self.supply = PowerSupplyReader(sysfs_root)
+        self.rapl = RaplReader(sysfs_root)
+        self.names = self.supply.names + self.rapl.names
+
+    def read(self):
+        return self.supply.read() + self.rapl.read()
+
+    def collect(self, dwell, interval):
+        """Samples on a drift-free schedule for `dwell` seconds; returns {channel: [watts]}."""
+        self.rapl.reset()
+        self.rapl.read()
+        samples = {name: [] for name in self.names}
+        start = time.monotonic()
+        n = 1
+        while True:
+            delay = start + n * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            if time.monotonic() - start > dwell + interval / 2:
+                break
+            for name, value in zip(self.names, self.read()):
+                samples[name].append(value)
+            n = max(n + 1, int((time.monotonic() - start) / interval) + 1)
+        return samples
+
+
+# --- Lighting states ---
+
+def build_states(suites):
+    """[(label, (mode, r, g, b, brightness))] with the "Off" baseline first."""
+    from infinix_keyboard_rgb_control import MODES, COLORS
+
+    states = [(BASELINE, (0, 0, 0, 0, 0))]
+    if "modes" in suites:
+        for mode, name in MODES.items():
+            if mode:
+                states.append((f"mode {name}", (mode, 255, 255, 255, 100)))
+    if "brightness" in suites:
+        for level in BRIGHTNESS_LEVELS:
+            states.append((f"static white {level}%", (1, 255, 255, 255, level)))
+    if "colors" in suites:
+        for name, (r, g, b) in COLORS.items():
+            states.append((f"static {name}", (1, r, g, b, 100)))
+    # Suites overlap (static white at 100% is in all three)
+    seen = set()
+    return [s for s in states if not (s[1] in seen or seen.add(s[1]))]
+
+
+def run_states(state, sampler, states, dwell, interval, settle, rounds, seed=None, log=print):
+    """
+    Applies every state `rounds` times, in a shuffled order per round drawn
+    from `seed`. Returns {label: {channel: [mean watts of each round]}}.
+    """
+    rng = random.Random(seed)
+    data = {label: {name: [] for name in sampler.names} for label, _ in states}
+    for rnd in range(rounds):
+        order = list(states)
+        rng.shuffle(order)
+        for label, light in order:
+            state.set_light(*light)
+            ok, msg = state.commit(force=True)
+            if not ok:
+                raise IOError(msg)
+            time.sleep(settle)
+            for name, values in sampler.collect(dwell, interval).items():
+                data[label][name].append(mean_ci(values)[0])
+            log(f"[*] Round {rnd + 1}/{rounds}: {label}")
+    return data
+
+
+def summarize(states, data, channels):
+    """Report rows: per state and channel mean, CI over the per-round means (n = rounds) and delta to the baseline."""
+    rows = []
+    for label, light in states:
+        for channel in channels:
+            mean, ci, n = mean_ci(data[label][channel])
+            base = mean_ci(data[BASELINE][channel])[0] if BASELINE in data else float("nan")
+            rows.append({"state": label, "mode": light[0], "rgb": "%02X%02X%02X" % light[1:4],
+                         "brightness": light[4], "channel": channel, "n": n,
+                         "mean_w": mean, "ci95_w": ci, "delta_w": mean - base})
+    return rows
+
+
+def starting_light(restore_light=None, sysfs_root="/sys"):
+    """
+    (registers, source): the keyboard light to put back after the run. The
+    controller cannot be queried, so this is --restore-light, else what a
+    running infinix_daemon.py last set, else the light of the saved power
+    profile for the current source, else static white.
+    """
+    if restore_light:
+        return {LIGHT: (1, *restore_light)}, "--restore-light"
+    try:
+        from infinix_client import request
+        reply = request({"cmd": "status"}, timeout=0.5)
+        registers = {k: tuple(v) for k, v in reply.get("state", {}).items() if k == LIGHT or k in ZONE_KEYS}
+        if registers:
+            return registers, "daemon state"
+    except (OSError, ValueError):
+        pass
+    try:
+        from infinix_power_restore import load_profiles, power_source, validate_profile
+        source = power_source(sysfs_root)
+        profile = load_profiles().get(source)
+        light = validate_profile(profile).get("light") if profile else None
+        if light:
+            return {LIGHT: (light.get("mode", 1), *light["rgb"], light.get("brightness", 100))}, f"'{source}' power profile"
+    except (OSError, ValueError):
+        pass
+    return {LIGHT: DEFAULT_LIGHT}, "default"
+
+
+def restore_light(state, registers):
+    """Re-applies starting_light() registers. Returns (success, message)."""
+    light = registers.get(LIGHT)
+    if light:
+        state.set_light(*light)
+    for key in ZONE_KEYS:
+        if key in registers:
+            state.set_zone(int(key[len("zone"):]), *registers[key])
+    return state.commit(force=True)
+
+
+def compare(rows, baseline):
+    """
+    Changes against an earlier report. A change is flagged only when the two
+    95% intervals do not overlap.
+    """
+    old = {(r["state"], r["channel"]): r for r in baseline}
+    changes = []
+    for r in rows:
+        o = old.get((r["state"], r["channel"]))
+        if not o or o["mean_w"] != o["mean_w"] or r["mean_w"] != r["mean_w"]:
+            continue
+        diff = r["mean_w"] - o["mean_w"]
+        if abs(diff) > (r["ci95_w"] or 0) + (o["ci95_w"] or 0):
+            changes.append(f"{r['state']} {r['channel']}: {o['mean_w']:.3f} -> {r['mean_w']:.3f} W ({diff:+.3f})")
+    return changes
+
+
+def print_report(rows):
+    print(f"{'state':<26}{'channel':<24}{'n':>5}{'mean W':>10}{'+/- 95%':>10}{'vs Off':>10}")
+    for r in rows:
+        print(f"{r['state']:<26}{r['channel']:<24}{r['n']:>5}{r['mean_w']:>10.3f}"
+              f"{r['ci95_w']:>10.3f}{r['delta_w']:>+10.3f}")
+
+
+def write_csv(rows, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# --- Dry run ---
+
+def make_fixture(root):
+    """Fake sysfs tree: one discharging battery (power_now), one Mains supply and a RAPL package."""
+    files = {
+        "class/power_supply/AC/type": "Mains",
+        "class/power_supply/AC/online": "0",
+        "class/power_supply/BAT0/type": "Battery",
+        "class/power_supply/BAT0/status": "Discharging",
+        "class/power_supply/BAT0/power_now": "9000000",
+        "class/powercap/intel-rapl:0/name": "package-0",
+        "class/powercap/intel-rapl:0/energy_uj": "0",
+        "class/powercap/intel-rapl:0/max_energy_range_uj": "262143328850",
+    }
+    for rel, text in files.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    return root
+
+
+class FixtureLoad:
+    """
+    Drives a make_fixture() tree from the simulated light state: battery
+    power and the RAPL counter follow a made-up per-LED cost plus noise, so
+    a dry run exercises the whole pipeline with non-trivial numbers.
+    """
+
+    def __init__(self, root, state, interval=0.02, base_w=9.0, seed=0):
+        self.battery = os.path.join(root, "class/power_supply/BAT0/power_now")
+        self.energy = os.path.join(root, "class/powercap/intel-rapl:0/energy_uj")
+        self.state = state
+        self.interval = interval
+        self.base_w = base_w
+        self._rng = random.Random(seed)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def led_watts(self):
+        mode, r, g, b, bri = self.state.shadow.get(LIGHT, (0, 0, 0, 0, 0))
+        if mode == 0:
+            return 0.0
+        animated = 0.15 if mode > 1 else 0.0
+        return 1.2 * (bri / 100) * (r + g + b) / 765 + animated
+
+    def _run(self):
+        energy_uj = 0
+        last = time.monotonic()
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            watts = self.base_w + self.led_watts() + self._rng.gauss(0, 0.05)
+            energy_uj += int(watts * 0.6 * (now - last) * 1e6)
+            last = now
+            for path, value in ((self.battery, int(watts * 1e6)), (self.energy, energy_uj)):
+                with open(path + ".tmp", "w") as f:
+                    f.write(f"{value}\n")
+                os.replace(path + ".tmp", path)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def run(args):
+    suites = [s for s in args.suite.split(",") if s]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        print(f"[-] Unknown suite(s): {', '.join(sorted(unknown))}. Available: {', '.join(SUITES)}")
+        return 1
+    tmp = None
+    if args.dry_run:
+        os.environ[BACKEND_ENV] = "sim"
+        if args.sysfs == "/sys":
+            tmp = args.sysfs = make_fixture(tempfile.mkdtemp(prefix="infinix-energy-"))
+    states = build_states(suites)
+    sampler = PowerSampler(args.sysfs)
+    if not sampler.names:
+        print(f"[-] No power_supply battery or RAPL counters under {args.sysfs}")
+        return 1
+    if sampler.supply.on_ac:
+        print("[!] On AC power: battery readings show charging, not draw. Unplug for battery numbers.")
+
+    session = HIDSession(backend="sim" if args.dry_run else None)
+    state = ShadowState(session)
+    restore, source = starting_light(args.restore_light, args.sysfs)
+    print(f"[*] Will restore the light from {source} afterwards")
+    load = FixtureLoad(args.sysfs, state) if tmp else None
+    total = len(states) * args.rounds * (args.dwell + args.settle)
+    print(f"[*] {len(states)} states x {args.rounds} rounds, ~{total:.0f} s. Channels: {', '.join(sampler.names)}")
+    try:
+        if load:
+            load.start()
+        data = run_states(state, sampler, states, args.dwell, args.interval, args.settle, args.rounds, args.seed)
+    except IOError as e:
+        print(f"[-] {e}")
+        return 1
+    finally:
+        if load:
+            load.stop()
+        # Also after errors and Ctrl-C: do not leave the last measured state on
+        ok, msg = restore_light(state, restore)
+        print(f"[{'+' if ok else '!'}] Restored light ({source}): {msg}")
+        session.close()
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    rows = summarize(states, data, sampler.names)
+    print_report(rows)
+    if args.csv:
+        write_csv(rows, args.csv)
+        print(f"[+] CSV written to {args.csv}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"dwell_s": args.dwell, "interval_s": args.interval, "rounds": args.rounds,
+                       "seed": args.seed, "rows": rows}, f, indent=2)
+        print(f"[+] Report written to {args.json}")
+    if args.compare:
+        with open(args.compare) as f:
+            changes = compare(rows, json.load(f)["rows"])
+        if changes:
+            print("[!] Significant changes (95% intervals do not overlap):")
+            for change in changes:
+                print(f"    {change}")
+        else:
+            print("[+] No significant change against the baseline report")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Lighting energy benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="Measure power per lighting state")
+    p_run.add_argument("--suite", default="modes,brightness", help=f"Comma-separated: {', '.join(SUITES)}")
+    p_run.add_argument("--dwell", type=float, default=20.0, help="Seconds sampled per state and round")
+    p_run.add_argument("--interval", type=float, default=1.0, help="Seconds between samples")
+    p_run.add_argument("--settle", type=float, default=2.0, help="Seconds ignored after each switch")
+    p_run.add_argument("--rounds", type=int, default=3,
+                       help="Interleaved passes over all states; the 95%% CI is over one mean per round")
+    p_run.add_argument("--seed", type=int, default=0, help="Seed for the per-round state order")
+    p_run.add_argument("--restore-light", type=int, nargs=4, metavar=("R", "G", "B", "BRI"),
+                       help="Static light to set when done (default: the daemon's or power profile's light)")
+    p_run.add_argument("--sysfs", default="/sys", help="sysfs root (fake tree for testing)")
+    p_run.add_argument("--dry-run", action="store_true",
+                       help="Simulated controller; with the default --sysfs, a generated fake tree")
+    p_run.add_argument("--csv", help="Write per state/channel rows as CSV")
+    p_run.add_argument("--json", help="Write the report as JSON (for --compare)")
+    p_run.add_argument("--compare", help="Earlier JSON report to compare against")
+    p_fix = sub.add_parser("fixture", help="Create a fake sysfs tree for --sysfs")
+    p_fix.add_argument("root")
+    args = parser.parse_args()
+    if getattr(args, "restore_light", None) and not all(0 <= v <= 255 for v in args.restore_light):
+        parser.error("--restore-light values must be 0-255")
+
+    if args.command == "fixture":
+        print(f"[+] Fake sysfs tree in {make_fixture(args.root)}")
+    else:
+        sys.exit(run(args))
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+import argparse
+import ctypes
+import glob
+import json
+import math
+import os
+import sys
+import time
+
+from maxfan import (open_port, ec_ram_transaction, check_root,
+                    PERF_MODE_ADDR, FAN_BOOST_ADDR, MODE_OFFICE, MODE_BALANCE, MODE_GAMING)
+from infinix_ec_telemetry import SysfsChannel, discover_sysfs_channels
+
+# --- Default Curve ---
+# A level is entered when temp >= enter_temp or load >= enter_load and
+# left (downwards) only once both drop below the thresholds minus the
+# hysteresis. Levels are ordered from coolest to hottest.
+DEFAULT_CONFIG = {
+    "interval": 2.0,            # seconds between decisions
+    "smoothing": 0.5,           # EMA weight of the newest temperature sample
+    "hysteresis": 5.0,          # °C
+    "load_hysteresis": 15.0,    # % busy
+    "min_dwell_up": 4.0,        # seconds in a level before stepping up
+    "min_dwell_down": 30.0,     # seconds in a level before stepping down
+    "temp_sensors": ["Package_id", "Tctl", "x86_pkg_temp", "amdgpu", "nouveau"],
+    "gpu_load": True,           # load = max(CPU, GPU busy %) when a GPU source exists
+    "levels": [
+        {"name": "office",  "mode": MODE_OFFICE,  "fan_boost": 0, "enter_temp": 0,  "enter_load": 0},
+        {"name": "balance", "mode": MODE_BALANCE, "fan_boost": 0, "enter_temp": 65, "enter_load": 35},
+        {"name": "gaming",  "mode": MODE_GAMING,  "fan_boost": 0, "enter_temp": 80, "enter_load": 70},
+        {"name": "max",     "mode": MODE_GAMING,  "fan_boost": 1, "enter_temp": 90, "enter_load": 101},
+    ],
+}
+
+
+def load_config(path=None):
+    config = dict(DEFAULT_CONFIG)
+    if path:
+        with open(path) as f:
+            config.update(json.load(f))
+    return config
+
+
+class CPULoad:
+    """Busy percentage from the aggregate 'cpu' line of /proc/stat."""
+
+    def __init__(self, proc_root="/proc"):
+        self.fd = os.open(os.path.join(proc_root, "stat"), os.O_RDONLY)
+        self._buf = bytearray(512)
+        self._last = self._read()
+
+    def _read(self):
+        n = os.preadv(self.fd, [self._buf], 0)
+        fields = self._buf[:self._buf.find(b"\n", 0, n)].split()[1:]
+        values = [int(v) for v in fields]
+        idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+        return sum(values), idle
+
+    def percent(self):
+        total, idle = self._read()
+        d_total = total - self._last[0]
+        d_idle = idle - self._last[1]
+        self._last = (total, idle)
+        return 100.0 * (d_total - d_idle) / d_total if d_total > 0 else 0.0
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _NvmlUtilization(ctypes.Structure):
+    _fields_ = [("gpu", ctypes.c_uint), ("memory", ctypes.c_uint)]
+
+
+class NvmlGPUs:
+    """
+    NVIDIA utilization through NVML (libnvidia-ml, shipped with the driver)
+    via ctypes: one in-process call per GPU per tick, no nvidia-smi spawn.
+    Raises OSError when the library or a GPU is not available.
+    """
+
+    def __init__(self):
+        try:
+            self.lib = ctypes.CDLL("libnvidia-ml.so.1")
+        except OSError as e:
+            raise OSError(f"NVML not available: {e}")
+        if self.lib.nvmlInit_v2() != 0:
+            raise OSError("nvmlInit failed")
+        count = ctypes.c_uint()
+        if self.lib.nvmlDeviceGetCount_v2(ctypes.byref(count)) != 0 or not count.value:
+            self.lib.nvmlShutdown()
+            raise OSError("no NVIDIA GPU")
+        self.handles = []
+        for i in range(count.value):
+            handle = ctypes.c_void_p()
+            if self.lib.nvmlDeviceGetHandleByIndex_v2(i, ctypes.byref(handle)) == 0:
+                self.handles.append(handle)
+        self._util = _NvmlUtilization()
+
+    def read(self):
+        values = []
+        for handle in self.handles:
+            if self.lib.nvmlDeviceGetUtilizationRates(handle, ctypes.byref(self._util)) == 0:
+                values.append(float(self._util.gpu))
+        return values
+
+    def close(self):
+        self.lib.nvmlShutdown()
+
+
+class GPULoad:
+    """
+    GPU busy percentage: amdgpu's gpu_busy_percent in sysfs plus NVIDIA
+    GPUs through NVML. percent() is the busiest GPU, NaN when no source
+    answers.
+    """
+
+    def __init__(self, sysfs_root="/sys", nvml=True):
+        self.fds = [os.open(path, os.O_RDONLY)
+                    for path in sorted(glob.glob(os.path.join(sysfs_root, "class/drm/card*/device/gpu_busy_percent")))]
+        self._buf = bytearray(16)
+        self.nvidia = None
+        if nvml:
+            try:
+                self.nvidia = NvmlGPUs()
+            except OSError:
+                pass
+
+    @property
+    def available(self):
+        return bool(self.fds) or self.nvidia is not None
+
+    def _read_sysfs(self):
+        values = []
+        for fd in self.fds:
+            try:
+                n = os.preadv(fd, [self._buf], 0)
+                values.append(float(int(self._buf[:n])))
+            except (OSError, ValueError):
+                pass
+        return values
+
+    def percent(self):
+        values = self._read_sysfs()
+        if self.nvidia is not None:
+            values += self.nvidia.read()
+        return max(values) if values else float("nan")
+
+    def close(self):
+        for fd in self.fds:
+            os.close(fd)
+        self.fds = []
+        if self.nvidia is not None:
+            self.nvidia.close()
+            self.nvidia = None
+
+
+class FanCurveController:
+    """
+    Pure decision logic: feed it (temp, load, now), get the level index and
+    the reason for any change. Kept free of I/O so curves can be replayed.
+    """
+
+    def __init__(self, config, start_level=0):
+        self.config = config
+        self.levels = config["levels"]
+        self.level = start_level
+        self.since = None
+        self.temp = None
+
+    def _target(self, temp, load):
+        target = 0
+        for i, lvl in enumerate(self.levels):
+            if temp >= lvl["enter_temp"] or load >= lvl["enter_load"]:
+                target = i
+        return target
+
+    def update(self, temp, load, now):
+        cfg = self.config
+        alpha = cfg["smoothing"]
+        self.temp = temp if self.temp is None else alpha * temp + (1 - alpha) * self.temp
+        if self.since is None:
+            self.since = now
+        dwell = now - self.since
+
+        target = self._target(self.temp, load)
+        if target > self.level:
+            if dwell < cfg["min_dwell_up"]:
+                return None
+            lvl = self.levels[target]
+            reason = (f"temp {self.temp:.1f}C >= {lvl['enter_temp']}C" if self.temp >= lvl["enter_temp"]
+                      else f"load {load:.0f}% >= {lvl['enter_load']}%")
+        elif target < self.level:
+            cur = self.levels[self.level]
+            if (self.temp > cur["enter_temp"] - cfg["hysteresis"]
+                    or load > cur["enter_load"] - cfg["load_hysteresis"]):
+                return None  # still inside the hysteresis band
+            if dwell < cfg["min_dwell_down"]:
+                return None
+            reason = (f"temp {self.temp:.1f}C < {cur['enter_temp'] - cfg['hysteresis']}C and "
+                      f"load {load:.0f}% < {cur['enter_load'] - cfg['load_hysteresis']}%")
+        else:
+            return None
+
+        previous = self.level
+        self.level = target
+        self.since = now
+        return previous, target, f"{reason} (dwell {dwell:.0f}s)"
+
+
+class FanDaemon:
+    def __init__(self, config, sysfs_root="/sys", proc_root="/proc", port_path="/dev/port",
+                 log_path=None, dry_run=False):
+        self.config = config
+        self.controller = FanCurveController(config)
+        self.load = CPULoad(proc_root)
+        self.gpu = GPULoad(sysfs_root) if config.get("gpu_load", True) else None
+        self.sensors = [
+            SysfsChannel(name, path, scale)
+            for name, path, scale in discover_sysfs_channels(sysfs_root)
+            if name.endswith("_c") and any(s in name for s in config["temp_sensors"])
+        ]
+        if not self.sensors:
+            raise RuntimeError("no matching temperature sensors")
+        self.port = None if dry_run else open_port(port_path)
+        self.applied = {}  # EC address -> last written value
+        self.log = open(log_path, "a", buffering=1) if log_path else sys.stdout
+
+    def apply(self, level):
+        lvl = self.config["levels"][level]
+        wanted = ((PERF_MODE_ADDR, lvl["mode"]), (FAN_BOOST_ADDR, lvl["fan_boost"]))
+        writes = [(addr, value) for addr, value in wanted if self.applied.get(addr) != value]
+        # Dropping out of fan boost first, then mode, same as maxfan.py off
+        writes.sort(key=lambda w: w[0] != FAN_BOOST_ADDR or w[1] != 0)
+        if not writes or self.port is None:
+            self.applied.update(writes)
+            return None
+        report = ec_ram_transaction(self.port, writes)
+        self.applied.update(writes)
+        return report
+
+    def sample(self):
+        """(hottest sensor, busiest of CPU/GPU), skipping sensors that returned NaN; temp is None if all did."""
+        temps = [t for t in (s.read() for s in self.sensors) if not math.isnan(t)]
+        load = self.load.percent()
+        if self.gpu is not None:
+            gpu = self.gpu.percent()
+            if not math.isnan(gpu):
+                load = max(load, gpu)
+        return (max(temps) if temps else None), load
+
+    def step(self, now=None):
+        now = time.monotonic() if now is None else now
+        temp, load = self.sample()
+        if temp is None:
+            return None  # no sensor answered this tick; keep the current level
+        decision = self.controller.update(temp, load, now)
+        if decision is None:
+            return None
+        previous, target, reason = decision
+        report = self.apply(target)
+        levels = self.config["levels"]
+        ec = f" ec={report['latency_ms']:.2f}ms" if report else ""
+        self.log.write(f"{time.strftime('%Y-%m-%dT%H:%M:%S')} {levels[previous]['name']} -> "
+                       f"{levels[target]['name']}: {reason}{ec}\n")
+        return decision
+
+    def start(self):
+        """
+        Picks the starting level from the first sample (the EC state cannot
+        be read back) and writes it, so a hot machine does not start in office.
+        """
+        temp, load = self.sample()
+        if temp is None:
+            level = len(self.config["levels"]) - 1  # no temperature: fail towards cooling
+        else:
+            level = self.controller._target(temp, load)
+            self.controller.temp = temp
+        self.controller.level = level
+        self.controller.since = time.monotonic()
+        self.apply(level)
+        self.log.write(f"{time.strftime('%Y-%m-%dT%H:%M:%S')} start -> {self.config['levels'][level]['name']}: "
+                       f"temp {'n/a' if temp is None else f'{temp:.1f}C'}, load {load:.0f}%\n")
+        return level
+
+    def run(self):
+        self.start()
+        interval = self.config["interval"]
+        next_tick = time.monotonic()
+        while True:
+            self.step()
+            next_tick += interval
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+
+    def close(self):
+        self.load.close()
+        if self.gpu is not None:
+            self.gpu.close()
+        for s in self.sensors:
+            s.close()
+        if self.port is not None:
+            self.port.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Fan curve / performance mode daemon")
+    parser.add_argument("--config", help="JSON file overriding the default curve")
+    parser.add_argument("--log", help="Append decision log here instead of stdout")
+    parser.add_argument("--dry-run", action="store_true", help="Decide and log, but never write the EC")
+    parser.add_argument("--sysfs", default="/sys", help="sysfs root (fake tree for testing)")
+    parser.add_argument("--proc", default="/proc", help="procfs root (fake tree for testing)")
+    parser.add_argument("--port", default="/dev/port", help="EC port file")
+    parser.add_argument("--print-config", action="store_true", help="Print the effective config and exit")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if args.print_config:
+        print(json.dumps(config, indent=2))
+        sys.exit(0)
+    if not args.dry_run and args.port == "/dev/port":
+        check_root()
+
+    daemon = FanDaemon(config, args.sysfs, args.proc, args.port, args.log, args.dry_run)
+    names = " -> ".join(l["name"] for l in config["levels"])
+    gpu = "GPU load on" if daemon.gpu is not None and daemon.gpu.available else "no GPU load source"
+    print(f"[*] Fan daemon running ({names}), {len(daemon.sensors)} sensors, {gpu}, every {config['interval']}s")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+In-process port I/O for the EC index/data pair (0x300/0x301).
+
+ECPort goes through /dev/port: every index or data byte is one pwrite or
+pread, so an EC RAM write (5 init + 3 register writes, then the trigger
+polls) costs two syscalls per register access. IoPermPort asks for
+ioperm(0x300, 2) once and then runs the out/in instructions directly.
+
+ctypes cannot call glibc's outb()/inb(): they are inline functions in
+<sys/io.h>, not exported symbols. The helper is four tiny x86-64 stubs
+copied into an executable page (outb, inb, and the fused index+data
+write / index write + data read that ECPort's interface needs).
+
+ioperm() needs root (CAP_SYS_RAWIO) and is granted per thread, so the
+port grants itself again on first use from any new thread. Grants are
+counted per thread: closing one port does not revoke access another
+open port in the same thread still relies on.
+
+Backend selection lives in maxfan.open_port() (INFINIX_EC_BACKEND=auto,
+ioperm or devport). MockPortIO stands in for the instructions so the
+IoPermPort logic runs without hardware:
+
+    python infinix_ioport.py bench [--transactions N] [--hardware-write ADDR=VALUE ...]
+"""
+import argparse
+import ctypes
+import mmap
+import os
+import platform
+import struct
+import tempfile
+import threading
+
+from maxfan import (ECPort, ec_ram_transaction, import_shared, parse_ec_write, traffic_recorder,
+                    EC_INDEX_PORT, EC_DATA_PORT, EC_WRITE_SETTLE, PERF_MODE_ADDR, FAN_BOOST_ADDR)
+
+_INDEX = struct.pack("<I", EC_INDEX_PORT)
+
+# x86-64 SysV: first argument in edi, second in esi, result in eax
+_STUBS = (
+    # outb(port, value): mov edx, edi; mov eax, esi; out dx, al; ret
+    ("outb", b"\x89\xfa\x89\xf0\xee\xc3", None, (ctypes.c_uint, ctypes.c_uint)),
+    # inb(port): mov edx, edi; in al, dx; movzx eax, al; ret
+    ("inb", b"\x89\xfa\xec\x0f\xb6\xc0\xc3", ctypes.c_uint, (ctypes.c_uint,)),
+    # write_index(index, value): mov edx, 0x300; mov eax, edi; out dx, al; inc edx; mov eax, esi; out dx, al; ret
+    ("write_index", b"\xba" + _INDEX + b"\x89\xf8\xee\xff\xc2\x89\xf0\xee\xc3", None, (ctypes.c_uint, ctypes.c_uint)),
+    # read_index(index): mov edx, 0x300; mov eax, edi; out dx, al; inc edx; in al, dx; movzx eax, al; ret
+    ("read_index", b"\xba" + _INDEX + b"\x89\xf8\xee\xff\xc2\xec\x0f\xb6\xc0\xc3", ctypes.c_uint, (ctypes.c_uint,)),
+)
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+class NativePortIO:
+    """ioperm() plus the machine-code stubs. Raises OSError where port I/O is not possible."""
+
+    _stubs = None  # one executable page per process, never unmapped
+    _grants = threading.local()  # per-thread count of outstanding grant() calls
+
+    def __init__(self, base=EC_INDEX_PORT, count=2):
+        if platform.machine() not in ("x86_64", "AMD64"):
+            raise OSError(f"port I/O stubs are x86-64 only, not {platform.machine()}")
+        if EC_DATA_PORT != EC_INDEX_PORT + 1:
+            raise OSError("fused stubs assume the data port follows the index port")
+        self.base = base
+        self.count = count
+        self.grant()
+        stubs = self._load_stubs()
+        self.outb, self.inb, self.write_index, self.read_index = (stubs[name] for name, _, _, _ in _STUBS)
+
+    def _ioperm(self, turn_on):
+        if _libc.ioperm(self.base, self.count, turn_on) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"ioperm({self.base:#x}, {self.count}): {os.strerror(err)}")
+
+    def grant(self):
+        """ioperm() for the calling thread; only the first outstanding grant makes the call."""
+        n = getattr(self._grants, "count", 0)
+        if n == 0:
+            self._ioperm(1)
+        self._grants.count = n + 1
+
+    @classmethod
+    def _load_stubs(cls):
+        if cls._stubs is not None:
+            return cls._stubs
+        page = mmap.mmap(-1, mmap.PAGESIZE, prot=mmap.PROT_READ | mmap.PROT_WRITE)
+        offsets = []
+        for _, code, _, _ in _STUBS:
+            offsets.append(page.tell())
+            page.write(code)
+        addr = ctypes.addressof(ctypes.c_char.from_buffer(page))
+        # W^X: writable while filling, executable (and read-only) afterwards
+        if _libc.mprotect(ctypes.c_void_p(addr), mmap.PAGESIZE, mmap.PROT_READ | mmap.PROT_EXEC) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"mprotect: {os.strerror(err)}")
+        cls._page = page
+        cls._stubs = {name: ctypes.CFUNCTYPE(restype, *argtypes)(addr + off)
+                      for (name, _, restype, argtypes), off in zip(_STUBS, offsets)}
+        return cls._stubs
+
+    def release(self):
+        """Drops one grant of the calling thread; the last one revokes the ports."""
+        n = getattr(self._grants, "count", 0)
+        if n == 0:
+            return
+        self._grants.count = n - 1
+        if n == 1:
+            self._ioperm(0)
+
+
+class MockPortIO:
+    """
+    The index/data port pair in software: outb to the index port latches
+    the register, outb/inb on the data port go to `ec` (a SimulatedEC by
+    default, anything with ECPort's write_index/read_index). Counts the
+    instructions it stands in for.
+    """
+
+    def __init__(self, ec=None):
+        if ec is None:
+            ec = import_shared("infinix_simulator").SimulatedEC()
+        self.ec = ec
+        self.index = 0
+        self.instructions = 0
+
+    def outb(self, port, value):
+        self.instructions += 1
+        if port == EC_INDEX_PORT:
+            self.index = value
+        elif port == EC_DATA_PORT:
+            self.ec.write_index(self.index, value)
+        else:
+            raise ValueError(f"port {port:#x} outside the EC pair")
+
+    def inb(self, port):
+        self.instructions += 1
+        if port != EC_DATA_PORT:
+            raise ValueError(f"inb from {port:#x}")
+        return self.ec.read_index(self.index)
+
+    def write_index(self, index, value):
+        self.outb(EC_INDEX_PORT, index)
+        self.outb(EC_DATA_PORT, value)
+
+    def read_index(self, index):
+        self.outb(EC_INDEX_PORT, index)
+        return self.inb(EC_DATA_PORT)
+
+    def grant(self):
+        pass
+
+    def release(self):
+        pass
+
+
+class IoPermPort:
+    """
+    ECPort interface on direct port I/O. io defaults to NativePortIO()
+    (raises OSError without root); pass a MockPortIO for testing.
+    """
+
+    def __init__(self, io=None, recorder=None):
+        self.io = io if io is not None else NativePortIO()
+        self.ops = 0
+        self._write = self.io.write_index
+        self._read = self.io.read_index
+        # Thread-local rather than a set of idents: a new thread can reuse a dead one's ident
+        self._local = threading.local()
+        if io is None:
+            self._local.granted = True  # NativePortIO() granted the constructing thread
+        # Traffic capture (infinix_traffic.py); recorder=False opts out of the env default
+        if recorder is None:
+            recorder = traffic_recorder()
+        self.recorder = recorder or None
+
+    def _grant(self):
+        # ioperm is per thread; an out from an ungranted thread is a SIGSEGV
+        self.io.grant()
+        self._local.granted = True
+
+    def write_index(self, index, value):
+        if not getattr(self._local, "granted", False):
+            self._grant()
+        self._write(index, value)
+        self.ops += 2
+        if self.recorder is not None:
+            self.recorder.record_ec(index, value)
+
+    def read_index(self, index):
+        if not getattr(self._local, "granted", False):
+            self._grant()
+        value = self._read(index)
+        self.ops += 2
+        return value
+
+    def close(self):
+        """
+        Releases this port's grant in the calling thread. Grants taken in other
+        threads stay until those threads exit (ioperm cannot be revoked from
+        another thread).
+        """
+        if self.io is not None:
+            if getattr(self._local, "granted", False):
+                self._local.granted = False
+                try:
+                    self.io.release()
+                except OSError:
+                    pass
+            self.io = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Benchmark ---
+
+def _percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def bench_port(name, port, writes, transactions, wait=True, syscalls_per_op=0, settle=EC_WRITE_SETTLE):
+    # settle=0 only for the file and mock backends, where the sleeps would hide the
+    # per-access cost being compared; a real EC keeps polling and the settle fallback
+    lat = sorted(ec_ram_transaction(port, writes, wait=wait, settle=settle)["latency_ms"] * 1000
+                 for _ in range(transactions))
+    ops = port.ops // transactions
+    return {"backend": name, "tx_p50_us": _percentile(lat, 0.5), "tx_p99_us": _percentile(lat, 0.99),
+            "port_ops": ops, "syscalls": ops * syscalls_per_op}
+
+
+def benchmark(transactions=2000, hardware_writes=None, hardware_transactions=50):
+    """
+    EC write sequence on both paths: /dev/port semantics on a plain file vs
+    IoPermPort on MockPortIO, write sequence only (a file never clears the
+    trigger). hardware_writes ([(addr, value)], opt-in, root) also benchmarks
+    both real paths with full transactions (completion polling, with the
+    EC_WRITE_SETTLE fallback); pass the values the EC already holds; there
+    is no verified way to read them back first.
+    """
+    writes = [(PERF_MODE_ADDR, 0), (FAN_BOOST_ADDR, 0)]
+    results = []
+    with tempfile.NamedTemporaryFile() as f:
+        f.truncate(EC_DATA_PORT + 1)
+        with ECPort(f.name, recorder=False) as port:
+            results.append(bench_port("devport-file", port, writes, transactions, False, 1, settle=0))
+    with IoPermPort(MockPortIO(), recorder=False) as port:
+        results.append(bench_port("ioperm-mock", port, writes, transactions, False, settle=0))
+
+    if hardware_writes:
+        writes = hardware_writes
+        with ECPort(recorder=False) as port:
+            results.append(bench_port("devport", port, writes, hardware_transactions, True, 1))
+        try:
+            with IoPermPort(recorder=False) as port:
+                results.append(bench_port("ioperm", port, writes, hardware_transactions))
+        except OSError as e:
+            print(f"[!] ioperm unavailable: {e}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - EC port I/O backends")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_bench = sub.add_parser("bench", help="Benchmark /dev/port vs ioperm EC writes")
+    p_bench.add_argument("--transactions", type=int, default=2000)
+    p_bench.add_argument("--hardware-write", action="append", type=parse_ec_write, metavar="ADDR=VALUE",
+                         help="Also bench the real EC (root), repeatedly writing ADDR=VALUE. "
+                              "Use the values already set, e.g. 0x40=1 0x41=0 after 'maxfan.py off'")
+    args = parser.parse_args()
+
+    print(f"{'backend':<14}{'p50 us/tx':>11}{'p99 us/tx':>11}{'port ops':>10}{'syscalls':>10}")
+    for r in benchmark(args.transactions, args.hardware_write):
+        print(f"{r['backend']:<14}{r['tx_p50_us']:>11.1f}{r['tx_p99_us']:>11.1f}{r['port_ops']:>10}{r['syscalls']:>10}")
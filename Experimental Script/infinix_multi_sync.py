@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+One effect across the keyboard zones, the back zone LEDs and the XM01 mouse.
+
+All devices run off one clock: a master tick grid start + n / fps. Each
+device runs in its own thread and only takes every k-th tick, where k is
+the smallest divider that keeps it under its own rate limit, and every
+device evaluates the effect at the tick's scheduled time rather than at
+whatever time its write happens. Devices therefore stay phase-locked even
+when one of them is slow, and a tick on two devices' grids is sent by
+both; the spread of completion times on such shared ticks is the
+cross-device skew. Missed ticks are skipped, not queued.
+
+The serial connection to the mouse is opened once and kept in a pool
+keyed by port, reopened only after an error (like HIDSession).
+
+XM01 protocol: the XM01 app's serial protocol has not been decoded yet.
+The frame below is a placeholder: 0xAA, cmd 0x01, R, G, B, brightness,
+checksum (sum of bytes 1..5 & 0xFF), acknowledged by one 0x55 byte when
+--ack is given. Adjust XM01_* once a capture is available. Until then a
+real serial port is only written with --experimental-xm01.
+
+    python infinix_multi_sync.py rainbow --mouse /dev/ttyUSB0 --experimental-xm01 --duration 30
+    python infinix_multi_sync.py breathing --pty --back-zone follow --json skew.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+# Shared device code lives next to the original scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Original Script"))
+
+from infinix_hid_session import HIDSession
+from infinix_protocol import PERFORMANCE_MODES, PacketCodec
+from infinix_zone_animation import EFFECTS, ZONE_IDS, ZONE_MODE
+
+XM01_SYNC = 0xAA
+XM01_CMD_COLOR = 0x01
+XM01_ACK = 0x55
+XM01_FRAME_SIZE = 7
+DEFAULT_BAUD = 115200
+
+
+def xm01_frame(r, g, b, brightness):
+    frame = bytearray((XM01_SYNC, XM01_CMD_COLOR, r, g, b, brightness, 0))
+    frame[6] = sum(frame[1:6]) & 0xFF
+    return frame
+
+
+# --- Serial pool ---
+
+class SerialPool:
+    """Persistent serial connections shared by port; a failed port is closed and reopened on next use."""
+
+    def __init__(self):
+        self._conns = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, port, baud=DEFAULT_BAUD, timeout=0.05):
+        with self._lock:
+            conn = self._conns.get(port)
+            if conn is None or not conn.is_open:
+                import serial
+                conn = self._conns[port] = serial.Serial(port, baud, timeout=timeout, write_timeout=timeout)
+            return conn
+
+    def invalidate(self, port):
+        with self._lock:
+            conn = self._conns.pop(port, None)
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def close_all(self):
+        for port in list(self._conns):
+            self.invalidate(port)
+
+
+_pool = SerialPool()
+
+
+# --- Devices ---
+# send(frame) gets the effect's per-zone colors for one tick and returns
+# True if anything was written. Each device is only called from its own
+# thread, so codecs and caches need no locking.
+
+class KeyboardDevice:
+    """Keyboard zones 1-4 via the 0x06/0x07 zone packets; unchanged zones are not resent."""
+
+    def __init__(self, session, brightness=100, max_rate=60):
+        self.name = "keyboard"
+        self.session = session
+        self.brightness = brightness
+        self.max_rate = max_rate
+        self.codec = PacketCodec()
+        self._sent = [None] * len(ZONE_IDS)
+
+    def send(self, frame):
+        changed = [i for i, rgb in enumerate(frame) if rgb != self._sent[i]]
+        # Encode everything before marking it sent: a color the codec rejects stays pending
+        packets = [self.codec.zone(ZONE_IDS[i], ZONE_MODE, *frame[i], self.brightness) for i in changed]
+        if not packets:
+            return False
+        for i in changed:
+            self._sent[i] = frame[i]
+        try:
+            with self.session.transaction() as tx:
+                for packet in packets:
+                    tx.write(packet)
+        except IOError:
+            self._sent = [None] * len(ZONE_IDS)
+            raise
+        return True
+
+    def close(self):
+        pass
+
+
+class BackZoneDevice:
+    """
+    The back zone LEDs only follow the performance packet (office /
+    balance / gaming). With a fixed mode it is sent once; with "follow" the
+    effect's mean brightness picks the mode, which also switches the
+    performance profile, hence the low default rate. close() then sets
+    `restore` so the profile does not stay wherever the effect left it.
+    """
+
+    LEVELS = ("office", "balance", "gaming")
+
+    def __init__(self, session, mode="follow", max_rate=1, restore="balance"):
+        self.name = "back_zone"
+        self.session = session
+        self.mode = mode
+        self.max_rate = max_rate
+        self.restore = restore
+        self.codec = PacketCodec()
+        self._sent = None
+
+    def send(self, frame):
+        if self.mode == "follow":
+            level = sum(sum(rgb) for rgb in frame) / (765 * len(frame))
+            name = self.LEVELS[min(len(self.LEVELS) - 1, int(level * len(self.LEVELS)))]
+        else:
+            name = self.mode
+        if name == self._sent:
+            return False
+        ok, msg = self.session.write(self.codec.performance(PERFORMANCE_MODES[name]))
+        if not ok:
+            raise IOError(msg)
+        self._sent = name
+        return True
+
+    def close(self):
+        if self.mode != "follow" or self._sent is None or self._sent == self.restore:
+            return
+        ok, msg = self.session.write(self.codec.performance(PERFORMANCE_MODES[self.restore]))
+        if ok:
+            self._sent = self.restore
+        else:
+            print(f"[!] Back zone: could not restore {self.restore}: {msg}")
+
+
+class XM01Device:
+    """
+    XM01 mouse on a pooled serial port; shows one zone of the effect
+    (default the right one). Raises ImportError when pyserial is missing,
+    before any thread starts.
+    """
+
+    def __init__(self, port, baud=DEFAULT_BAUD, brightness=100, max_rate=30, zone=4, ack_timeout=None, pool=None):
+        import serial  # SerialPool imports it lazily; fail here, not in the device thread
+        self.name = "mouse"
+        self.port = port
+        self.baud = baud
+        self.brightness = brightness
+        self.max_rate = max_rate
+        self.zone = zone
+        self.ack_timeout = ack_timeout
+        self.pool = pool or _pool
+        self._sent = None
+
+    def send(self, frame):
+        rgb = frame[self.zone - 1]
+        if rgb == self._sent:
+            return False
+        try:
+            conn = self.pool.acquire(self.port, self.baud)
+            conn.write(xm01_frame(rgb[0], rgb[1], rgb[2], self.brightness))
+            conn.flush()
+            if self.ack_timeout is not None:
+                conn.timeout = self.ack_timeout
+                if conn.read(1) != bytes((XM01_ACK,)):
+                    raise IOError("XM01: no ack")
+        except Exception:
+            # Unknown state after a failed write: reopen and resend next tick
+            self.pool.invalidate(self.port)
+            self._sent = None
+            raise
+        self._sent = rgb
+        return True
+
+    def close(self):
+        self.pool.invalidate(self.port)
+
+
+# --- Clock ---
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+class MultiDeviceSync:
+    """Runs one effect on several devices from one tick grid (see module docstring)."""
+
+    def __init__(self, effect, devices, fps=60):
+        if fps <= 0 or any(d.max_rate <= 0 for d in devices):
+            raise ValueError("fps and every device rate must be positive")
+        self.effect = effect
+        self.devices = devices
+        self.fps = fps
+        # Rate limit as a tick divider keeps every device on the shared grid
+        self.dividers = [max(1, math.ceil(fps / d.max_rate)) for d in devices]
+        self._stop = threading.Event()
+        self._done = [{} for _ in devices]  # tick -> completion time
+        self._stats = [None] * len(devices)
+
+    def _run_device(self, i, start, duration):
+        dev, k, fps = self.devices[i], self.dividers[i], self.fps
+        done = self._done[i]
+        latency = []
+        frames = dropped = errors = 0
+        n = 0
+        try:
+            while not self._stop.is_set():
+                deadline = start + n / fps
+                delay = deadline - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    break
+                if duration is not None and n / fps >= duration:
+                    break
+                try:
+                    wrote = dev.send(self.effect(n / fps))
+                except (IOError, OSError, ValueError, ImportError):
+                    # ValueError: the codec rejected a color; ImportError: pyserial went missing.
+                    # Count it, the thread must keep the clock
+                    wrote = False
+                    errors += 1
+                now = time.monotonic()
+                if wrote:
+                    frames += 1
+                    done[n] = now
+                    latency.append(now - deadline)
+                n += k
+                behind = int((time.monotonic() - start) * fps) - n
+                if behind > 0:
+                    skip = -(-behind // k) * k
+                    dropped += skip // k
+                    n += skip
+        finally:
+            # Stats even if something unexpected ends the thread
+            latency.sort()
+            self._stats[i] = {"rate_hz": fps / k, "frames": frames, "dropped": dropped, "errors": errors,
+                              "latency_mean_ms": sum(latency) / len(latency) * 1000 if latency else float("nan"),
+                              "latency_p99_ms": _percentile(latency, 0.99) * 1000}
+
+    def run(self, duration=None):
+        self._stop.clear()
+        self._done = [{} for _ in self.devices]
+        # Common start slightly ahead so every thread is waiting on tick 0
+        start = time.monotonic() + 0.05
+        threads = [threading.Thread(target=self._run_device, args=(i, start, duration), daemon=True,
+                                    name=f"infinix-sync-{dev.name}")
+                   for i, dev in enumerate(self.devices)]
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(0.2)
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join()
+        return self.report()
+
+    def stop(self):
+        self._stop.set()
+
+    def report(self):
+        """Per device stats plus skew: completion spread on every tick sent by two or more devices."""
+        report = {"fps": self.fps,
+                  "devices": {dev.name: stats for dev, stats in zip(self.devices, self._stats) if stats}}
+        if len(self.devices) > 1:
+            by_tick = {}
+            for done in self._done:
+                for n, t in done.items():
+                    by_tick.setdefault(n, []).append(t)
+            spreads = sorted(max(ts) - min(ts) for ts in by_tick.values() if len(ts) > 1)
+            report["skew"] = {"ticks": len(spreads),
+                              "mean_ms": sum(spreads) / len(spreads) * 1000 if spreads else float("nan"),
+                              "p99_ms": _percentile(spreads, 0.99) * 1000,
+                              "max_ms": spreads[-1] * 1000 if spreads else float("nan")}
+        return report
+
+
+# --- pty stand-in for the mouse ---
+
+class PtyMouse:
+    """
+    Pseudo-terminal that speaks the XM01 frame format: validates each
+    frame, records (receive time, rgb, brightness) and acks it. `path` is
+    the slave device to hand to XM01Device.
+    """
+
+    def __init__(self, ack=True):
+        import tty
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.path = os.ttyname(self.slave)
+        self.ack = ack
+        self.frames = []
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="infinix-pty-mouse")
+        self._thread.start()
+
+    def _run(self):
+        import select
+        buf = bytearray()
+        while not self._stop.is_set():
+            if not select.select([self.master], [], [], 0.1)[0]:
+                continue
+            try:
+                buf += os.read(self.master, 256)
+            except OSError:
+                return
+            while len(buf) >= XM01_FRAME_SIZE:
+                if buf[0] != XM01_SYNC:
+                    del buf[0]
+                    self.errors += 1
+                    continue
+                frame = buf[:XM01_FRAME_SIZE]
+                del buf[:XM01_FRAME_SIZE]
+                if frame[1] != XM01_CMD_COLOR or frame[6] != sum(frame[1:6]) & 0xFF:
+                    self.errors += 1
+                    continue
+                self.frames.append((time.monotonic(), tuple(frame[2:5]), frame[5]))
+                if self.ack:
+                    os.write(self.master, bytes((XM01_ACK,)))
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def print_report(report):
+    for name, s in report["devices"].items():
+        print(f"[*] {name:<10} {s['rate_hz']:>6.1f} Hz  {s['frames']:>6} frames  {s['dropped']:>4} dropped  "
+              f"{s['errors']:>3} errors  latency mean {s['latency_mean_ms']:.2f} ms / p99 {s['latency_p99_ms']:.2f} ms")
+    skew = report.get("skew")
+    if skew:
+        print(f"[*] Skew over {skew['ticks']} shared ticks: mean {skew['mean_ms']:.2f} ms, "
+              f"p99 {skew['p99_ms']:.2f} ms, max {skew['max_ms']:.2f} ms")
+
+
+def _positive(text):
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"must be positive, got {text}")
+    return value
+
+
+def _brightness(text):
+    value = int(text)
+    if not 0 <= value <= 100:
+        raise argparse.ArgumentTypeError(f"must be 0-100, got {text}")
+    return value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Synchronized keyboard / back zone / XM01 effects")
+    parser.add_argument("effect", choices=sorted(EFFECTS), help="Effect to render")
+    parser.add_argument("--fps", type=_positive, default=60, help="Master clock rate")
+    parser.add_argument("--bri", type=_brightness, default=100, help="Brightness (0-100)")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after N seconds")
+    parser.add_argument("--kb-rate", type=_positive, default=60, help="Keyboard rate limit (Hz)")
+    parser.add_argument("--no-keyboard", action="store_true")
+    parser.add_argument("--back-zone", default=None, choices=["follow"] + list(PERFORMANCE_MODES),
+                        help="Drive the back zone LEDs (follow changes the performance profile)")
+    parser.add_argument("--back-zone-rate", type=_positive, default=1, help="Back zone rate limit (Hz)")
+    parser.add_argument("--restore-mode", default="balance", choices=list(PERFORMANCE_MODES),
+                        help="Performance profile to set when --back-zone follow stops")
+    mouse = parser.add_mutually_exclusive_group()
+    mouse.add_argument("--mouse", help="XM01 serial port, e.g. /dev/ttyUSB0 (needs --experimental-xm01)")
+    mouse.add_argument("--pty", action="store_true", help="Use a pty stand-in for the mouse")
+    parser.add_argument("--experimental-xm01", action="store_true",
+                        help="Send the placeholder XM01 frame format to a real serial port")
+    parser.add_argument("--baud", type=int, default=DEFAULT_BAUD)
+    parser.add_argument("--mouse-rate", type=_positive, default=30, help="Mouse rate limit (Hz)")
+    parser.add_argument("--mouse-zone", type=int, default=4, choices=ZONE_IDS, help="Zone the mouse mirrors")
+    parser.add_argument("--ack", type=float, default=None, metavar="SECONDS",
+                        help="Wait up to SECONDS for the mouse ack per frame")
+    parser.add_argument("--json", help="Write the report as JSON")
+    args = parser.parse_args()
+    if args.mouse and not args.experimental_xm01:
+        print("[-] The XM01 serial protocol is not decoded yet; the frame format is a placeholder.")
+        print("    Pass --experimental-xm01 to send it to a real port anyway, or use --pty.")
+        sys.exit(1)
+
+    session = HIDSession()
+    devices = []
+    if not args.no_keyboard:
+        devices.append(KeyboardDevice(session, args.bri, args.kb_rate))
+    if args.back_zone:
+        devices.append(BackZoneDevice(session, args.back_zone, args.back_zone_rate, args.restore_mode))
+    stand_in = PtyMouse(ack=args.ack is not None) if args.pty else None
+    if args.mouse or stand_in:
+        try:
+            devices.append(XM01Device(args.mouse or stand_in.path, args.baud, args.bri, args.mouse_rate,
+                                      args.mouse_zone, args.ack))
+        except ImportError:
+            print("[-] pyserial is required for the mouse: pip install pyserial")
+            if stand_in:
+                stand_in.close()
+            sys.exit(1)
+    if not devices:
+        print("[-] No devices selected")
+        sys.exit(1)
+
+    sync = MultiDeviceSync(EFFECTS[args.effect], devices, args.fps)
+    print(f"[*] Running '{args.effect}' on {', '.join(d.name for d in devices)} at {args.fps} fps (Ctrl+C to stop)")
+    try:
+        sync.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for dev in devices:
+            dev.close()
+        session.close()
+        if stand_in:
+            print(f"[*] pty mouse: {len(stand_in.frames)} frames received, {stand_in.errors} bad")
+            stand_in.close()
+    report = sync.report()
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[+] Report written to {args.json}")
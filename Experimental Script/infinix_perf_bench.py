@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+What OFFICE / BALANCE / GAMING actually change, measured.
+
+For each mode the HID performance packet (0x40/0x41/0x42) is sent, and
+with --ec the EC register 0x40 is written too. The system then idles for
+--cooldown seconds and a fixed CPU workload (SHA-256 over a 64 KiB buffer,
+one process per CPU) runs for --duration seconds. Throughput, cpufreq,
+RAPL power and temperatures are sampled over time. Output is a side by side
+summary per mode plus a time-series CSV.
+
+Readers are pluggable: anything with .names and .read() -> list of floats
+can be passed to characterize(). The default set reads from --sysfs, so
+the suite runs against a fake tree:
+
+    python infinix_perf_bench.py run --csv series.csv --json summary.json
+    python infinix_perf_bench.py run --modes office,gaming --ec --duration 120
+    python infinix_perf_bench.py run --dry-run --duration 3 --cooldown 0
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# Shared device code lives next to the original scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Original Script"))
+
+from infinix_hid_session import BACKEND_ENV, HIDSession
+from infinix_protocol import PERFORMANCE_MODES
+from infinix_shadow_state import PERFORMANCE, ShadowState
+from infinix_ec_telemetry import _read_text, discover_sysfs_channels
+from infinix_energy_bench import RaplReader, make_fixture as make_power_fixture
+from infinix_power_restore import EC_MODES
+from maxfan import open_port, ec_ram_transaction, ec_ram_read, ec_read_enabled, ECReadDisabled, PERF_MODE_ADDR
+
+WORK_BLOCK = 64 * 1024
+
+
+# --- Readers ---
+
+class CpufreqReader:
+    """Mean and max scaling_cur_freq over all CPUs, in MHz."""
+
+    names = ["cpufreq_mean_mhz", "cpufreq_max_mhz"]
+
+    def __init__(self, sysfs_root="/sys"):
+        self.paths = sorted(glob.glob(os.path.join(sysfs_root, "devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq")))
+        if not self.paths:
+            self.names = []
+
+    def read(self):
+        if not self.paths:
+            return []
+        freqs = []
+        for path in self.paths:
+            try:
+                freqs.append(int(_read_text(path)) / 1000)
+            except ValueError:
+                pass
+        if not freqs:
+            return [float("nan"), float("nan")]
+        return [sum(freqs) / len(freqs), max(freqs)]
+
+
+class ThermalReader:
+    """hwmon/thermal temperatures (°C) and fan speeds (RPM)."""
+
+    def __init__(self, sysfs_root="/sys"):
+        channels = discover_sysfs_channels(sysfs_root)
+        self.names = [name for name, _, _ in channels]
+        self._channels = [(path, scale) for _, path, scale in channels]
+
+    def read(self):
+        values = []
+        for path, scale in self._channels:
+            try:
+                values.append(int(_read_text(path)) * scale)
+            except ValueError:
+                values.append(float("nan"))
+        return values
+
+
+def default_readers(sysfs_root="/sys"):
+    """cpufreq, RAPL (W since the previous sample) and hwmon/thermal; empty readers are dropped."""
+    readers = [CpufreqReader(sysfs_root), RaplReader(sysfs_root), ThermalReader(sysfs_root)]
+    return [r for r in readers if r.names]
+
+
+# --- Workload ---
+
+def _worker(slot, counts, stop):
+    block = os.urandom(WORK_BLOCK)
+    while not stop.is_set():
+        for _ in range(16):
+            block = hashlib.sha256(block).digest() * (WORK_BLOCK // 32)
+        counts[slot] += 16
+
+
+class Workload:
+    """Fixed CPU load: `workers` processes hashing 64 KiB blocks, counted per process."""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.counts = multiprocessing.Array("Q", self.workers, lock=False)
+        self._stop = multiprocessing.Event()
+        self._procs = []
+
+    def start(self):
+        self._stop.clear()
+        self._procs = [multiprocessing.Process(target=_worker, args=(i, self.counts, self._stop), daemon=True)
+                       for i in range(self.workers)]
+        for proc in self._procs:
+            proc.start()
+
+    def done(self):
+        """Blocks hashed so far (all workers)."""
+        return sum(self.counts)
+
+    def stop(self):
+        self._stop.set()
+        for proc in self._procs:
+            proc.join()
+        self._procs = []
+        for i in range(self.workers):
+            self.counts[i] = 0
+
+
+# --- Benchmark ---
+
+def apply_mode(state, name, port=None):
+    """HID performance packet, plus the EC register when a port is given. Returns (success, msg)."""
+    state.set_performance(PERFORMANCE_MODES[name])
+    ok, msg = state.commit(force=True)
+    if ok and port is not None:
+        ec_ram_transaction(port, [(PERF_MODE_ADDR, EC_MODES[name])])
+        msg += f", EC 0x{PERF_MODE_ADDR:02X} = {EC_MODES[name]}"
+    return ok, msg
+
+
+def starting_mode(port=None):
+    """
+    Mode name currently in EC 0x40, or None. The keyboard controller cannot
+    be queried, so this needs an EC port and the experimental EC read
+    (INFINIX_EC_EXPERIMENTAL_READ=1).
+    """
+    if port is None or not ec_read_enabled():
+        return None
+    try:
+        value, = ec_ram_read(port, [PERF_MODE_ADDR])
+    except (OSError, ECReadDisabled):
+        return None
+    return next((name for name, mode in EC_MODES.items() if mode == value), None)
+
+
+def run_mode(workload, readers, duration, interval):
+    """One workload run; returns rows [t, blocks_per_s, reader values...] on a drift-free schedule."""
+    for reader in readers:
+        reader.read()  # primes the RAPL counters
+    rows = []
+    workload.start()
+    try:
+        start = last_t = time.monotonic()
+        last_done = 0
+        n = 1
+        while True:
+            delay = start + n * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.monotonic()
+            if now - start > duration + interval / 2:
+                break
+            done = workload.done()
+            row = [now - start, (done - last_done) / (now - last_t)]
+            for reader in readers:
+                row.extend(reader.read())
+            rows.append(row)
+            last_done, last_t = done, now
+            n = max(n + 1, int((now - start) / interval) + 1)
+    finally:
+        workload.stop()
+    return rows
+
+
+def characterize(state, modes, readers, workload, duration=60.0, interval=1.0, cooldown=30.0,
+                 port=None, log=print):
+    """Returns {mode: rows}; columns are ["t", "blocks_per_s"] + every reader's names."""
+    series = {}
+    for name in modes:
+        ok, msg = apply_mode(state, name, port)
+        if not ok:
+            raise IOError(msg)
+        log(f"[*] {name}: {msg}; cooling down {cooldown:.0f} s")
+        time.sleep(cooldown)
+        log(f"[*] {name}: running workload on {workload.workers} processes for {duration:.0f} s")
+        series[name] = run_mode(workload, readers, duration, interval)
+    return series
+
+
+def _mean(values):
+    values = [v for v in values if v == v]
+    return sum(values) / len(values) if values else float("nan")
+
+
+def summarize(series, columns):
+    """
+    Per mode: throughput over the first 10 s, the whole run and the second
+    half (sustained, after any short boost expires); mean of every other
+    column, max of temperatures, and work per joule of package energy.
+    """
+    summary = {}
+    for mode, rows in series.items():
+        cols = list(zip(*rows)) if rows else [[] for _ in columns]
+        rate = cols[1]
+        half = len(rows) // 2
+        stats = {
+            "burst_blocks_per_s": _mean([r[1] for r in rows if r[0] <= 10.0]),
+            "mean_blocks_per_s": _mean(rate),
+            "sustained_blocks_per_s": _mean(rate[half:]),
+        }
+        for name, values in zip(columns[2:], cols[2:]):
+            stats[f"mean_{name}"] = _mean(values)
+            if name.endswith("_c"):
+                stats[f"max_{name}"] = max((v for v in values if v == v), default=float("nan"))
+        package = [name for name in columns if name.startswith("rapl_") and "package" in name]
+        if package:
+            watts = stats[f"mean_{package[0]}"]
+            stats["blocks_per_joule"] = stats["mean_blocks_per_s"] / watts if watts else float("nan")
+        summary[mode] = stats
+    return summary
+
+
+def print_side_by_side(summary):
+    modes = list(summary)
+    metrics = list(dict.fromkeys(k for stats in summary.values() for k in stats))
+    width = max(len(m) for m in metrics) + 2
+    print(f"{'':<{width}}" + "".join(f"{m:>14}" for m in modes))
+    for metric in metrics:
+        print(f"{metric:<{width}}" + "".join(f"{summary[m].get(metric, float('nan')):>14.2f}" for m in modes))
+
+
+def write_series_csv(series, columns, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["mode"] + columns)
+        for mode, rows in series.items():
+            for row in rows:
+                writer.writerow([mode] + [f"{v:.6g}" for v in row])
+
+
+# --- Dry run ---
+
+def make_fixture(root, cpus=4):
+    """make_power_fixture() plus cpufreq for `cpus` CPUs and a coretemp package sensor."""
+    make_power_fixture(root)
+    files = {"class/hwmon/hwmon0/name": "coretemp",
+             "class/hwmon/hwmon0/temp1_label": "Package id 0",
+             "class/hwmon/hwmon0/temp1_input": "45000"}
+    for cpu in range(cpus):
+        files[f"devices/system/cpu/cpu{cpu}/cpufreq/scaling_cur_freq"] = "800000"
+    for rel, text in files.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    return root
+
+
+# Made-up firmware behaviour for the dry run: (sustained MHz, package W)
+_FIXTURE_MODES = {0x40: (2200, 15.0), 0x41: (3100, 35.0), 0x42: (3900, 55.0)}
+
+
+class FixtureLoad:
+    """Moves the fake cpufreq/RAPL/temperature files with the simulated performance mode."""
+
+    def __init__(self, root, state, interval=0.05, seed=0):
+        self.root = root
+        self.state = state
+        self.interval = interval
+        self._rng = random.Random(seed)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _write(self, rel, value):
+        path = os.path.join(self.root, rel)
+        with open(path + ".tmp", "w") as f:
+            f.write(f"{value}\n")
+        os.replace(path + ".tmp", path)
+
+    def _run(self):
+        energy_uj = 0
+        temp = 45.0
+        last = time.monotonic()
+        freqs = sorted(glob.glob(os.path.join(self.root, "devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq")))
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            mhz, watts = _FIXTURE_MODES.get(self.state.shadow.get(PERFORMANCE), (2500, 25.0))
+            watts += self._rng.gauss(0, 0.5)
+            energy_uj += int(watts * (now - last) * 1e6)
+            temp += (40 + watts - temp) * 0.05
+            last = now
+            self._write("class/powercap/intel-rapl:0/energy_uj", energy_uj)
+            self._write("class/hwmon/hwmon0/temp1_input", int(temp * 1000))
+            for path in freqs:
+                self._write(os.path.relpath(path, self.root), int((mhz + self._rng.gauss(0, 50)) * 1000))
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def run(args):
+    modes = [m for m in args.modes.split(",") if m]
+    unknown = set(modes) - set(PERFORMANCE_MODES)
+    if unknown:
+        print(f"[-] Unknown mode(s): {', '.join(sorted(unknown))}. Available: {', '.join(PERFORMANCE_MODES)}")
+        return 1
+    tmp = None
+    if args.dry_run:
+        os.environ[BACKEND_ENV] = "sim"
+        if args.sysfs == "/sys":
+            tmp = args.sysfs = make_fixture(tempfile.mkdtemp(prefix="infinix-perf-"))
+    readers = default_readers(args.sysfs)
+    columns = ["t", "blocks_per_s"] + [name for r in readers for name in r.names]
+    print(f"[*] Columns: {', '.join(columns[2:]) or 'throughput only'}")
+
+    session = HIDSession(backend="sim" if args.dry_run else None)
+    state = ShadowState(session)
+    port = open_port(args.port) if args.ec else None
+    restore = args.restore_mode or starting_mode(port) or "balance"
+    print(f"[*] Will restore {restore} afterwards")
+    load = FixtureLoad(args.sysfs, state) if tmp else None
+    try:
+        if load:
+            load.start()
+        series = characterize(state, modes, readers, Workload(args.workers), args.duration,
+                              args.interval, args.cooldown, port)
+    except IOError as e:
+        print(f"[-] {e}")
+        return 1
+    finally:
+        if load:
+            load.stop()
+        # Leave the machine in the mode it started in (HID packet and, with --ec, the EC)
+        try:
+            ok, msg = apply_mode(state, restore, port)
+            print(f"[{'+' if ok else '!'}] Restored {restore}: {msg}")
+        except OSError as e:
+            print(f"[!] Could not restore {restore}: {e}")
+        if port is not None:
+            port.close()
+        session.close()
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    summary = summarize(series, columns)
+    print_side_by_side(summary)
+    if args.csv:
+        write_series_csv(series, columns, args.csv)
+        print(f"[+] Time series written to {args.csv}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"duration_s": args.duration, "interval_s": args.interval, "ec": args.ec,
+                       "summary": summary}, f, indent=2)
+        print(f"[+] Summary written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Performance mode characterization")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="Switch each mode and run the fixed workload")
+    p_run.add_argument("--modes", default=",".join(PERFORMANCE_MODES), help="Comma-separated mode names")
+    p_run.add_argument("--duration", type=float, default=60.0, help="Workload seconds per mode")
+    p_run.add_argument("--interval", type=float, default=1.0, help="Seconds between samples")
+    p_run.add_argument("--cooldown", type=float, default=30.0, help="Idle seconds after each switch")
+    p_run.add_argument("--workers", type=int, default=None, help="Workload processes (default: CPU count)")
+    p_run.add_argument("--ec", action="store_true", help="Also write EC register 0x40 (needs root)")
+    p_run.add_argument("--port", default="/dev/port", help="EC port file")
+    p_run.add_argument("--restore-mode", choices=list(PERFORMANCE_MODES), default=None,
+                       help="Mode to set when done (default: the starting mode if the EC can be read, "
+                            "see INFINIX_EC_EXPERIMENTAL_READ, else balance)")
+    p_run.add_argument("--sysfs", default="/sys", help="sysfs root (fake tree for testing)")
+    p_run.add_argument("--dry-run", action="store_true",
+                       help="Simulated controller; with the default --sysfs, a generated fake tree")
+    p_run.add_argument("--csv", help="Write the time series as CSV")
+    p_run.add_argument("--json", help="Write the per-mode summary as JSON")
+    p_fix = sub.add_parser("fixture", help="Create a fake sysfs tree for --sysfs")
+    p_fix.add_argument("root")
+    args = parser.parse_args()
+
+    if args.command == "fixture":
+        print(f"[+] Fake sysfs tree in {make_fixture(args.root)}")
+    else:
+        sys.exit(run(args))
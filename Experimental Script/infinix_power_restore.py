@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Per power source profiles, reapplied after resume and on AC/battery switch.
+
+The keyboard controller and EC forget their state across suspend, and the
+EC may change it on a power source switch. A profile per source ("ac",
+"battery") is stored as JSON; the restore path opens one HID session for
+all keyboard/zone/performance packets and runs one EC transaction for the
+mode and fan boost registers, then prints how long it took.
+
+Nothing polls. Restores are triggered by:
+
+  systemd-sleep (/usr/lib/systemd/system-sleep/infinix-gtbook):
+      #!/bin/sh
+      exec /usr/bin/python3 "/path/to/Experimental Script/infinix_power_restore.py" hook "$@"
+
+  udev (/etc/udev/rules.d/99-infinix-power.rules):
+      SUBSYSTEM=="power_supply", ATTR{type}=="Mains", ACTION=="change", \
+          RUN+="/usr/bin/python3 '/path/to/Experimental Script/infinix_power_restore.py' restore"
+
+Saving a profile:
+  infinix_power_restore.py save ac --perf gaming --light 1 255 0 0 100 --fan-boost 0
+  infinix_power_restore.py save battery --perf office --color 1=FF0000 --color 4=0000FF
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Shared device code lives next to the original scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Original Script"))
+
+from infinix_hid_session import HIDSession
+from infinix_hotplug import wait_for_device
+from infinix_protocol import PERFORMANCE_MODES, ZONE_STATIC_PARAM
+from infinix_shadow_state import ShadowState
+from maxfan import (open_port, ec_ram_transaction, PERF_MODE_ADDR, FAN_BOOST_ADDR,
+                    MODE_OFFICE, MODE_BALANCE, MODE_GAMING)
+
+PROFILES_ENV = "INFINIX_POWER_PROFILES"
+DEFAULT_PROFILES = "/etc/infinix-gtbook/power-profiles.json"
+POWER_SOURCES = ("ac", "battery")
+
+# Performance name -> EC register 0x40 value
+EC_MODES = {"office": MODE_OFFICE, "balance": MODE_BALANCE, "gaming": MODE_GAMING}
+
+# How long to wait for the controller to re-enumerate after resume
+RESUME_DEVICE_TIMEOUT = 10.0
+# A node still present at resume is only trusted if it is not removed within this
+RESUME_SETTLE = 2.0
+
+PROFILE_ZONES = (1, 2, 3, 4)
+
+
+def profiles_path():
+    return os.environ.get(PROFILES_ENV) or DEFAULT_PROFILES
+
+
+def load_profiles(path=None):
+    try:
+        with open(path or profiles_path()) as f:
+            profiles = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(profiles, dict):
+        raise ValueError("profiles file must hold a {source: profile} object")
+    return profiles
+
+
+def _check_byte(name, value, limit=0xFF):
+    if type(value) is not int or not 0 <= value <= limit:
+        raise ValueError(f"{name} must be an integer 0-{limit}, got {value!r}")
+
+
+def _check_rgb(name, rgb):
+    if not isinstance(rgb, list) or len(rgb) != 3:
+        raise ValueError(f"{name} must be [r, g, b], got {rgb!r}")
+    for c in rgb:
+        _check_byte(name, c)
+
+
+def validate_profile(profile):
+    """Raises ValueError if a profile would fail (or half apply) on restore."""
+    if not isinstance(profile, dict):
+        raise ValueError("profile must be a JSON object")
+    perf = profile.get("performance")
+    if perf is not None and perf not in PERFORMANCE_MODES:
+        raise ValueError(f"unknown performance mode {perf!r}")
+    light = profile.get("light")
+    if light is not None:
+        if not isinstance(light, dict):
+            raise ValueError("light must be an object")
+        _check_byte("light mode", light.get("mode", 1), 0xF)
+        _check_rgb("light rgb", light.get("rgb"))
+        _check_byte("light brightness", light.get("brightness", 100))
+    zones = profile.get("zones", {})
+    if not isinstance(zones, dict):
+        raise ValueError("zones must be a {zone: [r, g, b]} object")
+    for zone, rgb in zones.items():
+        if not (isinstance(zone, str) and zone.isdigit() and int(zone) in PROFILE_ZONES):
+            raise ValueError(f"invalid zone {zone!r}, use 1-4")
+        _check_rgb(f"zone {zone}", rgb)
+    _check_byte("zone_brightness", profile.get("zone_brightness", 200))
+    if "fan_boost" in profile:
+        _check_byte("fan_boost", profile["fan_boost"], 1)
+    return profile
+
+
+def save_profiles(profiles, path=None):
+    for profile in profiles.values():
+        validate_profile(profile)
+    path = path or profiles_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Write-then-rename so a hook never reads a half-written file
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(tmp, path)
+
+
+def power_source(sysfs_root="/sys"):
+    """'ac' if any Mains supply is online (or there is none), else 'battery'."""
+    base = os.path.join(sysfs_root, "class", "power_supply")
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return "ac"
+    mains = False
+    for name in names:
+        try:
+            with open(os.path.join(base, name, "type")) as f:
+                if f.read().strip() != "Mains":
+                    continue
+            mains = True
+            with open(os.path.join(base, name, "online")) as f:
+                if f.read().strip() == "1":
+                    return "ac"
+        except OSError:
+            continue
+    return "battery" if mains else "ac"
+
+
+def restore(profile, session=None, port_path="/dev/port", wait=0.0, settle=0.0):
+    """
+    Applies a profile: one HID session for every keyboard packet, one EC
+    transaction for the registers. Returns (success, timings in ms).
+    """
+    start = time.perf_counter()
+    timings = {}
+    if wait:
+        wait_for_device(wait, settle)
+        timings["wait_ms"] = (time.perf_counter() - start) * 1000
+
+    state = ShadowState(session or HIDSession())
+    light = profile.get("light")
+    if light:
+        r, g, b = light["rgb"]
+        state.set_light(light.get("mode", 1), r, g, b, light.get("brightness", 100))
+    bri = profile.get("zone_brightness", 200)
+    for zone, (r, g, b) in sorted((int(z), c) for z, c in profile.get("zones", {}).items()):
+        state.set_zone(zone, ZONE_STATIC_PARAM[zone], r, g, b, bri)
+    perf = profile.get("performance")
+    if perf:
+        state.set_performance(PERFORMANCE_MODES[perf])
+
+    t = time.perf_counter()
+    success, msg = state.commit(force=True)
+    state.session.close()
+    timings["hid_ms"] = (time.perf_counter() - t) * 1000
+    timings["packets"] = state.last_sent
+    if not success:
+        print(f"[-] Keyboard restore failed: {msg}")
+
+    writes = []
+    if perf:
+        writes.append((PERF_MODE_ADDR, EC_MODES[perf]))
+    if "fan_boost" in profile:
+        writes.append((FAN_BOOST_ADDR, int(profile["fan_boost"])))
+    if writes and port_path:
+        try:
+            with open_port(port_path) as port:
+                report = ec_ram_transaction(port, writes)
+            timings["ec_ms"] = report["latency_ms"]
+        except OSError as e:
+            success = False
+            print(f"[-] EC restore failed: {e}")
+
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    return success, timings
+
+
+def restore_current(port_path="/dev/port", wait=0.0, source=None, sysfs_root="/sys", settle=0.0):
+    source = source or power_source(sysfs_root)
+    try:
+        profile = load_profiles().get(source)
+        if profile:
+            validate_profile(profile)
+    except ValueError as e:
+        print(f"[-] Invalid '{source}' profile in {profiles_path()}: {e}")
+        return False
+    if not profile:
+        print(f"[*] No profile saved for '{source}', nothing to restore.")
+        return True
+    success, timings = restore(profile, port_path=port_path, wait=wait, settle=settle)
+    parts = [f"{k[:-3]} {v:.1f} ms" for k, v in timings.items() if k.endswith("_ms")]
+    print(f"[{'+' if success else '!'}] Restored '{source}' profile "
+          f"({timings['packets']} packets): {', '.join(parts)}")
+    return success
+
+
+def parse_color(spec):
+    zone, _, hex_str = spec.partition("=")
+    hex_str = hex_str.lstrip('#')
+    if len(hex_str) != 6:
+        raise ValueError(f"invalid color {spec!r}, use ZONE=RRGGBB")
+    return zone, [int(hex_str[i:i+2], 16) for i in (0, 2, 4)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Power source / resume state restore")
+    parser.add_argument("--port", default="/dev/port", help="EC port file ('none' to skip the EC)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_save = sub.add_parser("save", help="Store the profile for a power source")
+    p_save.add_argument("source", choices=POWER_SOURCES)
+    p_save.add_argument("--perf", choices=list(PERFORMANCE_MODES))
+    p_save.add_argument("--light", nargs=5, type=int, metavar=("MODE", "R", "G", "B", "BRI"))
+    p_save.add_argument("--color", action="append", default=[], metavar="ZONE=RRGGBB",
+                        help="Per-zone color (1-4), repeatable")
+    p_save.add_argument("--zone-bri", type=int, default=200, help="Brightness for --color zones")
+    p_save.add_argument("--fan-boost", type=int, choices=(0, 1))
+
+    p_restore = sub.add_parser("restore", help="Reapply the profile for the current (or given) power source")
+    p_restore.add_argument("--source", choices=POWER_SOURCES)
+    p_restore.add_argument("--wait", type=float, default=0.0, help="Wait up to N s for the controller to appear")
+
+    p_hook = sub.add_parser("hook", help="systemd-sleep entry point: hook pre|post <type>")
+    p_hook.add_argument("phase", choices=("pre", "post"))
+    p_hook.add_argument("type", nargs="?", default="suspend")
+
+    sub.add_parser("show", help="Print the saved profiles")
+    args = parser.parse_args()
+    port_path = None if args.port == "none" else args.port
+
+    if args.command == "save":
+        profile = {}
+        if args.perf:
+            profile["performance"] = args.perf
+        if args.light:
+            mode, r, g, b, bri = args.light
+            profile["light"] = {"mode": mode, "rgb": [r, g, b], "brightness": bri}
+        try:
+            if args.color:
+                profile["zones"] = dict(parse_color(c) for c in args.color)
+                profile["zone_brightness"] = args.zone_bri
+            if args.fan_boost is not None:
+                profile["fan_boost"] = args.fan_boost
+            validate_profile(profile)
+            profiles = load_profiles()
+            profiles[args.source] = profile
+            save_profiles(profiles)
+        except ValueError as e:
+            print(f"[-] Not saved: {e}")
+            sys.exit(1)
+        print(f"[+] Saved '{args.source}' profile to {profiles_path()}")
+    elif args.command == "show":
+        print(json.dumps(load_profiles(), indent=2))
+    elif args.command == "restore":
+        sys.exit(0 if restore_current(port_path, args.wait, args.source) else 1)
+    elif args.phase == "post":
+        # USB comes back a little after the resume hook runs; wait for the add event
+        sys.exit(0 if restore_current(port_path, RESUME_DEVICE_TIMEOUT, settle=RESUME_SETTLE) else 1)
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Precompiled lighting scenes.
+
+A scene is authored as JSON (keyframes per zone, easing, loop) and
+compiled ahead of time into a binary file of ready-to-send 65-byte zone
+packets. Playback mmaps the file and hands packet slices to the device,
+so a long or complex scene costs the same per frame as a static color.
+
+Scene JSON:
+    {
+      "fps": 60, "loop": true, "brightness": 100, "duration": 4.0,
+      "zones": {
+        "all": [{"t": 0, "rgb": [255, 0, 0]}, {"t": 2, "rgb": [0, 0, 255], "ease": "in_out"}],
+        "4":   [{"t": 0, "rgb": [0, 255, 0]}, {"t": 4, "rgb": [0, 255, 0], "bri": 20}]
+      }
+    }
+"all" applies to zones 1-4; numbered zones override it. A keyframe's
+"ease" shapes the segment that ends at it. "duration" defaults to the
+last keyframe.
+
+Compiled layout (little endian):
+    header     IGTS, version, fps, flags, zones, frame_count, packet_count
+    frames     uint32[frame_count + 1]  packet range of frame i is [frames[i], frames[i+1])
+    latest     uint32[frame_count * 4]  newest packet per zone as of frame i
+    packets    packet_count * 65 bytes  (create_packet wire format)
+Frames only carry the zones that changed; `latest` lets playback resync
+after dropped frames without replaying the deltas.
+"""
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+# Shared device code lives next to the original scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Original Script"))
+
+from infinix_hid_session import default_session
+from infinix_protocol import PacketCodec, PACKET_SIZE, REPORT_ID, CHECKSUM_INDEX, ZONE_MAPPING, checksum, command_byte
+from infinix_zone_animation import ZONE_IDS, ZONE_MODE, MIN_FPS, MAX_FPS, AnimationStats
+
+MAGIC = b"IGTS"
+VERSION = 1
+FLAG_LOOP = 0x1
+HEADER = struct.Struct("<4sHHHHII")
+NO_PACKET = 0xFFFFFFFF
+
+EASINGS = {
+    "linear": lambda k: k,
+    "in": lambda k: k * k,
+    "out": lambda k: 1 - (1 - k) * (1 - k),
+    "in_out": lambda k: k * k * (3 - 2 * k),
+    "step": lambda k: 0.0,
+}
+
+
+class SceneError(ValueError):
+    pass
+
+
+# --- Compiler ---
+
+def _zone_tracks(scene):
+    """zone id -> sorted keyframe list, with "all" expanded."""
+    zones = scene.get("zones", {})
+    tracks = {}
+    for key, keyframes in zones.items():
+        if key == "all":
+            continue
+        if not key.isdigit() or int(key) not in ZONE_IDS:
+            raise SceneError(f"Invalid zone '{key}'. Use 1-4 or 'all'.")
+        tracks[int(key)] = keyframes
+    if "all" in zones:
+        for zone in ZONE_IDS:
+            tracks.setdefault(zone, zones["all"])
+    if not tracks:
+        raise SceneError("Scene has no zones")
+
+    default_bri = scene.get("brightness", 100)
+    for zone, keyframes in tracks.items():
+        if not keyframes:
+            raise SceneError(f"Zone {zone} has no keyframes")
+        parsed = []
+        for kf in keyframes:
+            rgb = kf.get("rgb")
+            if not isinstance(rgb, list) or len(rgb) != 3 or not all(type(c) is int and 0 <= c <= 255 for c in rgb):
+                raise SceneError(f"Zone {zone}: rgb must be three integers 0-255")
+            bri = kf.get("bri", default_bri)
+            if type(bri) is not int or not 0 <= bri <= 255:
+                raise SceneError(f"Zone {zone}: bri must be an integer 0-255")
+            ease = kf.get("ease", "linear")
+            if ease not in EASINGS:
+                raise SceneError(f"Zone {zone}: unknown ease '{ease}'. Available: {list(EASINGS)}")
+            parsed.append((float(kf.get("t", 0)), (*rgb, bri), EASINGS[ease]))
+        times = [p[0] for p in parsed]
+        if times != sorted(times) or times[0] < 0:
+            raise SceneError(f"Zone {zone}: keyframe times must be ascending and >= 0")
+        tracks[zone] = parsed
+    return tracks
+
+
+def _sample(track, times, t):
+    """Interpolated (r, g, b, bri) of one track at time t."""
+    i = bisect.bisect_right(times, t)
+    if i == 0:
+        return track[0][1]
+    if i == len(track):
+        return track[-1][1]
+    t0, a, _ = track[i - 1]
+    t1, b, ease = track[i]
+    k = ease((t - t0) / (t1 - t0)) if t1 > t0 else 1.0
+    return tuple(int(round(x + (y - x) * k)) for x, y in zip(a, b))
+
+
+def compile_scene(scene):
+    """Returns the compiled scene as bytes."""
+    fps = int(scene.get("fps", 60))
+    if not MIN_FPS <= fps <= MAX_FPS:
+        raise SceneError(f"fps must be between {MIN_FPS} and {MAX_FPS}")
+    tracks = _zone_tracks(scene)
+    duration = scene.get("duration")
+    if duration is None:
+        duration = max(track[-1][0] for track in tracks.values())
+    frame_count = max(1, int(round(duration * fps)))
+
+    codec = PacketCodec()
+    frames = [0]
+    latest = []
+    packets = bytearray()
+    newest = {z: NO_PACKET for z in ZONE_IDS}
+    sent = {}
+    times = {z: [kf[0] for kf in track] for z, track in tracks.items()}
+    for n in range(frame_count):
+        t = n / fps
+        for zone, track in sorted(tracks.items()):
+            value = _sample(track, times[zone], t)
+            if sent.get(zone) != value:
+                sent[zone] = value
+                newest[zone] = len(packets) // PACKET_SIZE
+                packets += codec.zone(zone, ZONE_MODE, *value)
+        frames.append(len(packets) // PACKET_SIZE)
+        latest.extend(newest[z] for z in ZONE_IDS)
+
+    flags = FLAG_LOOP if scene.get("loop") else 0
+    header = HEADER.pack(MAGIC, VERSION, fps, flags, len(ZONE_IDS), frame_count, len(packets) // PACKET_SIZE)
+    return b"".join((header, struct.pack(f"<{len(frames)}I", *frames),
+                     struct.pack(f"<{len(latest)}I", *latest), packets))
+
+
+# --- Loader / validator ---
+
+class CompiledScene:
+    """Read-only view of a compiled scene file, backed by mmap."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.packets = self.frames = self.latest = None
+        self._buf = memoryview(self._map)
+        try:
+            self._parse(self._buf)
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self, buf):
+        if len(buf) < HEADER.size:
+            raise SceneError("File too short for a scene header")
+        magic, version, self.fps, self.flags, zones, self.frame_count, self.packet_count = HEADER.unpack_from(buf)
+        if magic != MAGIC or version != VERSION or zones != len(ZONE_IDS):
+            raise SceneError(f"Not a version {VERSION} scene file")
+        frames_end = HEADER.size + 4 * (self.frame_count + 1)
+        latest_end = frames_end + 4 * self.frame_count * zones
+        if len(buf) != latest_end + self.packet_count * PACKET_SIZE:
+            raise SceneError("File size does not match the header")
+        self.frames = buf[HEADER.size:frames_end].cast("I")
+        self.latest = buf[frames_end:latest_end].cast("I")
+        data = buf[latest_end:]
+        # Slices are cut once here; playback only indexes this list
+        self.packets = [data[i * PACKET_SIZE:(i + 1) * PACKET_SIZE] for i in range(self.packet_count)]
+
+    def frame_packets(self):
+        """
+        (delta, full): per frame, the tuple of packet slices it sends and the
+        tuple of each zone's newest packet (for frame 0 and resync), so
+        playback hands one prebuilt tuple to the session per frame.
+        """
+        packets, frames, latest = self.packets, self.frames, self.latest
+        zones = len(ZONE_IDS)
+        delta = [tuple(packets[frames[n]:frames[n + 1]]) for n in range(self.frame_count)]
+        full = [tuple(packets[idx] for idx in latest[n * zones:(n + 1) * zones] if idx != NO_PACKET)
+                for n in range(self.frame_count)]
+        return delta, full
+
+    @property
+    def loop(self):
+        return bool(self.flags & FLAG_LOOP)
+
+    @property
+    def duration(self):
+        return self.frame_count / self.fps
+
+    def close(self):
+        # Release every view first; the mapping cannot close while one is exported
+        for view in (self.packets or ()):
+            view.release()
+        for view in (self.frames, self.latest, self._buf):
+            if view is not None:
+                view.release()
+        self.packets = self.frames = self.latest = self._buf = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # a caller still holds a view derived from a packet slice
+
+
+def validate(path):
+    """Returns a list of problems; empty means the file is playable."""
+    try:
+        scene = CompiledScene(path)
+    except (SceneError, ValueError, OSError) as e:
+        return [str(e)]
+    try:
+        return _check_scene(scene)
+    finally:
+        scene.close()
+
+
+def _check_scene(scene):
+    # Separate function so its views into the mapping (frames, pkt) are gone before close()
+    problems = []
+    zone_bytes = {command_byte(cmd, off | ZONE_MODE) for cmd, off in (ZONE_MAPPING[z] for z in ZONE_IDS)}
+    frames = scene.frames
+    for i in range(scene.frame_count):
+        if not frames[i] <= frames[i + 1] <= scene.packet_count:
+            problems.append(f"frame {i}: packet range {frames[i]}..{frames[i + 1]} out of order or bounds")
+    for i, value in enumerate(scene.latest):
+        if value != NO_PACKET and value >= frames[i // len(ZONE_IDS) + 1]:
+            problems.append(f"frame {i // len(ZONE_IDS)}: latest packet {value} not sent yet")
+    for i, pkt in enumerate(scene.packets):
+        if pkt[0] != REPORT_ID:
+            problems.append(f"packet {i}: report id {pkt[0]:#04x}")
+        if pkt[1] not in zone_bytes:
+            problems.append(f"packet {i}: not a zone command ({pkt[1]:#04x})")
+        if pkt[CHECKSUM_INDEX] != checksum(pkt):
+            problems.append(f"packet {i}: bad checksum")
+        if len(problems) > 20:
+            problems.append("...")
+            break
+    return problems
+
+
+# --- Playback ---
+
+class ScenePlayer:
+    """
+    Plays a compiled scene on the same drift-free schedule as ZoneAnimator.
+    When frames are dropped the next frame sends each zone's newest packet
+    from the `latest` table instead of the deltas in between.
+    """
+
+    def __init__(self, scene, session=None):
+        self.scene = scene
+        self.session = session or default_session()
+        self.stats = AnimationStats()
+        self._running = False
+
+    def run(self, loops=None, duration=None):
+        scene = self.scene
+        delta, full = scene.frame_packets()
+        write_batch = self.session.write_batch
+        period = 1.0 / scene.fps
+        total = scene.frame_count * (loops or 1) if (loops or not scene.loop) else None
+        stats = self.stats = AnimationStats()
+        start = stats.start
+        frame = 0
+        resync = False
+        self._running = True
+        try:
+            while self._running and (total is None or frame < total):
+                deadline = start + frame * period
+                now = time.monotonic()
+                if deadline > now:
+                    time.sleep(deadline - now)
+                    now = time.monotonic()
+                if duration is not None and now - start >= duration:
+                    break
+                stats.record(now - deadline)
+                n = frame % scene.frame_count
+                try:
+                    write_batch(full[n] if resync or n == 0 else delta[n])
+                    resync = False
+                except IOError:
+                    resync = True
+
+                frame += 1
+                behind = int((time.monotonic() - start) / period) - frame
+                if behind > 0:
+                    stats.dropped += behind
+                    frame += behind
+                    resync = True
+        finally:
+            stats.end = time.monotonic()
+        return stats.report()
+
+    def stop(self):
+        self._running = False
+
+
+# --- Benchmark ---
+
+class _NullTransaction:
+    """Writes each packet to /dev/null: same syscall as the hidraw backend."""
+
+    def __init__(self):
+        self.fd = os.open(os.devnull, os.O_WRONLY)
+
+    def write(self, packet):
+        os.write(self.fd, packet)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def benchmark(path, number=20000):
+    """CPU cost per frame: compiled scene vs compiled static color vs live rendering."""
+    import tempfile
+    from infinix_zone_animation import EFFECTS, ZoneAnimator
+
+    static = compile_scene({"fps": 60, "zones": {"all": [{"t": 0, "rgb": [255, 100, 0]}, {"t": 1, "rgb": [255, 100, 0]}]}})
+    fd, static_path = tempfile.mkstemp(suffix=".igts")
+    with os.fdopen(fd, "wb") as f:
+        f.write(static)
+
+    sink = _NullTransaction()
+
+    def play(scene):
+        delta = scene.frame_packets()[0]
+        count = scene.frame_count
+        write = sink.write
+        sent = 0
+        for frame in range(number):
+            batch = delta[frame % count]
+            for packet in batch:
+                write(packet)
+            sent += len(batch)
+        return sent
+
+    animator = ZoneAnimator(EFFECTS["rainbow"], 60, 100, session=object())
+
+    def live():
+        sent = 0
+        for frame in range(number):
+            for packet in animator.render(frame / 60):
+                sink.write(packet)
+                sent += 1
+        return sent
+
+    cases = []
+    for name, target in (("compiled static", static_path), ("compiled scene", path)):
+        scene = CompiledScene(target)
+        cases.append((name, lambda s=scene: play(s), scene))
+    cases.append(("live rainbow", live, None))
+
+    print(f"{'case':<18}{'us/frame':>10}{'cpu us/frame':>14}{'packets':>10}")
+    for name, fn, scene in cases:
+        wall, cpu = time.perf_counter(), time.process_time()
+        sent = fn()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        print(f"{name:<18}{wall / number * 1e6:>10.2f}{cpu / number * 1e6:>14.2f}{sent:>10}")
+        if scene is not None:
+            scene.close()
+    sink.close()
+    os.unlink(static_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Precompiled lighting scenes")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_compile = sub.add_parser("compile", help="Compile a JSON scene")
+    p_compile.add_argument("scene")
+    p_compile.add_argument("-o", "--output", help="Output file (default: <scene>.igts)")
+
+    p_validate = sub.add_parser("validate", help="Check a compiled scene file")
+    p_validate.add_argument("file")
+
+    p_play = sub.add_parser("play", help="Play a compiled scene")
+    p_play.add_argument("file")
+    p_play.add_argument("--loops", type=int, default=None, help="Play N times (default: forever if the scene loops)")
+    p_play.add_argument("--duration", type=float, default=None, help="Stop after N seconds")
+
+    p_bench = sub.add_parser("bench", help="Time playback against a static color and live rendering")
+    p_bench.add_argument("file")
+    p_bench.add_argument("--frames", type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        try:
+            with open(args.scene) as f:
+                data = compile_scene(json.load(f))
+        except (SceneError, ValueError) as e:
+            print(f"[-] {e}")
+            sys.exit(1)
+        output = args.output or os.path.splitext(args.scene)[0] + ".igts"
+        with open(output, "wb") as f:
+            f.write(data)
+        scene = CompiledScene(output)
+        print(f"[+] {output}: {scene.frame_count} frames @ {scene.fps} fps, "
+              f"{scene.packet_count} packets, {len(data)} bytes")
+        scene.close()
+    elif args.command == "validate":
+        problems = validate(args.file)
+        for problem in problems:
+            print(f"[-] {problem}")
+        if problems:
+            sys.exit(1)
+        print(f"[+] {args.file} is valid")
+    elif args.command == "play":
+        scene = CompiledScene(args.file)
+        player = ScenePlayer(scene)
+        print(f"[*] Playing {args.file} ({scene.duration:.1f} s{', looping' if scene.loop else ''}; Ctrl+C to stop)")
+        try:
+            player.run(args.loops, args.duration)
+        except KeyboardInterrupt:
+            pass
+        r = player.stats.report()
+        print(f"[+] {r['frames']} frames, {r['fps']:.1f} fps, {r['dropped']} dropped, "
+              f"jitter mean {r['jitter_mean_ms']:.2f} ms / max {r['jitter_max_ms']:.2f} ms")
+    else:
+        benchmark(args.file, args.frames)
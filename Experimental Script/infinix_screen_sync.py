@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Ambient mode: keyboard zones 1-4 follow the dominant color of the left
+to right quarters of the screen.
+
+Frame sources are pluggable and all hand out a (height, width, 4) BGRX
+NumPy view of memory the source already owns, no copy:
+  x11    MIT-SHM XShmGetImage into a shared segment
+  fb     /dev/fb0 mmap (32 bpp)
+  raw    file of back-to-back BGRX frames, mmapped (for tests)
+
+Extraction takes a strided subsample of that view, weights pixels by
+chroma so saturated colors win over greys, and averages per quarter in
+one vectorized pass. Colors are smoothed with an exponential filter and
+only zones that changed are sent (cmd 0x06/0x07). The loop runs under
+SCHED_IDLE by default so it only uses CPU a game leaves unused.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import math
+import mmap
+import os
+import sys
+import time
+
+import numpy as np
+
+# Shared device code lives next to the original scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Original Script"))
+
+from infinix_hid_session import default_session
+from infinix_protocol import PacketCodec
+from infinix_zone_animation import ZONE_IDS, ZONE_MODE
+
+DEFAULT_FPS = 20
+DEFAULT_STEP = 8          # sample every 8th pixel in both directions
+DEFAULT_SMOOTHING = 0.25  # seconds, time constant of the color filter
+CHROMA_BIAS = 16.0        # keeps dark/grey regions from dividing by ~0
+
+
+# --- Sources ---
+
+class RawFileSource:
+    """Back-to-back frames in a file; frame() cycles through them."""
+
+    def __init__(self, path, width, height, stride=None):
+        self.stride = stride or width * 4
+        self.shape = (height, width)
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        frame_bytes = self.stride * height
+        self.count = len(self._map) // frame_bytes
+        if not self.count:
+            raise ValueError(f"{path} is smaller than one {width}x{height} frame")
+        pixels = np.frombuffer(self._map, dtype=np.uint8, count=self.count * frame_bytes)
+        self._frames = np.lib.stride_tricks.as_strided(
+            pixels, (self.count, height, width, 4), (frame_bytes, self.stride, 4, 1), writeable=False)
+        self._index = 0
+
+    def frame(self):
+        view = self._frames[self._index]
+        self._index = (self._index + 1) % self.count
+        return view
+
+    def close(self):
+        self._frames = None
+        self._map.close()
+
+
+class FramebufferSource:
+    """Linux framebuffer, mmapped once; every frame() is the live scanout."""
+
+    def __init__(self, device="/dev/fb0"):
+        sysfs = f"/sys/class/graphics/{os.path.basename(device)}"
+        with open(f"{sysfs}/bits_per_pixel") as f:
+            if int(f.read()) != 32:
+                raise ValueError("Only 32 bpp framebuffers are supported")
+        with open(f"{sysfs}/virtual_size") as f:
+            width, height = (int(v) for v in f.read().split(","))
+        with open(f"{sysfs}/stride") as f:
+            stride = int(f.read())
+        fd = os.open(device, os.O_RDONLY)
+        try:
+            self._map = mmap.mmap(fd, stride * height, mmap.MAP_SHARED, mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        pixels = np.frombuffer(self._map, dtype=np.uint8)
+        self._view = np.lib.stride_tricks.as_strided(pixels, (height, width, 4), (stride, 4, 1), writeable=False)
+
+    def frame(self):
+        return self._view
+
+    def close(self):
+        self._view = None
+        self._map.close()
+
+
+class _XImage(ctypes.Structure):
+    # Leading fields of Xlib's XImage; only these are read
+    _fields_ = [
+        ("width", ctypes.c_int), ("height", ctypes.c_int), ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int), ("data", ctypes.c_void_p), ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int), ("bitmap_bit_order", ctypes.c_int), ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int), ("bytes_per_line", ctypes.c_int), ("bits_per_pixel", ctypes.c_int),
+    ]
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [("shmseg", ctypes.c_ulong), ("shmid", ctypes.c_int),
+                ("shmaddr", ctypes.c_void_p), ("readOnly", ctypes.c_int)]
+
+
+class X11ShmSource:
+    """Root window via MIT-SHM: the X server copies straight into our segment."""
+
+    ZPIXMAP = 2
+    ALL_PLANES = 0xFFFFFFFF
+    IPC_PRIVATE = 0
+    IPC_CREAT = 0o1000
+    IPC_RMID = 0
+
+    def __init__(self, display=None):
+        x11 = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+        xext = ctypes.CDLL(ctypes.util.find_library("Xext") or "libXext.so.6")
+        libc = ctypes.CDLL(None, use_errno=True)
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        for name in ("XDefaultVisual", "XRootWindow"):
+            getattr(x11, name).restype = ctypes.c_void_p if name == "XDefaultVisual" else ctypes.c_ulong
+            getattr(x11, name).argtypes = [ctypes.c_void_p, ctypes.c_int]
+        for name in ("XDefaultDepth", "XDisplayWidth", "XDisplayHeight"):
+            getattr(x11, name).argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmCreateImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                         ctypes.c_char_p, ctypes.POINTER(_XShmSegmentInfo),
+                                         ctypes.c_uint, ctypes.c_uint]
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage),
+                                      ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+        self.x11, self.xext, self.libc = x11, xext, libc
+
+        self.dpy = x11.XOpenDisplay(display.encode() if display else None)
+        if not self.dpy:
+            raise OSError("Cannot open X display")
+        screen = x11.XDefaultScreen(self.dpy)
+        self.root = x11.XRootWindow(self.dpy, screen)
+        width = x11.XDisplayWidth(self.dpy, screen)
+        height = x11.XDisplayHeight(self.dpy, screen)
+        self.shminfo = _XShmSegmentInfo()
+        self.image = xext.XShmCreateImage(self.dpy, x11.XDefaultVisual(self.dpy, screen),
+                                          x11.XDefaultDepth(self.dpy, screen), self.ZPIXMAP, None,
+                                          ctypes.byref(self.shminfo), width, height)
+        if not self.image or self.image.contents.bits_per_pixel != 32:
+            raise OSError("MIT-SHM unavailable or not a 32 bpp visual")
+        img = self.image.contents
+        size = img.bytes_per_line * img.height
+        self.shminfo.shmid = libc.shmget(self.IPC_PRIVATE, size, self.IPC_CREAT | 0o600)
+        if self.shminfo.shmid < 0:
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        self.shminfo.shmaddr = libc.shmat(self.shminfo.shmid, None, 0)
+        img.data = self.shminfo.shmaddr
+        self.shminfo.readOnly = 0
+        xext.XShmAttach(self.dpy, ctypes.byref(self.shminfo))
+        # Marked for removal now; it goes away once both sides detach
+        libc.shmctl(self.shminfo.shmid, self.IPC_RMID, None)
+        pixels = np.ctypeslib.as_array((ctypes.c_uint8 * size).from_address(self.shminfo.shmaddr))
+        self._view = np.lib.stride_tricks.as_strided(
+            pixels, (img.height, img.width, 4), (img.bytes_per_line, 4, 1), writeable=False)
+
+    def frame(self):
+        self.xext.XShmGetImage(self.dpy, self.root, self.image, 0, 0, self.ALL_PLANES)
+        return self._view
+
+    def close(self):
+        self._view = None
+        self.xext.XShmDetach(self.dpy, ctypes.byref(self.shminfo))
+        self.libc.shmdt(self.shminfo.shmaddr)
+        self.x11.XCloseDisplay(self.dpy)
+
+
+# --- Extraction ---
+
+def region_colors(frame, step=DEFAULT_STEP, regions=len(ZONE_IDS)):
+    """
+    Chroma-weighted mean color of `regions` vertical strips, left to right.
+    frame is a (h, w, 4) BGRX view; returns a (regions, 3) float RGB array.
+    """
+    sub = frame[::step, ::step, 2::-1]  # view: subsampled, BGR -> RGB
+    width = sub.shape[1] - sub.shape[1] % regions
+    pixels = sub[:, :width].astype(np.float32).reshape(sub.shape[0], regions, width // regions, 3)
+    weight = pixels.max(axis=3) - pixels.min(axis=3) + CHROMA_BIAS
+    total = np.einsum("hrwc,hrw->rc", pixels, weight)
+    return total / weight.sum(axis=(0, 2))[:, None]
+
+
+class ScreenSync:
+    def __init__(self, source, fps=DEFAULT_FPS, step=DEFAULT_STEP, smoothing=DEFAULT_SMOOTHING,
+                 brightness=100, session=None):
+        self.source = source
+        self.fps = fps
+        self.step = step
+        self.smoothing = smoothing
+        self.brightness = brightness
+        self.session = session or default_session()
+        self.codec = PacketCodec()
+        self.color = None
+        self._sent = [None] * len(ZONE_IDS)
+        self._running = False
+        self.timing = {"capture": 0.0, "extract": 0.0, "write": 0.0}
+        self.frames = 0
+
+    def step_frame(self, dt):
+        t0 = time.perf_counter()
+        frame = self.source.frame()
+        t1 = time.perf_counter()
+        target = region_colors(frame, self.step)
+        if self.color is None or not self.smoothing:
+            self.color = target
+        else:
+            self.color += (target - self.color) * (1.0 - math.exp(-dt / self.smoothing))
+        rgb = np.clip(np.rint(self.color), 0, 255).astype(int).tolist()
+        t2 = time.perf_counter()
+
+        changed = [(i, tuple(c)) for i, c in enumerate(rgb) if tuple(c) != self._sent[i]]
+        if changed:
+            try:
+                with self.session.transaction() as tx:
+                    for i, (r, g, b) in changed:
+                        tx.write(self.codec.zone(ZONE_IDS[i], ZONE_MODE, r, g, b, self.brightness))
+                        self._sent[i] = (r, g, b)
+            except IOError:
+                self._sent = [None] * len(ZONE_IDS)
+        t3 = time.perf_counter()
+        self.frames += 1
+        self.timing["capture"] += t1 - t0
+        self.timing["extract"] += t2 - t1
+        self.timing["write"] += t3 - t2
+
+    def run(self, duration=None):
+        period = 1.0 / self.fps
+        start = last = time.monotonic()
+        frame = 0
+        self._running = True
+        while self._running:
+            deadline = start + frame * period
+            now = time.monotonic()
+            if deadline > now:
+                time.sleep(deadline - now)
+                now = time.monotonic()
+            if duration is not None and now - start >= duration:
+                break
+            self.step_frame(now - last)
+            last = now
+            # Skip slots that already passed instead of catching up
+            frame = max(frame + 1, int((time.monotonic() - start) / period))
+
+    def stop(self):
+        self._running = False
+
+    def report(self):
+        n = max(self.frames, 1)
+        return ", ".join(f"{k} {v / n * 1000:.2f} ms" for k, v in self.timing.items())
+
+
+def make_source(args):
+    if args.raw:
+        width, _, height = args.size.partition("x")
+        return RawFileSource(args.raw, int(width), int(height), args.stride)
+    if args.fb:
+        return FramebufferSource(args.fb)
+    return X11ShmSource(args.display)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Screen-synced keyboard zones")
+    src = parser.add_mutually_exclusive_group()
+    src.add_argument("--display", help="X11 display for MIT-SHM capture (default: $DISPLAY)")
+    src.add_argument("--fb", nargs="?", const="/dev/fb0", help="Capture from a framebuffer device")
+    src.add_argument("--raw", help="Raw BGRX frame file (needs --size)")
+    parser.add_argument("--size", default="1920x1080", help="WxH of --raw frames")
+    parser.add_argument("--stride", type=int, default=None, help="Bytes per row of --raw frames")
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS, help="Updates per second")
+    parser.add_argument("--step", type=int, default=DEFAULT_STEP, help="Sample every Nth pixel")
+    parser.add_argument("--smoothing", type=float, default=DEFAULT_SMOOTHING, help="Color time constant in seconds (0 = off)")
+    parser.add_argument("--bri", type=int, default=100, help="Brightness (0-100)")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after N seconds")
+    parser.add_argument("--no-idle", action="store_true", help="Do not drop to SCHED_IDLE")
+    args = parser.parse_args()
+
+    if not args.no_idle:
+        try:
+            os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+        except (AttributeError, OSError):
+            os.nice(10)
+
+    try:
+        source = make_source(args)
+    except (OSError, ValueError) as e:
+        print(f"[-] {e}")
+        sys.exit(1)
+
+    sync = ScreenSync(source, args.fps, args.step, args.smoothing, args.bri)
+    print(f"[*] Screen sync at {args.fps} fps (Ctrl+C to stop)")
+    cpu = time.process_time()
+    wall = time.monotonic()
+    try:
+        sync.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.close()
+    wall = time.monotonic() - wall
+    print(f"[+] {sync.frames} frames; per frame: {sync.report()}; "
+          f"CPU {(time.process_time() - cpu) / wall * 100:.1f}% of one core")
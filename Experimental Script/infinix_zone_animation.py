@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+import argparse
+import colorsys
+import math
+import os
+import sys
+import time
+
+# Shared device code lives next to the original scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Original Script"))
+
+from infinix_hid_session import default_session
+from infinix_protocol import PacketCodec
+
+ZONE_IDS = (1, 2, 3, 4)
+ZONE_MODE = 0x00  # "Always" param, see note in 'Keyboard Zone Key.py'
+MIN_FPS = 30
+MAX_FPS = 120
+
+
+# --- Effects ---
+# An effect is called with the time in seconds since start and returns one
+# (r, g, b) tuple per zone, left to right.
+
+def effect_rainbow(t, speed=0.25):
+    return [
+        tuple(int(c * 255) for c in colorsys.hsv_to_rgb((t * speed + i * 0.25) % 1.0, 1.0, 1.0))
+        for i in range(len(ZONE_IDS))
+    ]
+
+
+def effect_scanner(t, color=(255, 100, 0), speed=1.0):
+    pos = (math.sin(t * speed * math.pi) + 1) * 1.5  # 0..3
+    frame = []
+    for i in range(len(ZONE_IDS)):
+        k = max(0.0, 1.0 - abs(pos - i))
+        frame.append((int(color[0] * k), int(color[1] * k), int(color[2] * k)))
+    return frame
+
+
+def effect_breathing(t, color=(255, 100, 0), period=2.0):
+    k = (1 - math.cos(2 * math.pi * t / period)) / 2
+    c = (int(color[0] * k), int(color[1] * k), int(color[2] * k))
+    return [c] * len(ZONE_IDS)
+
+
+EFFECTS = {
+    "rainbow": effect_rainbow,
+    "scanner": effect_scanner,
+    "breathing": effect_breathing,
+}
+
+
+class AnimationStats:
+    __slots__ = ("frames", "dropped", "start", "end", "_jitter_sum", "_jitter_max")
+
+    def __init__(self):
+        self.frames = 0
+        self.dropped = 0
+        self.start = time.monotonic()
+        self.end = None
+        self._jitter_sum = 0.0
+        self._jitter_max = 0.0
+
+    def record(self, lateness):
+        self.frames += 1
+        self._jitter_sum += lateness
+        if lateness > self._jitter_max:
+            self._jitter_max = lateness
+
+    def report(self):
+        elapsed = max((self.end or time.monotonic()) - self.start, 1e-9)
+        mean = self._jitter_sum / self.frames if self.frames else 0.0
+        return {
+            "fps": self.frames / elapsed,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "jitter_mean_ms": mean * 1000,
+            "jitter_max_ms": self._jitter_max * 1000,
+        }
+
+
+class ZoneAnimator:
+    """
+    Renders per-zone frames on the host and pushes them with the 0x06/0x07
+    zone commands.
+
+    Frame deadlines are computed as start + n / fps (never accumulated), so
+    the schedule does not drift. When a write overruns one or more frame
+    slots the missed frames are skipped and counted as dropped rather than
+    queued. Zones whose color did not change since the last frame are not
+    resent.
+    """
+
+    def __init__(self, effect, fps=60, brightness=100, session=None):
+        if not MIN_FPS <= fps <= MAX_FPS:
+            raise ValueError(f"fps must be between {MIN_FPS} and {MAX_FPS}")
+        self.effect = effect
+        self.fps = fps
+        self.brightness = brightness
+        self.session = session or default_session()
+        self.codec = PacketCodec()
+        self.stats = AnimationStats()
+        self._sent = [None] * len(ZONE_IDS)
+        self._running = False
+
+    def render(self, t):
+        """Encodes the zones that changed at time t. Returns the packets."""
+        packets = []
+        for i, rgb in enumerate(self.effect(t)):
+            if rgb == self._sent[i]:
+                continue
+            self._sent[i] = rgb
+            packets.append(self.codec.zone(ZONE_IDS[i], ZONE_MODE, rgb[0], rgb[1], rgb[2], self.brightness))
+        return packets
+
+    def run(self, duration=None):
+        period = 1.0 / self.fps
+        stats = self.stats = AnimationStats()
+        start = stats.start
+        self._running = True
+        try:
+            self._loop(stats, start, period, duration)
+        finally:
+            stats.end = time.monotonic()
+        return stats.report()
+
+    def _loop(self, stats, start, period, duration):
+        frame = 0
+        while self._running:
+            deadline = start + frame * period
+            now = time.monotonic()
+            if deadline > now:
+                time.sleep(deadline - now)
+                now = time.monotonic()
+            if duration is not None and now - start >= duration:
+                break
+
+            stats.record(now - deadline)
+            packets = self.render(now - start)
+            if packets:
+                try:
+                    with self.session.transaction() as tx:
+                        for packet in packets:
+                            tx.write(packet)
+                except IOError:
+                    # Device gone: force a full resend once it is back
+                    self._sent = [None] * len(ZONE_IDS)
+
+            # Skip every slot that already passed instead of catching up
+            frame += 1
+            behind = int((time.monotonic() - start) / period) - frame
+            if behind > 0:
+                stats.dropped += behind
+                frame += behind
+
+    def stop(self):
+        self._running = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Host-driven zone animation")
+    parser.add_argument("effect", choices=sorted(EFFECTS), help="Effect to render")
+    parser.add_argument("--fps", type=int, default=60, help=f"Target frame rate ({MIN_FPS}-{MAX_FPS})")
+    parser.add_argument("--bri", type=int, default=100, help="Brightness (0-100)")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after N seconds")
+    args = parser.parse_args()
+
+    animator = ZoneAnimator(EFFECTS[args.effect], args.fps, args.bri)
+    print(f"[*] Running '{args.effect}' at {args.fps} fps (Ctrl+C to stop)")
+    try:
+        animator.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    r = animator.stats.report()
+    print(f"[+] {r['frames']} frames, {r['fps']:.1f} fps, {r['dropped']} dropped, "
+          f"jitter mean {r['jitter_mean_ms']:.2f} ms / max {r['jitter_max_ms']:.2f} ms")
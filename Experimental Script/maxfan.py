@@ -4,8 +4,45 @@
 #!/usr/bin/env python3
 import sys
 import os
-import struct
 import time
+import importlib
+
+# Optional shared modules (metrics, traffic capture) live next to the original
+# scripts; maxfan.py works on its own without them
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Original Script")
+
+def import_shared(name):
+    """Imports an optional module from the original scripts' folder, or returns None."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        pass
+    if os.path.isdir(SHARED_DIR) and SHARED_DIR not in sys.path:
+        # Appended, so it never shadows the caller's own modules
+        sys.path.append(SHARED_DIR)
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            pass
+    return None
+
+_metrics = False  # resolved on the first transaction
+
+def _get_metrics():
+    global _metrics
+    if _metrics is False:
+        _metrics = import_shared("infinix_metrics")
+    return _metrics
+
+def traffic_recorder():
+    """The shared recorder when INFINIX_TRAFFIC_RECORD is set, else None."""
+    if not os.environ.get("INFINIX_TRAFFIC_RECORD"):
+        return None
+    traffic = import_shared("infinix_traffic")
+    if traffic is None:
+        print("[!] INFINIX_TRAFFIC_RECORD is set but infinix_traffic.py was not found; not recording.")
+        return None
+    return traffic.shared_recorder()
 
 # --- Configuration ---
 # EC Index/Data Ports (corresponds to 768u in C# code)
@@ -21,6 +58,13 @@ FAN_BOOST_ADDR = 0x41
 # Trigger Value 161 (0xA1) confirmed in ECWriteRamCMD
 CMD_TRIGGER_WRITE = 0xA1 
 
+# ECReadRamCMD is not in the decompiled sources; 0xA0 is assumed by
+# analogy with the write trigger. The byte is read back from Index 160.
+# Unverified, so ec_ram_read() refuses to send it unless explicitly
+# enabled (experimental=True or INFINIX_EC_EXPERIMENTAL_READ=1).
+CMD_TRIGGER_READ = 0xA0
+EC_READ_ENV = "INFINIX_EC_EXPERIMENTAL_READ"
+
 # Performance Modes from SetPerformanceMode.cs
 MODE_OFFICE  = 0x00
 MODE_BALANCE = 0x01
@@ -31,69 +75,263 @@ def check_root():
         print("[-] Error: Root privileges required. Run with sudo.")
         sys.exit(1)
 
-def ec_write_byte(port_fd, index, value):
+# Completion polling (the default): after each trigger, read the trigger
+# register back until the EC clears it, bounded by EC_POLL_TIMEOUT.
+EC_POLL_TIMEOUT = 0.005
+EC_POLL_SPIN = 20  # busy polls before yielding the CPU
+
+# Fallback, as in the original C# tool: sleep 5 ms after every index/data
+# write. Used with wait=False, and for the rest of a transaction once a
+# poll times out (the EC did not clear the trigger, so polling cannot be
+# trusted on this machine). Kept until polling is verified on hardware.
+EC_WRITE_SETTLE = 0.005
+
+# Register sequence from ECWriteRamCMD.cs
+EC_RAM_INIT = (
+    (0x94, 0x00), # Index 148
+    (0x91, 0x00), # Index 145
+    (0x92, 0x00), # Index 146
+    (0x92, 0x01), # Index 146 (Value 1)
+    (0x90, 0x00), # Index 144
+)
+EC_REG_ADDR = 0x91    # Index 145
+EC_REG_VALUE = 0xA0   # Index 160
+EC_REG_TRIGGER = 0x93 # Index 147
+
+class ECPort:
     """
-    Writes a byte to the EC.
+    Index/data access to the EC through /dev/port on a single fd.
+    Each register access is one pwrite/pread at the port offset, no seek.
+    port_path can point at a plain file for testing without hardware.
+    """
+    def __init__(self, port_path="/dev/port", recorder=None):
+        self.fd = os.open(port_path, os.O_RDWR)
+        self.ops = 0
+        # Traffic capture (infinix_traffic.py); recorder=False opts out of the env default
+        if recorder is None:
+            recorder = traffic_recorder()
+        self.recorder = recorder or None
+
+    def write_index(self, index, value):
+        try:
+            os.pwrite(self.fd, bytes((index,)), EC_INDEX_PORT)
+            os.pwrite(self.fd, bytes((value,)), EC_DATA_PORT)
+        except OSError as e:
+            raise OSError(e.errno, f"I/O Error on index {hex(index)}: {e.strerror}") from e
+        self.ops += 2
+        if self.recorder is not None:
+            self.recorder.record_ec(index, value)
+
+    def read_index(self, index):
+        try:
+            os.pwrite(self.fd, bytes((index,)), EC_INDEX_PORT)
+            value = os.pread(self.fd, 1, EC_DATA_PORT)[0]
+        except OSError as e:
+            raise OSError(e.errno, f"I/O Error on index {hex(index)}: {e.strerror}") from e
+        self.ops += 2
+        return value
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Runtime backend choice: auto (ioperm when allowed, else /dev/port), ioperm or devport
+EC_BACKEND_ENV = "INFINIX_EC_BACKEND"
+
+def open_port(port_path="/dev/port", backend=None, recorder=None):
+    """
+    Opens the EC through the selected backend (argument, else
+    INFINIX_EC_BACKEND). "auto" uses in-process port I/O (infinix_ioport.py)
+    only for the real /dev/port and falls back to the file path when
+    ioperm is not permitted; any other port_path is a test file.
+    """
+    backend = backend or os.environ.get(EC_BACKEND_ENV, "auto")
+    if backend == "ioperm" or (backend == "auto" and port_path == "/dev/port"):
+        from infinix_ioport import IoPermPort
+        try:
+            return IoPermPort(recorder=recorder)
+        except OSError:
+            if backend == "ioperm":
+                raise
+    elif backend not in ("auto", "devport"):
+        raise ValueError(f"unknown EC backend {backend!r}")
+    return ECPort(port_path, recorder)
+
+def ec_write_byte(port, index, value, settle=EC_WRITE_SETTLE):
+    """
+    Writes a byte to the EC and gives it `settle` seconds to take it.
     Replicates IO(768u, 1, index, value) from C#.
     """
+    port.write_index(index, value)
+    if settle:
+        time.sleep(settle)
+
+def wait_ec_ready(port, trigger=CMD_TRIGGER_WRITE, timeout=EC_POLL_TIMEOUT):
+    """
+    Polls the trigger register until the EC clears it. Returns False if it
+    is still set after `timeout` (the command is assumed to have landed, as
+    the old fixed delay did).
+    """
+    deadline = time.monotonic() + timeout
+    polls = 0
+    while port.read_index(EC_REG_TRIGGER) == trigger:
+        polls += 1
+        if time.monotonic() >= deadline:
+            return False
+        if polls > EC_POLL_SPIN:
+            time.sleep(0.0001)
+    return True
+
+def ec_ram_command(port, address, trigger, value=None, init=True, wait=True, settle=EC_WRITE_SETTLE):
+    """
+    One EC RAM command: init sequence (if init), address, value (writes
+    only), trigger. With wait the bytes go back to back and the trigger
+    register is polled; without it every byte is followed by `settle`.
+    A poll that times out also sleeps `settle`. Returns True if the EC
+    cleared the trigger (always False without wait).
+    """
+    pause = 0 if wait else settle
+    # 1. Initialization Sequence
+    if init:
+        for index, init_value in EC_RAM_INIT:
+            ec_write_byte(port, index, init_value, pause)
+    # 2. Set Address (e.g., 0x40 for Mode, 0x41 for Fan)
+    ec_write_byte(port, EC_REG_ADDR, address, pause)
+    # 3. Set Value
+    if value is not None:
+        ec_write_byte(port, EC_REG_VALUE, value, pause)
+    # 4. Trigger and give the EC time to consume it
+    ec_write_byte(port, EC_REG_TRIGGER, trigger, pause)
+    if not wait:
+        return False
+    if wait_ec_ready(port, trigger):
+        return True
+    if settle:
+        time.sleep(settle)
+    return False
+
+def ec_ram_transaction(port, writes, init_each=True, wait=True, settle=EC_WRITE_SETTLE):
+    """
+    Writes a list of (address, value) pairs to EC RAM.
+
+    The init sequence is replayed before every address like the original
+    C# tool does; init_each=False sends it once per transaction. By default
+    each trigger is polled until the EC clears it; after the first poll
+    timeout (and with wait=False) the rest falls back to the fixed `settle`
+    after every byte. Returns a small latency report.
+    """
+    start = time.perf_counter()
+    ops_before = port.ops
+    timeouts = 0
+    for i, (address, value) in enumerate(writes):
+        done = ec_ram_command(port, address, CMD_TRIGGER_WRITE, value, i == 0 or init_each, wait, settle)
+        if wait and not done:
+            timeouts += 1
+            wait = False
+    report = {
+        "writes": len(writes),
+        "port_ops": port.ops - ops_before,
+        "poll_timeouts": timeouts,
+        "latency_ms": (time.perf_counter() - start) * 1000,
+    }
+    metrics = _get_metrics()
+    if metrics is not None and metrics.ENABLED:
+        metrics.EC_TRANSACTION.observe(report["latency_ms"] / 1000)
+        metrics.EC_WRITES.inc(len(writes))
+        if timeouts:
+            metrics.EC_TIMEOUTS.inc(timeouts)
+    return report
+
+class ECReadDisabled(RuntimeError):
+    pass
+
+def ec_read_enabled():
+    return os.environ.get(EC_READ_ENV) == "1"
+
+def ec_ram_read(port, addresses, init_each=True, experimental=False, wait=True, settle=EC_WRITE_SETTLE):
+    """
+    Reads EC RAM bytes. Mirrors ec_ram_transaction (same polling and settle
+    fallback): per address set 0x91, trigger a read and fetch the value
+    from Index 160.
+
+    The read trigger is a guess; raises ECReadDisabled unless
+    experimental=True or INFINIX_EC_EXPERIMENTAL_READ=1.
+    """
+    if not (experimental or ec_read_enabled()):
+        raise ECReadDisabled(f"EC read trigger {CMD_TRIGGER_READ:#04x} is unverified; "
+                             f"set {EC_READ_ENV}=1 to send it anyway")
+    values = []
+    for i, address in enumerate(addresses):
+        done = ec_ram_command(port, address, CMD_TRIGGER_READ, None, i == 0 or init_each, wait, settle)
+        if wait and not done:
+            wait = False
+        values.append(port.read_index(EC_REG_VALUE))
+    return values
+
+def parse_ec_write(text):
+    """'0x40=0' -> (0x40, 0); for the --hardware-write benchmark options."""
     try:
-        # Write Index to 0x300
-        port_fd.seek(EC_INDEX_PORT)
-        port_fd.write(struct.pack('B', index))
-        
-        # Write Value to 0x301
-        port_fd.seek(EC_DATA_PORT)
-        port_fd.write(struct.pack('B', value))
-        
-        # Necessary delay for hardware processing
-        time.sleep(0.005)
-    except OSError as e:
-        print(f"[-] I/O Error on index {hex(index)}: {e}")
-        sys.exit(1)
+        address, value = (int(part, 0) for part in text.split("="))
+    except ValueError:
+        raise ValueError(f"expected ADDR=VALUE, got {text!r}")
+    if not (0 <= address <= 0xFF and 0 <= value <= 0xFF):
+        raise ValueError(f"address/value out of range 0-255: {text!r}")
+    return address, value
 
 def send_ec_ram_cmd(port, address, value):
     """
     Generic function to write to EC RAM using the initialization sequence
     found in ECWriteRamCMD.cs.
     """
-    # 1. Initialization Sequence
-    ec_write_byte(port, 0x94, 0x00) # Index 148
-    ec_write_byte(port, 0x91, 0x00) # Index 145
-    ec_write_byte(port, 0x92, 0x00) # Index 146
-    ec_write_byte(port, 0x92, 0x01) # Index 146 (Value 1)
-    ec_write_byte(port, 0x90, 0x00) # Index 144
-    
-    # 2. Set Address (e.g., 0x40 for Mode, 0x41 for Fan)
-    ec_write_byte(port, 0x91, address)
-    
-    # 3. Set Value
-    ec_write_byte(port, 0xA0, value) # Index 160
-    
-    # 4. Trigger Write
-    ec_write_byte(port, 0x93, CMD_TRIGGER_WRITE) # Index 147
+    return ec_ram_transaction(port, [(address, value)])
 
-def set_fan_max(enable: bool):
+def print_report(report):
+    print(f"    (EC: {report['writes']} writes, {report['port_ops']} port ops, "
+          f"{report['latency_ms']:.2f} ms, {report['poll_timeouts']} poll timeouts)")
+
+def show_status(port_path="/dev/port", experimental=False):
+    if not (experimental or ec_read_enabled()):
+        print(f"[!] Reading the EC uses an unverified read trigger ({hex(CMD_TRIGGER_READ)}).")
+        print("    Run 'maxfan.py status --experimental-read' to send it anyway.")
+        return
     try:
-        with open("/dev/port", "rb+", buffering=0) as port:
+        with open_port(port_path) as port:
+            mode, boost = ec_ram_read(port, [PERF_MODE_ADDR, FAN_BOOST_ADDR], experimental=True)
+    except FileNotFoundError:
+        print("[-] Error: /dev/port not found. Ensure kernel module 'port' is loaded.")
+        return
+    modes = {MODE_OFFICE: "Office", MODE_BALANCE: "Balance", MODE_GAMING: "Gaming"}
+    print(f"[*] Performance Mode (0x40): {hex(mode)} ({modes.get(mode, 'Unknown')})")
+    print(f"[*] Fan Boost (0x41): {hex(boost)} ({'ON' if boost else 'OFF'})")
+
+def set_fan_max(enable: bool, port_path="/dev/port"):
+    try:
+        with open_port(port_path) as port:
             if enable:
-                print("[*] Switching to Gaming Mode (Instant Response)...")
-                # Set Performance Mode to GAMING (2) first to remove smoothing
-                send_ec_ram_cmd(port, PERF_MODE_ADDR, MODE_GAMING)
-                
-                print("[*] Engaging Max Fan Boost...")
-                # Set Fan Boost to ON (1)
-                send_ec_ram_cmd(port, FAN_BOOST_ADDR, 1)
+                print("[*] Switching to Gaming Mode (Instant Response) and engaging Max Fan Boost...")
+                # Performance Mode GAMING (2) first to remove smoothing, then Fan Boost ON (1)
+                report = ec_ram_transaction(port, [
+                    (PERF_MODE_ADDR, MODE_GAMING),
+                    (FAN_BOOST_ADDR, 1),
+                ])
                 print("[+] Success: Fan set to MAX (Gaming Mode).")
                 
             else:
-                print("[*] Disabling Max Fan Boost...")
-                # Set Fan Boost to OFF (0)
-                send_ec_ram_cmd(port, FAN_BOOST_ADDR, 0)
-                
-                print("[*] Reverting to Balance Mode...")
-                # Revert Performance Mode to BALANCE (1) for normal usage
-                send_ec_ram_cmd(port, PERF_MODE_ADDR, MODE_BALANCE)
+                print("[*] Disabling Max Fan Boost and reverting to Balance Mode...")
+                # Fan Boost OFF (0), then Performance Mode BALANCE (1) for normal usage
+                report = ec_ram_transaction(port, [
+                    (FAN_BOOST_ADDR, 0),
+                    (PERF_MODE_ADDR, MODE_BALANCE),
+                ])
                 print("[+] Success: Fan returned to Normal (Balance Mode).")
+            print_report(report)
             
     except FileNotFoundError:
         print("[-] Error: /dev/port not found. Ensure kernel module 'port' is loaded.")
@@ -104,7 +342,7 @@ if __name__ == "__main__":
     check_root()
     
     if len(sys.argv) < 2:
-        print("Usage: sudo python3 maxfan.py [on|off]")
+        print("Usage: sudo python3 maxfan.py [on|off|status [--experimental-read]]")
         sys.exit(1)
         
     mode = sys.argv[1].lower()
@@ -113,5 +351,7 @@ if __name__ == "__main__":
         set_fan_max(True)
     elif mode == "off":
         set_fan_max(False)
+    elif mode == "status":
+        show_status(experimental="--experimental-read" in sys.argv[2:])
     else:
-        print("Invalid argument. Use 'on' or 'off'.")
\ No newline at end of file
+        print("Invalid argument. Use 'on', 'off' or 'status'.")
\ No newline at end of file
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Thin client for infinix_daemon.py. Deliberately imports nothing but the
+standard library so a hotkey costs interpreter startup + one round trip.
+
+    infinix_client.py office|balance|gaming        (like infinix_back_zone_rgb_control.py)
+    infinix_client.py --zone 2 --r 255 --g 0 --b 0 (like 'Keyboard Zone Key.py')
+    infinix_client.py resync|status|ping|metrics
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+
+PERFORMANCE_NAMES = ("office", "balance", "gaming")
+SIMPLE_COMMANDS = ("resync", "status", "ping", "metrics")
+
+
+def default_socket_path():
+    if os.environ.get("INFINIX_SOCKET"):
+        return os.environ["INFINIX_SOCKET"]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], f"infinix-gtbook-{os.getuid()}.sock")
+    # No per-user runtime dir: the daemon creates this directory 0700 (see infinix_daemon.py)
+    return os.path.join("/tmp", f"infinix-gtbook-{os.getuid()}", "daemon.sock")
+
+
+def request(req, path=None, timeout=2.0):
+    """Sends one request and returns the decoded reply."""
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.settimeout(timeout)
+    try:
+        s.connect(path or default_socket_path())
+        s.sendall(json.dumps(req).encode() + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        s.close()
+    return json.loads(data)
+
+
+def zone_color(spec):
+    """argparse type for --color: '2=FF00FF' -> (2, [255, 0, 255])"""
+    zone, sep, hex_str = spec.partition("=")
+    hex_str = hex_str.lstrip('#')
+    try:
+        zone = int(zone)
+        if not sep or len(hex_str) != 6:
+            raise ValueError
+        rgb = [int(hex_str[i:i+2], 16) for i in (0, 2, 4)]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid color '{spec}', use ZONE=RRGGBB")
+    if not 1 <= zone <= 4:
+        raise argparse.ArgumentTypeError(f"zone {zone} out of range, --color takes zones 1-4")
+    return zone, rgb
+
+
+def build_request(argv):
+    if argv and argv[0].lower() in PERFORMANCE_NAMES:
+        return {"cmd": "perf", "mode": argv[0].lower()}
+    if argv and argv[0].lower() in SIMPLE_COMMANDS:
+        return {"cmd": argv[0].lower()}
+
+    parser = argparse.ArgumentParser(description="Infinix GT Book - RGB Controller (daemon client)")
+    parser.add_argument("--zone", type=int, nargs="+", default=[0], help="Zone ID(s): 0=Main, 1=Left, 2=Mid-Left, 3=Mid-Right, 4=Right")
+    parser.add_argument("--r", type=int, default=0, help="Red (0-255)")
+    parser.add_argument("--g", type=int, default=255, help="Green (0-255)")
+    parser.add_argument("--b", type=int, default=0, help="Blue (0-255)")
+    parser.add_argument("--bri", type=int, default=200, help="Brightness (0-255)")
+    parser.add_argument("--color", type=zone_color, action="append", default=[], metavar="ZONE=RRGGBB",
+                        help="Per-zone color, repeatable (e.g. --color 1=FF0000 --color 4=0000FF)")
+    args = parser.parse_args(argv)
+
+    colors = {str(z): [args.r, args.g, args.b] for z in args.zone} if not args.color else {}
+    for zone, rgb in args.color:
+        colors[str(zone)] = rgb
+    return {"cmd": "zone", "colors": colors, "brightness": args.bri}
+
+
+if __name__ == "__main__":
+    req = build_request(sys.argv[1:])
+    try:
+        reply = request(req)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print("[!] Daemon not running. Start it with: python3 infinix_daemon.py")
+        sys.exit(1)
+
+    if not reply.get("ok"):
+        print(f"[!] {reply.get('msg')}")
+        sys.exit(1)
+    if req["cmd"] in ("status", "metrics"):
+        print(json.dumps(reply, indent=2))
+    else:
+        print(f"[+] {reply.get('msg')} ({reply.get('sent', 0)} packets, {reply.get('us', 0)} us)")
@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
-import hid
 import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, colorchooser
 
-VENDOR_ID = 0x340E
-PRODUCT_ID = 0x8002
-INTERFACE_NUM = 1
+from infinix_hid_session import HIDSession
+from infinix_hid_writer import CoalescingWriter
+from infinix_hotplug import HotplugWatcher
+from infinix_shadow_state import ShadowState
 
 COLOR_BG = "#121212"
 COLOR_PANEL = "#1E1E1E"
@@ -43,58 +43,45 @@ PERFORMANCE_MODES = {
     "GAMING": 0x42
 }
 
+# Slider drags are coalesced; never send more than this many packets/s
+MAX_WRITES_PER_SEC = 30
+
 class InfinixHID:
     def __init__(self):
-        self.device_path = None
+        self.session = HIDSession()
+        # Only ever used from the writer thread
+        self.state = ShadowState(self.session)
 
-    def find_device(self):
-        try:
-            for d in hid.enumerate(VENDOR_ID, PRODUCT_ID):
-                if d['interface_number'] == INTERFACE_NUM:
-                    self.device_path = d['path']
-                    return True
-        except Exception:
-            return False
-        return False
+    @property
+    def device_path(self):
+        return self.session.device_path
 
-    def _checksum(self, packet):
-        return sum(packet[1:63]) & 0xFF
+    def find_device(self):
+        return self.session.find_device()
 
     def _send(self, packet):
-        if not self.find_device():
-            return False, "Device not connected"
-        try:
-            h = hid.device()
-            h.open_path(self.device_path)
-            h.write(packet)
-            h.close()
-            return True, "Success"
-        except Exception as e:
-            return False, str(e)
+        return self.session.write(packet)
 
     def set_rgb(self, mode_id, r, g, b, brightness):
-        packet = [0] * 65
-        packet[0] = 0x06
-        packet[1] = 0x10 | mode_id
-        packet[2] = 0x04
-        packet[7] = r
-        packet[8] = g
-        packet[9] = b
-        packet[10] = brightness
-        packet[63] = self._checksum(packet)
-        return self._send(packet)
+        self.state.set_light(mode_id, r, g, b, brightness)
+        return self.state.commit()
 
     def set_performance(self, mode_byte):
-        packet = [0] * 65
-        packet[0] = 0x06
-        packet[1] = mode_byte
-        packet[63] = self._checksum(packet)
-        return self._send(packet)
+        self.state.set_performance(mode_byte)
+        return self.state.commit()
+
+    def resync(self):
+        """Re-sends the whole known state (after replug/resume)."""
+        return self.state.commit(force=True)
 
 class GTControlCenter:
     def __init__(self, root):
         self.root = root
         self.hw = InfinixHID()
+        # All HID I/O runs here; results come back on the Tk thread
+        self.writer = CoalescingWriter(MAX_WRITES_PER_SEC, dispatch=lambda fn: self.root.after(0, fn))
+        self.writer.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         
         self.root.title("GT CONTROL CENTER")
         self.root.geometry("700x500")
@@ -215,12 +202,28 @@ class GTControlCenter:
         self.status_bar.pack(side="bottom", fill="x", padx=25, pady=10)
 
     def _start_connection_monitor(self):
-        found = self.hw.find_device()
+        # Event driven: the watcher invalidates the cached path and pushes
+        # add/remove events; only the initial state needs an enumerate.
+        self._set_connected(self.hw.find_device())
+        try:
+            self.hotplug = HotplugWatcher(self._on_hotplug, session=self.hw.session)
+        except OSError:
+            # No netlink/inotify: keep the initial state, writes still reconnect
+            self.hotplug = None
+            return
+        self.hotplug.start()
+
+    def _on_hotplug(self, action, node):
+        # Watcher thread: UI goes through root.after, device state through the writer
+        self.root.after(0, self._set_connected, action == "add")
+        if action == "add":
+            self.writer.post("resync", self.hw.resync)
+
+    def _set_connected(self, found):
         if found:
             self.conn_lbl.config(text="● CONNECTED", foreground=COLOR_SUCCESS)
         else:
             self.conn_lbl.config(text="● DISCONNECTED", foreground=COLOR_ERROR)
-        self.root.after(3000, self._start_connection_monitor)
 
     def on_bright_slide(self, val):
         self.apply_rgb()
@@ -243,7 +246,11 @@ class GTControlCenter:
         r, g, b = self.current_color
         bright = self.var_bright.get()
 
-        success, msg = self.hw.set_rgb(mode_id, r, g, b, bright)
+        self.writer.post("rgb", self.hw.set_rgb, mode_id, r, g, b, bright,
+                         on_done=lambda res: self._on_rgb_done(res, mode_str, bright))
+
+    def _on_rgb_done(self, result, mode_str, bright):
+        success, msg = result
         if success:
             self.var_status.set(f"Lighting Applied: {mode_str} | {bright}%")
         else:
@@ -251,8 +258,11 @@ class GTControlCenter:
 
     def apply_perf(self, mode_name):
         byte_val = PERFORMANCE_MODES[mode_name]
-        success, msg = self.hw.set_performance(byte_val)
-        
+        self.writer.post("perf", self.hw.set_performance, byte_val,
+                         on_done=lambda res: self._on_perf_done(res, mode_name))
+
+    def _on_perf_done(self, result, mode_name):
+        success, msg = result
         if success:
             self.var_status.set(f"System Mode Set: {mode_name}")
             messagebox.showinfo("System Mode", f"Switched to {mode_name} Mode")
@@ -260,6 +270,16 @@ class GTControlCenter:
             self.var_status.set(f"Error: {msg}")
             messagebox.showerror("Error", f"Failed to set mode: {msg}")
 
+    def close(self):
+        # Flush pending writes while the root still exists; completions
+        # arriving during teardown are dropped instead of touching Tk
+        self.writer.dispatch = lambda fn: None
+        self.writer.stop(flush=True)
+        if self.hotplug is not None:
+            self.hotplug.stop()
+        self.hw.session.close()
+        self.root.destroy()
+
 if __name__ == "__main__":
     app_root = tk.Tk()
     
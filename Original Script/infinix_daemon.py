@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Resident control daemon: owns the HID handle and shadow state and serves
+JSON-lines requests on a Unix socket, so hotkey clients only pay for a
+connect + one line instead of interpreter startup, hid import, enumerate
+and open.
+
+Requests (one JSON object per line, one reply line each):
+    {"cmd": "perf", "mode": "gaming"}
+    {"cmd": "light", "mode": 1, "rgb": [255, 100, 0], "brightness": 100}
+    {"cmd": "zone", "colors": {"1": [255, 0, 0], "4": [0, 0, 255]}, "brightness": 200}
+    {"cmd": "resync"} | {"cmd": "status"} | {"cmd": "ping"}
+    {"cmd": "metrics"}   (counters/histograms, see infinix_metrics.py)
+Replies:
+    {"ok": true, "msg": "Success", "sent": 2, "us": 410}
+"""
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+
+import infinix_metrics as metrics
+from infinix_client import default_socket_path
+from infinix_hid_session import HIDSession
+from infinix_hotplug import HotplugWatcher
+from infinix_protocol import PERFORMANCE_MODES, ZONE_STATIC_PARAM
+from infinix_shadow_state import ShadowState
+
+
+def _byte(name, value, limit=0xFF):
+    if type(value) is not int or not 0 <= value <= limit:
+        raise ValueError(f"{name} must be an integer 0-{limit}, got {value!r}")
+    return value
+
+
+def _rgb(name, value):
+    if not isinstance(value, list) or len(value) != 3:
+        raise ValueError(f"{name} must be [r, g, b], got {value!r}")
+    return tuple(_byte(name, c) for c in value)
+
+
+def parse_request(req):
+    """
+    Validates a state-changing request and returns the ShadowState setter
+    calls it maps to, as (method name, args) pairs. Raises ValueError before
+    anything is applied, so a bad zone or color never leaves half a request
+    in the desired state.
+    """
+    if not isinstance(req, dict):
+        raise ValueError("request must be a JSON object")
+    cmd = req.get("cmd")
+    if cmd == "perf":
+        mode = req.get("mode", "")
+        if mode not in PERFORMANCE_MODES:
+            raise ValueError(f"Invalid mode. Available modes: {list(PERFORMANCE_MODES)}")
+        return [("set_performance", (PERFORMANCE_MODES[mode],))]
+    if cmd == "light":
+        r, g, b = _rgb("rgb", req.get("rgb"))
+        return [("set_light", (_byte("mode", req.get("mode", 1), 0xF), r, g, b,
+                               _byte("brightness", req.get("brightness", 100))))]
+    if cmd == "zone":
+        bri = _byte("brightness", req.get("brightness", 200))
+        colors = req.get("colors")
+        if not isinstance(colors, dict) or not colors:
+            raise ValueError("colors must be a non-empty {zone: [r, g, b]} object")
+        calls = []
+        for key, color in colors.items():
+            try:
+                zone = int(key)
+            except ValueError:
+                raise ValueError(f"Invalid Zone {key!r}. Use 0-4.")
+            if zone not in ZONE_STATIC_PARAM:
+                raise ValueError(f"Invalid Zone {zone}. Use 0-4.")
+            calls.append((zone, ("set_zone", (zone, ZONE_STATIC_PARAM[zone], *_rgb(f"zone {zone}", color), bri))))
+        return [call for _, call in sorted(calls)]
+    if cmd == "resync":
+        return []
+    raise ValueError(f"Unknown command: {cmd}")
+
+
+class ControlState:
+    """Device side of the daemon; every request runs under one lock."""
+
+    def __init__(self):
+        self.session = HIDSession()
+        self.state = ShadowState(self.session)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def handle(self, req):
+        cmd = req.get("cmd") if isinstance(req, dict) else None
+        if cmd not in ("ping", "metrics", "status"):
+            try:
+                calls = parse_request(req)
+            except ValueError as e:
+                return {"ok": False, "msg": str(e)}
+        with self.lock:
+            self.requests += 1
+            if cmd == "ping":
+                return {"ok": True, "msg": "pong"}
+            if cmd == "metrics":
+                return {"ok": True, "enabled": metrics.ENABLED, "metrics": metrics.snapshot()}
+            if cmd == "status":
+                return {"ok": True, "connected": self.session.is_open, "requests": self.requests,
+                        "state": {k: v for k, v in self.state.shadow.items()}}
+
+            for method, args in calls:
+                getattr(self.state, method)(*args)
+            success, msg = self.state.commit(force=(cmd == "resync"))
+            return {"ok": success, "msg": msg, "sent": self.state.last_sent}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            start = time.perf_counter()
+            try:
+                reply = self.server.control.handle(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {"ok": False, "msg": f"Bad request: {e}"}
+            reply["us"] = int((time.perf_counter() - start) * 1e6)
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+class ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, control):
+        _private_dir(os.path.dirname(path))
+        if os.path.lexists(path):
+            os.unlink(path)
+        self.control = control
+        # Created 0600 from the start: a chmod after bind leaves a window where others can connect
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+
+def _private_dir(path):
+    """
+    Creates the socket directory 0700 if missing. An existing directory must
+    belong to us or root and not be writable by others (unless sticky, like
+    /tmp itself), otherwise someone else could swap the socket.
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not os.path.isdir(path) or os.path.islink(path):
+        raise OSError(f"{path} is not a directory")
+    if st.st_uid not in (0, os.getuid()):
+        raise OSError(f"{path} is owned by uid {st.st_uid}, not {os.getuid()}")
+    if st.st_mode & 0o022 and not st.st_mode & 0o1000:
+        raise OSError(f"{path} is writable by other users")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Resident control daemon")
+    parser.add_argument("--socket", default=default_socket_path(), help="Unix socket path")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Collect metrics and rewrite this Prometheus textfile (.prom) or JSON file every 15 s")
+    args = parser.parse_args()
+    if args.metrics:
+        metrics.enable()
+        metrics.start_exporter(args.metrics)
+
+    control = ControlState()
+    try:
+        opened = control.session.open()
+    except Exception:
+        opened = False
+    if not opened:
+        print("[!] Device not found yet; will connect on first request.")
+    try:
+        HotplugWatcher(lambda action, node: control.state.invalidate(), session=control.session).start()
+    except OSError:
+        pass
+
+    try:
+        server = ControlServer(args.socket, control)
+    except OSError as e:
+        print(f"[-] Cannot create socket {args.socket}: {e}")
+        control.session.close()
+        return 1
+    print(f"[*] Listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+        control.session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
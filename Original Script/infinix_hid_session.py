@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import infinix_metrics as metrics
+
+# --- Hardware Constants ---
+VENDOR_ID = 0x340E   # Infinix / ITE
+PRODUCT_ID = 0x8002  # GT Book Controller
+INTERFACE_NUM = 1    # Shared Interface
+
+NOT_CONNECTED = "Device not connected"
+
+# "hidraw" (direct /dev/hidrawN), "hidapi", "auto" (hidraw when sysfs has it)
+# or "sim" (infinix_simulator, no hardware)
+BACKEND_ENV = "INFINIX_HID_BACKEND"
+
+# Capture file for infinix_traffic.py; when set every write is recorded
+RECORD_ENV = "INFINIX_TRAFFIC_RECORD"
+
+
+def _select_backend(name):
+    if name == "sim":
+        import infinix_simulator
+        return infinix_simulator.default_backend()
+    if name in ("auto", "hidraw"):
+        import infinix_hidraw
+        if name == "hidraw" or infinix_hidraw.available():
+            return infinix_hidraw
+    import hid
+    return hid
+
+
+def load_backend(name=None):
+    """Returns a module with hidapi's enumerate()/device() interface."""
+    backend = _select_backend(name or os.environ.get(BACKEND_ENV, "auto"))
+    if os.environ.get(RECORD_ENV):
+        import infinix_traffic
+        backend = infinix_traffic.RecordingBackend(backend, infinix_traffic.shared_recorder())
+    return backend
+
+
+class HIDSession:
+    """
+    Long-lived handle to the GT Book controller.
+
+    Enumeration and open_path() cost far more than the 65-byte write, so the
+    path and the open handle are cached and only dropped when a write fails
+    (unplug, suspend, permission change). The next write reconnects.
+    """
+
+    def __init__(self, retries=1, backend=None):
+        # backend: module with hidapi's interface, or a name for load_backend()
+        self.backend = load_backend(backend) if backend is None or isinstance(backend, str) else backend
+        self.device_path = None
+        self.retries = retries
+        self._handle = None
+        self._lock = threading.RLock()
+        self._opened_before = False
+
+    def find_device(self):
+        """Enumerates the controller and caches the Interface 1 path."""
+        start = time.perf_counter() if metrics.ENABLED else 0.0
+        try:
+            for d in self.backend.enumerate(VENDOR_ID, PRODUCT_ID):
+                if d['interface_number'] == INTERFACE_NUM:
+                    self.device_path = d['path']
+                    if metrics.ENABLED:
+                        metrics.ENUMERATE.observe(time.perf_counter() - start)
+                    return True
+        except Exception:
+            pass
+        self.device_path = None
+        if metrics.ENABLED:
+            metrics.ENUMERATE.observe(time.perf_counter() - start)
+            metrics.OPEN_ERRORS.inc()
+        return False
+
+    @property
+    def is_open(self):
+        return self._handle is not None
+
+    def open(self):
+        with self._lock:
+            if self._handle is not None:
+                return True
+            if self.device_path is None and not self.find_device():
+                return False
+            start = time.perf_counter() if metrics.ENABLED else 0.0
+            h = self.backend.device()
+            try:
+                h.open_path(self.device_path)
+            except Exception:
+                # Stale path (replugged to another hidraw node): rediscover once
+                if metrics.ENABLED:
+                    metrics.OPEN_ERRORS.inc()
+                if not self.find_device():
+                    return False
+                h.open_path(self.device_path)
+            self._handle = h
+            if metrics.ENABLED:
+                metrics.OPEN.observe(time.perf_counter() - start)
+                if self._opened_before:
+                    metrics.RECONNECTS.inc()
+            self._opened_before = True
+            return True
+
+    def close(self):
+        with self._lock:
+            if self._handle is not None:
+                try:
+                    self._handle.close()
+                except Exception:
+                    pass
+                self._handle = None
+
+    def invalidate(self):
+        """Drops the handle and cached path (device gone or replugged)."""
+        with self._lock:
+            self.close()
+            self.device_path = None
+
+    def write(self, packet):
+        """Writes one packet, reconnecting on failure. Returns (success, message)."""
+        with self._lock:
+            error = NOT_CONNECTED
+            for _ in range(self.retries + 1):
+                try:
+                    if not self.open():
+                        return False, NOT_CONNECTED
+                    start = time.perf_counter() if metrics.ENABLED else 0.0
+                    if self._handle.write(packet) < 0:
+                        raise IOError("write failed")
+                    if metrics.ENABLED:
+                        metrics.WRITE.observe(time.perf_counter() - start)
+                        metrics.PACKETS.inc()
+                    return True, "Success"
+                except Exception as e:
+                    error = str(e)
+                    if metrics.ENABLED:
+                        metrics.WRITE_ERRORS.inc()
+                    self.invalidate()
+            return False, error
+
+    @contextmanager
+    def transaction(self):
+        """
+        Holds the session lock and an open handle for a group of writes:
+
+            with session.transaction() as tx:
+                tx.write(packet_a)
+                tx.write(packet_b)
+
+        tx.write() raises IOError on failure; the handle is dropped so the
+        next write or transaction reconnects.
+        """
+        with self._lock:
+            try:
+                opened = self.open()
+            except Exception as e:
+                self.invalidate()
+                raise IOError(str(e))
+            if not opened:
+                raise IOError(NOT_CONNECTED)
+            try:
+                yield _Transaction(self._handle)
+            except Exception:
+                self.invalidate()
+                raise
+
+    def write_batch(self, packets):
+        """
+        Writes a prebuilt sequence of packets under one lock and handle,
+        like a transaction() without the per-call generator and _Transaction.
+        For per-frame loops. Raises IOError on failure; the handle is dropped
+        so the next call reconnects.
+        """
+        with self._lock:
+            try:
+                opened = self.open()
+            except Exception as e:
+                self.invalidate()
+                raise IOError(str(e))
+            if not opened:
+                raise IOError(NOT_CONNECTED)
+            handle = self._handle
+            try:
+                for packet in packets:
+                    _write_packet(handle, packet)
+            except Exception:
+                self.invalidate()
+                raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Transaction:
+    __slots__ = ("_handle", "count")
+
+    def __init__(self, handle):
+        self._handle = handle
+        self.count = 0
+
+    def write(self, packet):
+        _write_packet(self._handle, packet)
+        self.count += 1
+
+
+def _write_packet(handle, packet):
+    """One write on an open handle; raises IOError (or the backend's error) on failure."""
+    start = time.perf_counter() if metrics.ENABLED else 0.0
+    try:
+        failed = handle.write(packet) < 0
+    except Exception:
+        if metrics.ENABLED:
+            metrics.WRITE_ERRORS.inc()
+        raise
+    if failed:
+        if metrics.ENABLED:
+            metrics.WRITE_ERRORS.inc()
+        raise IOError("write failed")
+    if metrics.ENABLED:
+        metrics.WRITE.observe(time.perf_counter() - start)
+        metrics.PACKETS.inc()
+
+
+_default_session = None
+
+
+def default_session():
+    """Process-wide session shared by the scripts."""
+    global _default_session
+    if _default_session is None:
+        _default_session = HIDSession()
+    return _default_session
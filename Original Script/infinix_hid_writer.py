@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import threading
+import time
+
+try:
+    from tkinter import TclError
+except ImportError:
+    class TclError(Exception):
+        pass
+
+# Default ceiling on packets per second sent by the writer
+DEFAULT_MAX_RATE = 30
+
+
+class CoalescingWriter(threading.Thread):
+    """
+    Background thread that owns all device writes.
+
+    Callers post intents under a key ("rgb", "perf", "zone3", ...). Only the
+    latest intent per key is kept, so a burst of slider ticks collapses into
+    one write. Intents are executed at most max_rate times per second and
+    completion callbacks go through dispatch() (root.after for Tk).
+    """
+
+    def __init__(self, max_rate=DEFAULT_MAX_RATE, dispatch=None):
+        super().__init__(name="infinix-writer", daemon=True)
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.dispatch = dispatch
+        self.sent = 0
+        self.coalesced = 0
+        self._pending = {}  # key -> (fn, args, on_done), oldest first
+        self._cond = threading.Condition()
+        self._running = True
+        self._next_send = 0.0
+
+    def post(self, key, fn, *args, on_done=None):
+        """Queues fn(*args), replacing any pending intent with the same key."""
+        with self._cond:
+            if key in self._pending:
+                del self._pending[key]
+                self.coalesced += 1
+            self._pending[key] = (fn, args, on_done)
+            self._cond.notify()
+
+    def stop(self, flush=True, timeout=1.0):
+        with self._cond:
+            if not flush:
+                self._pending.clear()
+            self._running = False
+            self._cond.notify()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # Rate limit: keep collecting newer intents until the slot opens
+                delay = self._next_send - time.monotonic()
+                while delay > 0 and self._running:
+                    self._cond.wait(delay)
+                    delay = self._next_send - time.monotonic()
+                key = next(iter(self._pending))
+                fn, args, on_done = self._pending.pop(key)
+
+            try:
+                result = fn(*args)
+            except Exception as e:
+                result = (False, str(e))
+            self.sent += 1
+            self._next_send = time.monotonic() + self.min_interval
+
+            if on_done is not None:
+                self._complete(on_done, result)
+
+    def _complete(self, on_done, result):
+        if self.dispatch is None:
+            on_done(result)
+            return
+        try:
+            self.dispatch(lambda: on_done(result))
+        except (RuntimeError, TclError):
+            # UI already torn down (Tk raises TclError once the root is destroyed)
+            pass
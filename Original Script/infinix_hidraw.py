@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Direct /dev/hidrawN backend, a drop-in for the parts of hidapi the scripts
+use (enumerate(), device().open_path/write/close).
+
+Discovery walks /sys/class/hidraw instead of going through libhidapi, and
+the matching node name is cached in XDG_RUNTIME_DIR (only when that is a
+private directory) so the next process only re-validates one sysfs link.
+
+A write is a single os.write() on an O_NONBLOCK fd; hidraw takes the
+report ID as the first byte, the same buffer layout hidapi passes through.
+"""
+import os
+import stat
+import sys
+import time
+
+SYSFS_HIDRAW = "/sys/class/hidraw"
+
+_device_ids = None
+
+
+def device_ids():
+    """
+    (VENDOR_ID, PRODUCT_ID, INTERFACE_NUM) from infinix_hid_session,
+    imported on first use so importing this module does not pull in
+    infinix_hid_session and infinix_metrics.
+    """
+    global _device_ids
+    if _device_ids is None:
+        from infinix_hid_session import VENDOR_ID, PRODUCT_ID, INTERFACE_NUM
+        _device_ids = (VENDOR_ID, PRODUCT_ID, INTERFACE_NUM)
+    return _device_ids
+
+
+def match_devpath(devpath):
+    """Returns the hidraw name if devpath is the controller's Interface 1 node."""
+    parts = devpath.rsplit("/", 4)
+    if len(parts) < 5 or parts[3] != "hidraw" or not parts[4].startswith("hidraw"):
+        return None
+    vendor_id, product_id, interface_num = device_ids()
+    # .../1-5:1.1/0003:340E:8002.0003/hidraw/hidraw1
+    #        ^ interface            ^ HID bus id
+    # Parsed by hand: importing re costs more than the whole backend.
+    usb_if, hid_id = parts[1], parts[2]
+    if not hid_id.partition(".")[0].upper().endswith(":%04X:%04X" % (vendor_id, product_id)):
+        return None
+    interface = usb_if.rpartition(".")[2]
+    if ":" not in usb_if or not interface.isdigit() or int(interface) != interface_num:
+        return None
+    return parts[4]
+
+
+def _match_name(name):
+    return match_devpath(os.path.realpath(os.path.join(SYSFS_HIDRAW, name)))
+
+
+def scan_sysfs():
+    """One-shot sysfs walk: set of hidraw names belonging to the controller."""
+    found = set()
+    try:
+        names = os.listdir(SYSFS_HIDRAW)
+    except OSError:
+        return found
+    for name in names:
+        if _match_name(name):
+            found.add(name)
+    return found
+
+
+def _cache_file():
+    """Cache path in the private XDG_RUNTIME_DIR, or None: no cross-process cache in a shared /tmp."""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime:
+        return None
+    try:
+        st = os.stat(runtime)
+    except OSError:
+        return None
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return os.path.join(runtime, f"infinix-gtbook-hidraw-{os.getuid()}")
+
+
+def _read_cache(path):
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW | os.O_CLOEXEC)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, 64).decode("ascii", "replace").strip()
+    finally:
+        os.close(fd)
+
+
+def _write_cache(path, name):
+    # Private temp file + atomic rename; never follows a planted symlink
+    tmp = f"{path}.{os.getpid()}"
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW | os.O_CLOEXEC, 0o600)
+    except OSError:
+        return
+    try:
+        os.write(fd, name.encode())
+        os.close(fd)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _valid_node(name):
+    """
+    A cached name is only trusted if it is a plain hidrawN, sysfs still maps
+    it to the controller, and /dev/hidrawN is the char device sysfs lists.
+    """
+    if not name.startswith("hidraw") or not name[6:].isdigit() or _match_name(name) != name:
+        return False
+    try:
+        with open(os.path.join(SYSFS_HIDRAW, name, "dev")) as f:
+            major, _, minor = f.read().strip().partition(":")
+        st = os.stat("/dev/" + name)
+    except OSError:
+        return False
+    return (stat.S_ISCHR(st.st_mode) and major.isdigit() and minor.isdigit()
+            and st.st_rdev == os.makedev(int(major), int(minor)))
+
+
+_cached_name = None
+
+
+def find_hidraw(refresh=False):
+    """Returns /dev/hidrawN for the controller or None. Cached across calls and processes."""
+    global _cached_name
+    cache = _cache_file()
+    if not refresh:
+        name = _cached_name
+        if name is None and cache:
+            name = _read_cache(cache)
+        # A readlink and a stat confirm the node still belongs to the controller
+        if name and _valid_node(name):
+            _cached_name = name
+            return "/dev/" + name
+
+    found = sorted(scan_sysfs())
+    _cached_name = found[0] if found else None
+    if _cached_name and cache:
+        _write_cache(cache, _cached_name)
+    return "/dev/" + _cached_name if _cached_name else None
+
+
+def available():
+    return os.path.isdir(SYSFS_HIDRAW)
+
+
+def enumerate(vendor_id=None, product_id=None):
+    """hid.enumerate() subset: only the controller's Interface 1 is reported."""
+    VENDOR_ID, PRODUCT_ID, INTERFACE_NUM = device_ids()
+    if (vendor_id or VENDOR_ID, product_id or PRODUCT_ID) != (VENDOR_ID, PRODUCT_ID):
+        return []
+    path = find_hidraw()
+    if path is None:
+        return []
+    return [{"path": path.encode(), "vendor_id": VENDOR_ID, "product_id": PRODUCT_ID,
+             "interface_number": INTERFACE_NUM}]
+
+
+class device:
+    """hid.device() subset backed by a raw fd."""
+
+    def __init__(self):
+        self.fd = None
+
+    def open_path(self, path):
+        if isinstance(path, bytes):
+            path = path.decode()
+        self.fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+
+    def write(self, buff):
+        if self.fd is None:
+            raise ValueError("not open")
+        return os.write(self.fd, buff)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+# --- Side-by-side benchmark ---
+
+def _import_cost(module):
+    import subprocess
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    return float(out.stdout) if out.returncode == 0 else None
+
+
+def _time(fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number
+
+
+def benchmark(number=1000, write_path=None):
+    """
+    Compares import, discovery, open and write cost of both backends.
+    write_path overrides the device node (e.g. /dev/null) to time the
+    write path without hardware.
+    """
+    from infinix_protocol import PacketCodec
+    VENDOR_ID, PRODUCT_ID, INTERFACE_NUM = device_ids()
+    packet = bytes(PacketCodec().keyboard(1, 255, 100, 0, 100))
+    backends = [("hidraw", sys.modules[__name__])]
+    try:
+        import hid
+        backends.append(("hidapi", hid))
+    except ImportError:
+        print("[!] hidapi not installed; benchmarking hidraw only")
+
+    print(f"{'backend':<8}{'import ms':>11}{'enum us':>10}{'open us':>10}{'write us':>10}")
+    for name, backend in backends:
+        imp = _import_cost("infinix_hidraw" if name == "hidraw" else "hid")
+        enum = _time(lambda: backend.enumerate(VENDOR_ID, PRODUCT_ID), max(1, number // 10))
+        devs = [d for d in backend.enumerate(VENDOR_ID, PRODUCT_ID) if d["interface_number"] == INTERFACE_NUM]
+        path = write_path.encode() if write_path else (devs[0]["path"] if devs else None)
+        open_us = write_us = float("nan")
+        if path is not None and (name == "hidraw" or not write_path):
+            def open_close():
+                h = backend.device()
+                h.open_path(path)
+                h.close()
+            open_us = _time(open_close, max(1, number // 10)) * 1e6
+            h = backend.device()
+            h.open_path(path)
+            write_us = _time(lambda: h.write(packet), number) * 1e6
+            h.close()
+        imp_ms = imp * 1000 if imp is not None else float("nan")
+        print(f"{name:<8}{imp_ms:>11.2f}{enum * 1e6:>10.1f}{open_us:>10.1f}{write_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark(write_path=sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        path = find_hidraw(refresh=True)
+        print(f"[+] Controller at {path}" if path else "[-] Controller not found")
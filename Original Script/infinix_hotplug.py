@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+import ctypes
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+
+from infinix_hid_session import VENDOR_ID, PRODUCT_ID
+from infinix_hidraw import SYSFS_HIDRAW, match_devpath, scan_sysfs
+
+# --- Netlink ---
+NETLINK_KOBJECT_UEVENT = 15
+GROUP_KERNEL = 1  # raw kernel uevents (before udev rules run)
+GROUP_UDEV = 2    # re-broadcast by udevd once permissions are applied
+UDEV_MAGIC = 0xFEEDCAFE
+
+# --- inotify ---
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+INOTIFY_EVENT = struct.Struct("iIII")
+
+def _parse_uevent(data):
+    """Decodes a kernel or libudev netlink message into a property dict."""
+    if data.startswith(b"libudev\0"):
+        magic, = struct.unpack_from("!I", data, 8)
+        if magic != UDEV_MAGIC:
+            return None
+        _, props_off, props_len = struct.unpack_from("III", data, 12)
+        body = data[props_off:props_off + props_len]
+    else:
+        # "add@/devices/...\0ACTION=add\0..."
+        body = data[data.find(b"\0") + 1:]
+    props = {}
+    for field in body.split(b"\0"):
+        key, sep, value = field.partition(b"=")
+        if sep:
+            props[key.decode(errors="replace")] = value.decode(errors="replace")
+    return props
+
+
+class HotplugWatcher(threading.Thread):
+    """
+    Pushes ("add"|"remove", "/dev/hidrawN") events for the controller.
+
+    Uses a netlink uevent socket (udev group by default) and falls back to
+    an inotify watch on /dev when netlink is unavailable. If a session is
+    given, its cached handle/path is invalidated on every event so the next
+    write rediscovers the device.
+    """
+
+    def __init__(self, on_event=None, session=None, group=GROUP_UDEV):
+        super().__init__(name="infinix-hotplug", daemon=True)
+        self.on_event = on_event
+        self.session = session
+        self.group = group
+        self.known = scan_sysfs()
+        self.backend = None
+        self._stopped = False
+        self._stop_r, self._stop_w = os.pipe()
+        try:
+            self._fd, self._reader = self._open_backend()
+        except OSError:
+            os.close(self._stop_r)
+            os.close(self._stop_w)
+            raise
+
+    @property
+    def connected(self):
+        return bool(self.known)
+
+    def _open_backend(self):
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, self.group))
+            self._sock = sock
+            self.backend = "netlink"
+            return sock.fileno(), self._read_netlink
+        except (OSError, AttributeError):
+            pass
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0 or libc.inotify_add_watch(fd, b"/dev", IN_CREATE | IN_DELETE) < 0:
+            err = ctypes.get_errno()
+            if fd >= 0:
+                os.close(fd)
+            raise OSError(err, "inotify unavailable")
+        self.backend = "inotify"
+        return fd, self._read_inotify
+
+    def _read_netlink(self):
+        props = _parse_uevent(self._sock.recv(8192))
+        if not props or props.get("SUBSYSTEM") != "hidraw":
+            return
+        action = props.get("ACTION")
+        name = match_devpath(props.get("DEVPATH", ""))
+        if action == "add" and name:
+            self._emit("add", name)
+        elif action == "remove":
+            # sysfs is already gone on remove; match against what we saw
+            name = props.get("DEVNAME", "").rpartition("/")[2]
+            if name in self.known:
+                self._emit("remove", name)
+
+    def _read_inotify(self):
+        try:
+            data = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0").decode()
+            offset += length
+            if not name.startswith("hidraw"):
+                continue
+            if mask & IN_CREATE:
+                if match_devpath(os.path.realpath(os.path.join(SYSFS_HIDRAW, name))):
+                    self._emit("add", name)
+            elif mask & IN_DELETE and name in self.known:
+                self._emit("remove", name)
+
+    def _emit(self, action, name):
+        if action == "add":
+            self.known.add(name)
+        else:
+            self.known.discard(name)
+        if self.session is not None:
+            self.session.invalidate()
+        if self.on_event is not None:
+            self.on_event(action, "/dev/" + name)
+
+    def fileno(self):
+        """For driving the watcher from an event loop instead of start()."""
+        return self._fd
+
+    def dispatch(self):
+        """Handles whatever is pending on fileno(); call when it is readable."""
+        self._reader()
+
+    def run(self):
+        try:
+            while True:
+                ready, _, _ = select.select([self._fd, self._stop_r], [], [])
+                if self._stop_r in ready:
+                    return
+                self._reader()
+        finally:
+            self._close()
+
+    def _close(self):
+        if self.backend == "netlink":
+            self._sock.close()
+        else:
+            os.close(self._fd)
+        os.close(self._stop_r)
+
+    def stop(self):
+        """Safe to call more than once."""
+        if self._stopped:
+            return
+        self._stopped = True
+        if self.ident is None:
+            # Never started: nothing is selecting on the pipe
+            self._close()
+        else:
+            os.write(self._stop_w, b"x")
+        os.close(self._stop_w)
+
+
+def wait_for_device(timeout=None, settle=0.0):
+    """
+    Blocks until the controller is present. Returns True if it is.
+
+    A node that already exists counts at once unless settle > 0: right after
+    resume it may be the pre-suspend node that is about to be removed. Then
+    the node is only trusted if it is not removed within `settle` seconds;
+    if it is, wait (up to timeout) for the new one.
+    """
+    added = threading.Event()
+    removed = threading.Event()
+    watcher = HotplugWatcher(lambda action, node: (added if action == "add" else removed).set())
+    present = watcher.connected
+    if present and not settle:
+        watcher.stop()
+        return True
+    watcher.start()
+    try:
+        if not present:
+            return added.wait(timeout)
+        start = time.monotonic()
+        if not removed.wait(settle):
+            return True  # survived suspend
+        added.clear()
+        if watcher.connected:
+            return True  # already back
+        remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - start))
+        return added.wait(remaining)
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--wait":
+        print("[*] Waiting for device...")
+        sys.exit(0 if wait_for_device() else 1)
+
+    watcher = HotplugWatcher(lambda action, node: print(
+        f"[+] Connected: {node}" if action == "add" else f"[-] Disconnected: {node}"
+    ))
+    state = "present" if watcher.connected else "absent"
+    print(f"[*] Watching {hex(VENDOR_ID)}:{hex(PRODUCT_ID)} via {watcher.backend} (device {state})")
+    watcher.start()
+    try:
+        watcher.join()
+    except KeyboardInterrupt:
+        watcher.stop()
@@ -1,13 +1,12 @@
 #!/usr/bin/env python3
-import hid
 import os
 import sys
 import time
 
-# --- Constants ---
-VENDOR_ID = 0x340E
-PRODUCT_ID = 0x8002
-INTERFACE_NUM = 1
+from infinix_hid_session import HIDSession, NOT_CONNECTED
+from infinix_hotplug import HotplugWatcher
+from infinix_protocol import ZONE_MAPPING, command_byte
+from infinix_shadow_state import ShadowState
 
 # --- Dictionaries ---
 MODES = {
@@ -20,16 +19,6 @@ MODES = {
     6: "Wave",
 }
 
-# Mapping: Zone ID -> (Command Nibble, Offset Nibble)
-# derived from decompiled C# sources in 'Keyboard Zone Key.py'
-ZONE_MAPPING = {
-    0: (0x01, 0x00), # All / Global
-    1: (0x06, 0x00), # Left (Zone 1)
-    2: (0x06, 0x04), # Mid-Left (Zone 2) - Offset 4
-    3: (0x07, 0x00), # Mid-Right (Zone 3)
-    4: (0x07, 0x04)  # Right (Zone 4) - Offset 4
-}
-
 ZONES = {
     0: "All / Global",
     1: "Left (Zone 1)",
@@ -50,6 +39,11 @@ COLORS = {
 }
 
 # --- State Management ---
+# One handle for the whole menu session instead of enumerate+open per change
+session = HIDSession()
+# Last state the device accepted; unchanged settings are not resent
+state = ShadowState(session)
+
 current_settings = {
     "zone": 0,       # 0=All, 1-4=Specific
     "mode": 1,       # Effect Mode
@@ -60,74 +54,30 @@ current_settings = {
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def get_device_path():
-    devices = hid.enumerate(VENDOR_ID, PRODUCT_ID)
-    for d in devices:
-        if d['interface_number'] == INTERFACE_NUM:
-            return d['path']
-    return None
-
-def create_packet(zone_id, mode, r, g, b, brightness):
-    packet = [0] * 65
-    packet[0] = 0x06  # Report ID
-    packet[2] = 0x04  # Data Size
-    
-    # Payload
-    packet[7] = r
-    packet[8] = g
-    packet[9] = b
-    packet[10] = brightness
-
-    # Get Command and Offset from Mapping
-    # Default to Global if unknown
-    cmd_nibble, offset_nibble = ZONE_MAPPING.get(zone_id, (0x01, 0x00))
-
-    # --- Byte 1 Calculation ---
-    # Logic: (Command << 4) | (Offset | Mode)
-    # The Offset (0 or 4) likely acts as a sub-zone selector bit.
-    # The Mode (0-6) is the effect.
-    # We combine them using bitwise OR.
-    
-    combined_mode = (offset_nibble | mode)
-    packet[1] = ((cmd_nibble & 0xF) << 4) | (combined_mode & 0xF)
-
-    # Checksum: Sum of bytes 1 to 62, masked to 8 bits
-    packet[63] = sum(packet[1:63]) & 0xFF
-    return packet
-
 def apply_settings():
-    path = get_device_path()
-    if not path:
-        print("\n[!] Device not found. Check USB connection or Permissions.")
+    z = current_settings["zone"]
+    m = current_settings["mode"]
+    r, g, b = current_settings["color"]
+    bri = current_settings["brightness"]
+
+    # Construct and send (reuses the open handle, reconnects if needed)
+    state.set_zone(z, m, r, g, b, bri)
+    success, msg = state.commit()
+    if not success:
+        if msg == NOT_CONNECTED:
+            print("\n[!] Device not found. Check USB connection or Permissions.")
+        else:
+            print(f"\n[!] Error sending command: {msg}")
         input("Press Enter to continue...")
         return
 
-    try:
-        h = hid.device()
-        h.open_path(path)
-        
-        z = current_settings["zone"]
-        m = current_settings["mode"]
-        r, g, b = current_settings["color"]
-        bri = current_settings["brightness"]
-        
-        # Construct and send
-        packet = create_packet(z, m, r, g, b, bri)
-        h.write(packet)
-        h.close()
-        
-        z_name = ZONES.get(z, "Unknown")
-        m_name = MODES.get(m, "Unknown")
-            
-        print(f"\n[+] Applied to {z_name}: {m_name} | Bri: {bri}%")
-        # Debug info for the curious user
-        cmd, off = ZONE_MAPPING.get(z, (0,0))
-        byte1_debug = ((cmd & 0xF) << 4) | ((off | m) & 0xF)
-        print(f"    (Debug: Sent Byte[1] = {hex(byte1_debug)})")
-        
-    except Exception as e:
-        print(f"\n[!] Error sending command: {e}")
-        input("Press Enter to continue...")
+    z_name = ZONES.get(z, "Unknown")
+    m_name = MODES.get(m, "Unknown")
+
+    print(f"\n[+] Applied to {z_name}: {m_name} | Bri: {bri}%")
+    # Debug info for the curious user
+    cmd, off = ZONE_MAPPING[z]
+    print(f"    (Debug: Sent Byte[1] = {hex(command_byte(cmd, off | m))})")
 
 def hex_to_rgb(hex_str):
     hex_str = hex_str.lstrip('#')
@@ -188,6 +138,12 @@ def menu_brightness():
         pass
 
 def main():
+    # Replug/resume drops the cached handle right away instead of on the next failed write
+    try:
+        HotplugWatcher(lambda action, node: state.invalidate(), session=session).start()
+    except OSError:
+        pass
+
     while True:
         clear_screen()
         
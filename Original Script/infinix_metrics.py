@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Counters and latency histograms for the HID and EC write paths.
+
+Off by default: every instrumentation point is guarded by one module
+global check (`if metrics.ENABLED:`). Turn on with INFINIX_METRICS:
+
+    INFINIX_METRICS=1                      collect only (daemon "metrics" command)
+    INFINIX_METRICS=/var/lib/node_exporter/textfile/infinix.prom
+    INFINIX_METRICS=/tmp/infinix.json      dumped on exit, format by extension
+    INFINIX_METRICS_TRACE=1                also time every call into these scripts
+
+Hot-path updates take no lock: each thread increments its own shard
+(an array('d') registered once per thread) and readers sum the shards.
+Histogram buckets are fixed upper bounds in seconds.
+"""
+import atexit
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+METRICS_ENV = "INFINIX_METRICS"
+TRACE_ENV = "INFINIX_METRICS_TRACE"
+
+HID_BUCKETS = (50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3, 250e-3)
+EC_BUCKETS = (250e-6, 500e-6, 1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3, 250e-3)
+
+ENABLED = False
+_registry = []
+_register_lock = threading.Lock()
+
+
+class _Sharded:
+    """Per-thread array('d') shards; only registration takes a lock."""
+
+    def __init__(self, name, help_text, width, register=True):
+        self.name = name
+        self.help = help_text
+        self._width = width
+        self._local = threading.local()
+        self._shards = []
+        if register:
+            _registry.append(self)
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = array("d", bytes(8 * self._width))
+            with _register_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _total(self):
+        total = [0.0] * self._width
+        for shard in list(self._shards):
+            for i, v in enumerate(shard):
+                total[i] += v
+        return total
+
+    def reset(self):
+        for shard in list(self._shards):
+            for i in range(len(shard)):
+                shard[i] = 0.0
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text, 1)
+
+    def inc(self, n=1):
+        self._shard()[0] += n
+
+    @property
+    def value(self):
+        return self._total()[0]
+
+    def snapshot(self):
+        return {"value": self.value}
+
+
+class Histogram(_Sharded):
+    """Shard layout: one count per bucket, +Inf count, sum."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=HID_BUCKETS, register=True):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help_text, len(self.buckets) + 2, register)
+
+    def observe(self, seconds):
+        shard = self._shard()
+        shard[bisect_left(self.buckets, seconds)] += 1
+        shard[-1] += seconds
+
+    def snapshot(self):
+        total = self._total()
+        counts = total[:-1]
+        n = sum(counts)
+        return {
+            "count": int(n),
+            "sum": total[-1],
+            "mean": total[-1] / n if n else 0.0,
+            "buckets": {str(b): int(c) for b, c in zip(self.buckets + ("+Inf",), counts)},
+        }
+
+
+# --- Write path metrics ---
+ENUMERATE = Histogram("infinix_hid_enumerate_seconds", "Time to enumerate the controller")
+OPEN = Histogram("infinix_hid_open_seconds", "Time to open the controller handle")
+WRITE = Histogram("infinix_hid_write_seconds", "Time per 65-byte packet write")
+EC_TRANSACTION = Histogram("infinix_ec_transaction_seconds", "Time per EC RAM transaction", EC_BUCKETS)
+PACKETS = Counter("infinix_hid_packets_total", "Packets written successfully")
+WRITE_ERRORS = Counter("infinix_hid_write_errors_total", "Failed packet writes")
+OPEN_ERRORS = Counter("infinix_hid_open_errors_total", "Failed enumerate/open attempts")
+RECONNECTS = Counter("infinix_hid_reconnects_total", "Handles reopened after an invalidate")
+EC_WRITES = Counter("infinix_ec_writes_total", "EC RAM bytes written")
+EC_TIMEOUTS = Counter("infinix_ec_poll_timeouts_total", "EC trigger polls that timed out")
+
+# Per-function histograms filled by the tracing profiler
+TRACE = {}
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+# --- Tracing ---
+
+_SCRIPT_DIRS = tuple(os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), d))
+                     for d in (".", os.path.join("..", "Experimental Script")))
+_trace_local = threading.local()
+
+
+def _traced_file(filename, _cache={}):
+    hit = _cache.get(filename)
+    if hit is None:
+        hit = _cache[filename] = (os.path.isabs(filename) and filename != __file__
+                                  and os.path.realpath(filename).startswith(_SCRIPT_DIRS))
+    return hit
+
+
+def _profile(frame, event, arg):
+    if event != "call" and event != "return":
+        return
+    code = frame.f_code
+    if not _traced_file(code.co_filename):
+        return
+    try:
+        starts = _trace_local.starts
+    except AttributeError:
+        starts = _trace_local.starts = {}
+    if event == "call":
+        starts[id(frame)] = time.perf_counter()
+        return
+    start = starts.pop(id(frame), None)
+    if start is None:
+        return
+    name = f"{os.path.basename(code.co_filename)}:{code.co_qualname if hasattr(code, 'co_qualname') else code.co_name}"
+    hist = TRACE.get(name)
+    if hist is None:
+        with _register_lock:
+            hist = TRACE.get(name)
+            if hist is None:
+                hist = TRACE[name] = Histogram(name, "Traced call", register=False)
+    hist.observe(time.perf_counter() - start)
+
+
+def enable_tracing():
+    """Times every call into the repo's scripts (sys.setprofile, all threads)."""
+    threading.setprofile(_profile)
+    sys.setprofile(_profile)
+
+
+def disable_tracing():
+    threading.setprofile(None)
+    sys.setprofile(None)
+
+
+# --- Export ---
+
+def snapshot():
+    data = {m.name: m.snapshot() for m in _registry}
+    if TRACE:
+        data["trace"] = {name: h.snapshot() for name, h in sorted(TRACE.items())}
+    return data
+
+
+def _prom_histogram(lines, name, snap, labels=""):
+    cumulative = 0
+    sep = "," if labels else ""
+    for bound, count in snap["buckets"].items():
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {snap['sum']:.9g}")
+    lines.append(f"{name}_count{suffix} {snap['count']}")
+
+
+def prometheus_text():
+    lines = []
+    for m in _registry:
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        if m.kind == "counter":
+            lines.append(f"{m.name} {m.value:.9g}")
+        else:
+            _prom_histogram(lines, m.name, m.snapshot())
+    if TRACE:
+        lines.append("# HELP infinix_call_seconds Traced call duration")
+        lines.append("# TYPE infinix_call_seconds histogram")
+        for name, hist in sorted(TRACE.items()):
+            _prom_histogram(lines, "infinix_call_seconds", hist.snapshot(), f'function="{name}"')
+    return "\n".join(lines) + "\n"
+
+
+def export(path):
+    """Writes the Prometheus textfile (.prom) or JSON dump, atomically."""
+    if path.endswith(".json"):
+        import json
+        text = json.dumps(snapshot(), indent=2)
+    else:
+        text = prometheus_text()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    # node_exporter must never see a half-written file
+    os.replace(tmp, path)
+
+
+def start_exporter(path, interval=15.0):
+    """Background thread re-exporting every `interval` seconds (for daemons)."""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            try:
+                export(path)
+            except OSError:
+                pass
+
+    threading.Thread(target=loop, name="infinix-metrics", daemon=True).start()
+    return stop
+
+
+def _from_env():
+    value = os.environ.get(METRICS_ENV)
+    if not value or value == "0":
+        return
+    enable()
+    if os.environ.get(TRACE_ENV):
+        enable_tracing()
+    if value != "1":
+        atexit.register(export, value)
+
+
+_from_env()
+
+
+# --- Overhead benchmark ---
+
+def benchmark(number=100000):
+    """Cost of the instrumented write path, disabled vs enabled vs traced (simulated device)."""
+    from infinix_hid_session import HIDSession
+    from infinix_protocol import PacketCodec
+    from infinix_simulator import SimulatedBackend
+
+    packet = bytes(PacketCodec().keyboard(1, 255, 100, 0, 100))
+    session = HIDSession(backend=SimulatedBackend())
+    session.open()
+    was_enabled = ENABLED
+    print(f"{'mode':<10}{'ns/write':>10}")
+    for mode in ("disabled", "enabled", "traced"):
+        disable() if mode == "disabled" else enable()
+        if mode == "traced":
+            enable_tracing()
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(number):
+                session.write(packet)
+            best = min(best, time.perf_counter() - start)
+        disable_tracing()
+        print(f"{mode:<10}{best / number * 1e9:>10.0f}")
+    session.close()
+    (enable if was_enabled else disable)()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    else:
+        print("usage: infinix_metrics.py bench [N]")
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Performance key listener.
+
+With the hwdb entry from the README the GT Book performance keys arrive
+as F13 (Office), F14 (Balance) and SLEEP (Gaming) on the controller's
+evdev node. This listener epolls that node and sends the 0x40/0x41/0x42
+packet over an already-open session, so a key press costs one write
+instead of a process spawn.
+
+--grab takes the device exclusively (EVIOCGRAB) so SLEEP no longer
+suspends the machine, and replays every other event through a uinput
+clone so the remaining keys keep working.
+"""
+import argparse
+import fcntl
+import os
+import select
+import struct
+import sys
+import time
+
+from infinix_hid_session import default_session, VENDOR_ID, PRODUCT_ID
+from infinix_shadow_state import ShadowState, LIGHT, PERFORMANCE
+
+# --- evdev ---
+INPUT_EVENT = struct.Struct("llHHi")  # timeval, type, code, value
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_MSC = 0x04
+MSC_SCAN = 0x04
+KEY_MAX = 0x2FF
+
+KEY_SLEEP = 142
+KEY_F13 = 183
+KEY_F14 = 184
+
+# Key -> (name, performance byte, EC mode for register 0x40)
+PERF_KEYS = {
+    KEY_F13: ("OFFICE", 0x40, 0x00),
+    KEY_F14: ("BALANCE", 0x41, 0x01),
+    KEY_SLEEP: ("GAMING", 0x42, 0x02),
+}
+
+# Flash color per mode for --feedback
+FEEDBACK_COLORS = {
+    "OFFICE": (0, 120, 255),
+    "BALANCE": (0, 255, 0),
+    "GAMING": (255, 0, 0),
+}
+FEEDBACK_SECONDS = 0.4
+
+
+def _IOC(direction, type_, nr, size):
+    return (direction << 30) | (size << 16) | (ord(type_) << 8) | nr
+
+
+EVIOCGRAB = _IOC(1, "E", 0x90, 4)
+EVIOCSCLOCKID = _IOC(1, "E", 0xA0, 4)
+
+
+def EVIOCGBIT(ev, length):
+    return _IOC(2, "E", 0x20 + ev, length)
+
+
+UI_SET_EVBIT = _IOC(1, "U", 100, 4)
+UI_SET_KEYBIT = _IOC(1, "U", 101, 4)
+UI_SET_MSCBIT = _IOC(1, "U", 104, 4)
+UI_DEV_CREATE = _IOC(0, "U", 1, 0)
+UI_DEV_DESTROY = _IOC(0, "U", 2, 0)
+UINPUT_USER_DEV = struct.Struct("80sHHHHi256i")
+
+CLOCK_MONOTONIC = 1
+
+
+def _read_id(event_name, field):
+    try:
+        with open(f"/sys/class/input/{event_name}/device/id/{field}") as f:
+            return int(f.read(), 16)
+    except (OSError, ValueError):
+        return None
+
+
+def _key_bits(fd):
+    buf = bytearray((KEY_MAX + 8) // 8)
+    fcntl.ioctl(fd, EVIOCGBIT(EV_KEY, len(buf)), buf)
+    return buf
+
+
+def find_event_nodes(input_dir="/dev/input"):
+    """Event nodes of 340e:8002 that can emit at least one performance key."""
+    nodes = []
+    for name in sorted(os.listdir(input_dir)):
+        if not name.startswith("event"):
+            continue
+        if (_read_id(name, "vendor"), _read_id(name, "product")) != (VENDOR_ID, PRODUCT_ID):
+            continue
+        path = os.path.join(input_dir, name)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            bits = _key_bits(fd)
+        finally:
+            os.close(fd)
+        if any(bits[k // 8] & (1 << (k % 8)) for k in PERF_KEYS):
+            nodes.append(path)
+    return nodes
+
+
+class UinputClone:
+    """Virtual keyboard mirroring a grabbed device's keys."""
+
+    def __init__(self, src_fd, name=b"Infinix GT Book keys (passthrough)"):
+        self.fd = os.open("/dev/uinput", os.O_WRONLY | os.O_NONBLOCK)
+        bits = _key_bits(src_fd)
+        for ev in (EV_SYN, EV_KEY, EV_MSC):
+            fcntl.ioctl(self.fd, UI_SET_EVBIT, ev)
+        fcntl.ioctl(self.fd, UI_SET_MSCBIT, MSC_SCAN)
+        for code in range(KEY_MAX + 1):
+            if bits[code // 8] & (1 << (code % 8)):
+                fcntl.ioctl(self.fd, UI_SET_KEYBIT, code)
+        os.write(self.fd, UINPUT_USER_DEV.pack(name, 0x03, VENDOR_ID, PRODUCT_ID, 1, 0, *([0] * 256)))
+        fcntl.ioctl(self.fd, UI_DEV_CREATE)
+
+    def forward(self, raw):
+        os.write(self.fd, raw)
+
+    def close(self):
+        fcntl.ioctl(self.fd, UI_DEV_DESTROY)
+        os.close(self.fd)
+
+
+class LatencyStats:
+    __slots__ = ("count", "total", "worst", "best")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.best = float("inf")
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.worst = max(self.worst, seconds)
+        self.best = min(self.best, seconds)
+
+    def summary(self):
+        if not self.count:
+            return "no key presses"
+        return (f"{self.count} presses, key-to-packet min {self.best * 1e6:.0f} us / "
+                f"mean {self.total / self.count * 1e6:.0f} us / max {self.worst * 1e6:.0f} us")
+
+
+class PerfKeyListener:
+    def __init__(self, nodes, session=None, grab=False, feedback=False, ec_port=None, verbose=True,
+                 feedback_light=None):
+        self.session = session or default_session()
+        self.state = ShadowState(self.session)
+        self.feedback = feedback
+        # (mode, r, g, b, brightness) to restore after a flash when the current light is unknown
+        self.feedback_light = feedback_light
+        self.verbose = verbose
+        self.stats = LatencyStats()
+        self.ec = None
+        if ec_port:
+            self.ec = self._open_ec(ec_port)
+        self.epoll = select.epoll()
+        self.devices = {}  # fd -> (path, UinputClone or None)
+        for path in nodes:
+            fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+            # Timestamps on CLOCK_MONOTONIC so they compare with time.monotonic()
+            fcntl.ioctl(fd, EVIOCSCLOCKID, struct.pack("i", CLOCK_MONOTONIC))
+            clone = None
+            if grab:
+                clone = UinputClone(fd)
+                fcntl.ioctl(fd, EVIOCGRAB, 1)
+            self.devices[fd] = (path, clone)
+            self.epoll.register(fd, select.EPOLLIN)
+        self._restore_at = None
+        self._restore_light = None
+        # Open the HID handle now, not on the first key press
+        try:
+            self.session.open()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _open_ec(port_path):
+        # EC helpers live with maxfan.py in the experimental folder
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Experimental Script"))
+        import maxfan
+        return maxfan, maxfan.open_port(port_path)
+
+    def on_key(self, code, event_time):
+        name, mode_byte, ec_mode = PERF_KEYS[code]
+        self.state.set_performance(mode_byte)
+        # Always send: the mode may have been changed by another tool
+        self.state.shadow.pop(PERFORMANCE, None)
+        success, msg = self.state.commit()
+        latency = time.monotonic() - event_time
+        if success:
+            self.stats.add(latency)
+        ec_error = None
+        if self.ec is not None:
+            maxfan, port = self.ec
+            # Reported here: an OSError escaping to run() would drop the key device as unplugged
+            try:
+                maxfan.ec_ram_transaction(port, [(maxfan.PERF_MODE_ADDR, ec_mode)])
+            except OSError as e:
+                ec_error = e
+        if self.verbose:
+            status = "OK" if success else f"FAILED ({msg})"
+            print(f"[*] {name}: {status}, key-to-packet {latency * 1e6:.0f} us")
+        if ec_error is not None:
+            print(f"[!] {name}: EC write failed: {ec_error}")
+        if self.feedback and success:
+            self._flash(name)
+
+    def _flash(self, name):
+        if self._restore_at is None:
+            # The previous light is unknown unless it was set through this session or
+            # given with --feedback-light; without it there is nothing to restore, so no flash
+            self._restore_light = self.state.desired.get(LIGHT) or self.feedback_light
+            if self._restore_light is None:
+                return
+        r, g, b = FEEDBACK_COLORS[name]
+        self.state.set_light(1, r, g, b, 100)
+        self.state.commit()
+        self._restore_at = time.monotonic() + FEEDBACK_SECONDS
+
+    def _restore(self):
+        self._restore_at = None
+        self.state.set_light(*self._restore_light)
+        self.state.commit()
+
+    def _read(self, fd):
+        path, clone = self.devices[fd]
+        data = os.read(fd, INPUT_EVENT.size * 64)
+        for off in range(0, len(data), INPUT_EVENT.size):
+            sec, usec, type_, code, value = INPUT_EVENT.unpack_from(data, off)
+            if type_ == EV_KEY and code in PERF_KEYS:
+                if value == 1:
+                    self.on_key(code, sec + usec / 1e6)
+                continue  # swallowed, never forwarded
+            if clone is not None:
+                clone.forward(data[off:off + INPUT_EVENT.size])
+
+    def run(self):
+        while self.devices:
+            timeout = -1
+            if self._restore_at is not None:
+                timeout = max(0.0, self._restore_at - time.monotonic())
+            for fd, _ in self.epoll.poll(timeout):
+                try:
+                    self._read(fd)
+                except BlockingIOError:
+                    pass
+                except OSError:
+                    # Device unplugged
+                    self._drop(fd)
+            if self._restore_at is not None and time.monotonic() >= self._restore_at:
+                self._restore()
+
+    def _drop(self, fd):
+        path, clone = self.devices.pop(fd)
+        self.epoll.unregister(fd)
+        os.close(fd)
+        if clone is not None:
+            clone.close()
+        print(f"[-] Lost {path}")
+
+    def close(self):
+        for fd in list(self.devices):
+            self._drop(fd)
+        self.epoll.close()
+        if self.ec is not None:
+            self.ec[1].close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Performance key listener")
+    parser.add_argument("--grab", action="store_true", help="Grab the device (stops SLEEP from suspending); needs /dev/uinput")
+    parser.add_argument("--feedback", action="store_true", help="Flash the mode color on the keyboard, then restore the light")
+    parser.add_argument("--feedback-light", type=int, nargs=4, metavar=("R", "G", "B", "BRI"),
+                        help="Static light to restore after a flash; without it --feedback does nothing "
+                             "until a light has been set through this listener")
+    parser.add_argument("--ec", nargs="?", const="/dev/port", default=None, metavar="PORT",
+                        help="Also write EC register 0x40 (needs root)")
+    parser.add_argument("--quiet", action="store_true", help="Only print the latency summary on exit")
+    args = parser.parse_args()
+    feedback_light = None
+    if args.feedback_light:
+        if not all(0 <= v <= 255 for v in args.feedback_light):
+            parser.error("--feedback-light values must be 0-255")
+        feedback_light = (1, *args.feedback_light)
+
+    nodes = find_event_nodes()
+    if not nodes:
+        print("[-] No evdev node with F13/F14/SLEEP for 340e:8002. Is the hwdb entry from the README installed?")
+        sys.exit(1)
+    try:
+        listener = PerfKeyListener(nodes, grab=args.grab, feedback=args.feedback,
+                                   ec_port=args.ec, verbose=not args.quiet, feedback_light=feedback_light)
+    except PermissionError as e:
+        print(f"[-] Permission denied: {e.filename or e}. Add yourself to the 'input' group or use sudo.")
+        sys.exit(1)
+
+    print(f"[*] Listening on {', '.join(nodes)} (F13=Office, F14=Balance, SLEEP=Gaming)")
+    try:
+        listener.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"[+] {listener.stats.summary()}")
+        listener.close()
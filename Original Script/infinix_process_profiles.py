@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Automatic profile switching: apply GAMING (and a lighting profile) while
+a listed executable runs, restore OFFICE when the last one exits.
+
+Process start/exit comes from the netlink proc connector (needs root /
+CAP_NET_ADMIN). Without it, /proc is scanned incrementally: the PID list
+is diffed each interval, new PIDs are inspected and user-space PIDs seen
+before get their comm re-read so an exec() into a listed game is caught.
+
+Config (JSON):
+    {
+      "rules": [
+        {"exe": ["cs2", "steam_app"], "performance": "gaming",
+         "light": {"mode": 1, "rgb": [255, 0, 0], "brightness": 100}}
+      ],
+      "idle": {"performance": "office"},
+      "scan_interval": 2.0
+    }
+Earlier rules win when several match.
+"""
+import argparse
+import json
+import os
+import select
+import socket
+import struct
+import sys
+import time
+
+from infinix_hid_session import default_session
+from infinix_protocol import PERFORMANCE_MODES
+from infinix_shadow_state import ShadowState
+
+DEFAULT_CONFIG = {
+    "rules": [],
+    "idle": {"performance": "office"},
+    "scan_interval": 2.0,
+}
+
+# --- Netlink proc connector ---
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+PROC_CN_MCAST_LISTEN = 1
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+NLMSGHDR = struct.Struct("=IHHII")
+CN_MSG = struct.Struct("=IIIIHH")
+PROC_EVENT_HDR = struct.Struct("=IIQ")  # what, cpu, timestamp_ns
+PROC_EVENT_IDS = struct.Struct("=II")   # pid, tgid
+TASK_COMM_LEN = 16
+
+
+def _check_byte(name, value, limit=0xFF):
+    if type(value) is not int or not 0 <= value <= limit:
+        raise ValueError(f"{name} must be an integer 0-{limit}, got {value!r}")
+
+
+def validate_profile(name, profile):
+    """Raises ValueError for a profile that would fail inside settle()."""
+    if not isinstance(profile, dict):
+        raise ValueError(f"{name} must be a JSON object")
+    perf = profile.get("performance")
+    if perf is not None and perf not in PERFORMANCE_MODES:
+        raise ValueError(f"{name}: invalid mode {perf!r}. Available modes: {list(PERFORMANCE_MODES)}")
+    light = profile.get("light")
+    if light:
+        if not isinstance(light, dict):
+            raise ValueError(f"{name}: light must be an object")
+        rgb = light.get("rgb")
+        if not isinstance(rgb, list) or len(rgb) != 3:
+            raise ValueError(f"{name}: light rgb must be [r, g, b], got {rgb!r}")
+        for c in rgb:
+            _check_byte(f"{name}: light rgb", c)
+        _check_byte(f"{name}: light mode", light.get("mode", 1), 0xF)
+        _check_byte(f"{name}: light brightness", light.get("brightness", 100))
+
+
+def load_config(path):
+    """Reads and validates a rules file. Raises ValueError on bad content."""
+    config = dict(DEFAULT_CONFIG)
+    with open(path) as f:
+        config.update(json.load(f))
+    if not isinstance(config["rules"], list):
+        raise ValueError("rules must be a list")
+    for i, rule in enumerate(config["rules"]):
+        validate_profile(f"rule {i + 1}", rule)
+        exe = rule.get("exe")
+        if not isinstance(exe, list) or not exe or not all(isinstance(e, str) for e in exe):
+            raise ValueError(f"rule {i + 1}: exe must be a list of names")
+    validate_profile("idle", config["idle"])
+    interval = config["scan_interval"]
+    if isinstance(interval, bool) or not isinstance(interval, (int, float)) or interval <= 0:
+        raise ValueError(f"scan_interval must be a positive number, got {interval!r}")
+    return config
+
+
+def read_comm(pid):
+    try:
+        with open(f"/proc/{pid}/comm", "rb") as f:
+            return f.read().rstrip(b"\n").decode(errors="replace")
+    except OSError:
+        return None
+
+
+class RuleIndex:
+    """Executable name -> rule number, built once so each event is one dict lookup."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.by_name = {}
+        for i, rule in enumerate(rules):
+            for exe in rule["exe"]:
+                name = os.path.basename(exe)
+                # comm is truncated to 15 chars; index both forms
+                self.by_name.setdefault(name, i)
+                self.by_name.setdefault(name[:TASK_COMM_LEN - 1], i)
+
+    def match(self, comm):
+        return self.by_name.get(comm)
+
+
+class ProfileSwitcher:
+    def __init__(self, config, state=None, verbose=True):
+        self.config = config
+        self.index = RuleIndex(config["rules"])
+        self.state = state or ShadowState(default_session())
+        self.verbose = verbose
+        self.active = {}   # pid -> rule number
+        self.current = None  # rule number in effect, None = idle
+
+    def on_exec(self, pid):
+        comm = read_comm(pid)
+        rule = self.index.match(comm) if comm else None
+        if rule is not None:
+            self.active[pid] = rule
+        else:
+            # exec() into something unlisted
+            self.active.pop(pid, None)
+
+    def on_exit(self, pid):
+        self.active.pop(pid, None)
+
+    def settle(self):
+        """Applies the winning profile if it changed."""
+        wanted = min(self.active.values()) if self.active else None
+        if wanted == self.current:
+            return
+        profile = self.config["idle"] if wanted is None else self.config["rules"][wanted]
+        if "performance" in profile:
+            self.state.set_performance(PERFORMANCE_MODES[profile["performance"]])
+        light = profile.get("light")
+        if light:
+            r, g, b = light["rgb"]
+            self.state.set_light(light.get("mode", 1), r, g, b, light.get("brightness", 100))
+        success, msg = self.state.commit()
+        if not success:
+            # Keep `current` stale so the next event retries
+            if self.verbose:
+                print(f"[!] Failed to apply profile: {msg}")
+            return
+        self.current = wanted
+        if self.verbose:
+            label = "idle" if wanted is None else ", ".join(self.config["rules"][wanted]["exe"])
+            print(f"[*] Profile: {label} ({profile.get('performance', '-')})")
+
+
+class ProcConnector:
+    """Exec/exit events from the kernel proc connector."""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        self.sock.bind((os.getpid(), CN_IDX_PROC))
+        op = struct.pack("=I", PROC_CN_MCAST_LISTEN)
+        cn = CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(op), 0) + op
+        self.sock.send(NLMSGHDR.pack(NLMSGHDR.size + len(cn), NLMSG_DONE, 0, 0, os.getpid()) + cn)
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def events(self):
+        data = self.sock.recv(4096)
+        offset = 0
+        while offset + NLMSGHDR.size <= len(data):
+            length = NLMSGHDR.unpack_from(data, offset)[0]
+            body = offset + NLMSGHDR.size + CN_MSG.size
+            what = PROC_EVENT_HDR.unpack_from(data, body)[0]
+            pid, tgid = PROC_EVENT_IDS.unpack_from(data, body + PROC_EVENT_HDR.size)
+            # Thread exits/execs are not interesting, only whole processes
+            if pid == tgid:
+                if what == PROC_EVENT_EXEC:
+                    yield "exec", pid
+                elif what == PROC_EVENT_EXIT:
+                    yield "exit", pid
+            offset += max(length, NLMSGHDR.size)
+
+    def close(self):
+        self.sock.close()
+
+
+class PidDiffScanner:
+    """
+    Fallback: diff the PID list of /proc against the previous scan.
+
+    exec() keeps the PID, so user-space PIDs seen before have their comm
+    re-read each scan and a change is reported as another exec (a launcher
+    that turns into the game). Kernel threads never exec and are skipped
+    after the first look.
+    """
+
+    def __init__(self):
+        self.known = {pid: self._first_look(pid) for pid in self._pids()}  # pid -> comm, None = kernel thread
+
+    @staticmethod
+    def _pids():
+        return {int(name) for name in os.listdir("/proc") if name.isdigit()}
+
+    @staticmethod
+    def _first_look(pid):
+        """comm from /proc/<pid>/stat, None for kernel threads (kthreadd and its children)."""
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            return ""
+        head, _, tail = stat.rpartition(b")")
+        fields = tail.split()
+        if pid == 2 or (len(fields) > 1 and fields[1] == b"2"):
+            return None
+        return head.partition(b"(")[2].decode(errors="replace")
+
+    def events(self):
+        pids = self._pids()
+        for pid in self.known.keys() - pids:
+            del self.known[pid]
+            yield "exit", pid
+        for pid in pids:
+            if pid not in self.known:
+                self.known[pid] = self._first_look(pid)
+                yield "exec", pid
+            elif self.known[pid] is not None:
+                comm = read_comm(pid)
+                if comm is not None and comm != self.known[pid]:
+                    self.known[pid] = comm
+                    yield "exec", pid
+
+    def close(self):
+        pass
+
+
+def run(config, verbose=True, force_scan=False):
+    switcher = ProfileSwitcher(config, verbose=verbose)
+    source = None
+    if not force_scan:
+        try:
+            source = ProcConnector()
+        except (OSError, AttributeError):
+            source = None
+    if source is None:
+        source = PidDiffScanner()
+    if verbose:
+        mode = "proc connector" if isinstance(source, ProcConnector) else f"/proc scan every {config['scan_interval']}s"
+        print(f"[*] Watching {len(switcher.index.by_name)} executable names via {mode}")
+
+    # Processes that were already running
+    for name in os.listdir("/proc"):
+        if name.isdigit():
+            switcher.on_exec(int(name))
+    switcher.settle()
+
+    try:
+        while True:
+            if isinstance(source, ProcConnector):
+                select.select([source], [], [])
+            else:
+                time.sleep(config["scan_interval"])
+            for kind, pid in source.events():
+                if kind == "exec":
+                    switcher.on_exec(pid)
+                else:
+                    switcher.on_exit(pid)
+            switcher.settle()
+    finally:
+        source.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Automatic profile switching")
+    parser.add_argument("config", help="JSON rules file")
+    parser.add_argument("--scan", action="store_true", help="Force the /proc scanner even if the proc connector works")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"[-] {args.config}: {e}")
+        sys.exit(1)
+
+    try:
+        run(config, verbose=not args.quiet, force_scan=args.scan)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Packet codec for the GT Book controller (TxBuf layout).
+
+Byte 0     : Report ID (0x06)
+Byte 1     : (Command << 4) | Param/Mode
+Byte 2     : Data size (0x04 for R,G,B,L; 0 for performance)
+Byte 7-10  : R, G, B, Brightness
+Byte 63    : Checksum = sum(bytes 1..62) & 0xFF
+
+Every command keeps one preallocated 65-byte template. Encoding patches
+only the bytes that changed and adjusts the checksum by the difference,
+so a repeated color change costs a handful of byte stores.
+"""
+import itertools
+import sys
+import timeit
+
+REPORT_ID = 0x06
+PACKET_SIZE = 65
+DATA_SIZE_INDEX = 2
+COLOR_INDEX = 7       # R, G, B, L at 7..10
+CHECKSUM_INDEX = 63
+
+# --- Commands (BydCentral.Core.Models.TxBuf.COMMAND) ---
+CMD_KEYBOARD = 0x01     # KeyBoard_Light (all zones)
+CMD_PERFORMANCE = 0x04  # Office / Balance / Gaming, also drives back zone LEDs
+CMD_KEYBOARD_12 = 0x06  # KeyBoard_Light12 (Zone 1/2)
+CMD_KEYBOARD_34 = 0x07  # KeyBoard_Light34 (Zone 3/4)
+
+COLOR_DATA_SIZE = 0x04
+
+# Mapping: Zone ID -> (Command Nibble, Offset Nibble)
+# The offset (0 or 4) selects the sub-zone within a 12/34 pair.
+ZONE_MAPPING = {
+    0: (CMD_KEYBOARD, 0x00),     # All / Global
+    1: (CMD_KEYBOARD_12, 0x00),  # Left (Zone 1)
+    2: (CMD_KEYBOARD_12, 0x04),  # Mid-Left (Zone 2)
+    3: (CMD_KEYBOARD_34, 0x00),  # Mid-Right (Zone 3)
+    4: (CMD_KEYBOARD_34, 0x04),  # Right (Zone 4)
+}
+
+# Static-color param per zone (BydContral.Page2.cs): Always On (1) for the
+# global light, Always1/Always2 (0, offset from ZONE_MAPPING) for zones.
+# Note: 0x01 was also seen to work for Zone 1; the C# source says 0x00.
+ZONE_STATIC_PARAM = {0: 0x01, 1: 0x00, 2: 0x00, 3: 0x00, 4: 0x00}
+
+# Byte 1 of the performance / back zone packet
+PERFORMANCE_MODES = {
+    "office": 0x40,
+    "balance": 0x41,
+    "gaming": 0x42,
+}
+
+
+def checksum(packet):
+    """Reference checksum over a full packet."""
+    return sum(packet[1:CHECKSUM_INDEX]) & 0xFF
+
+
+def command_byte(cmd, param):
+    return ((cmd & 0xF) << 4) | (param & 0xF)
+
+
+class PacketTemplate:
+    """One preallocated packet whose checksum is kept up to date incrementally."""
+
+    __slots__ = ("buf",)
+
+    def __init__(self, byte1, data_size):
+        buf = bytearray(PACKET_SIZE)
+        buf[0] = REPORT_ID
+        buf[1] = byte1
+        buf[DATA_SIZE_INDEX] = data_size
+        buf[CHECKSUM_INDEX] = (byte1 + data_size) & 0xFF
+        self.buf = buf
+
+    def set(self, index, value):
+        buf = self.buf
+        old = buf[index]
+        if old != value:
+            buf[index] = value
+            buf[CHECKSUM_INDEX] = (buf[CHECKSUM_INDEX] + value - old) & 0xFF
+
+    def set_color(self, r, g, b, brightness):
+        buf = self.buf
+        if buf[7] == r and buf[8] == g and buf[9] == b and buf[10] == brightness:
+            return
+        # Validate all four before touching the buffer so the checksum never goes stale
+        if (r | g | b | brightness) & ~0xFF:
+            raise ValueError(f"color/brightness out of range 0-255: {(r, g, b, brightness)}")
+        delta = (r - buf[7]) + (g - buf[8]) + (b - buf[9]) + (brightness - buf[10])
+        buf[7] = r
+        buf[8] = g
+        buf[9] = b
+        buf[10] = brightness
+        buf[CHECKSUM_INDEX] = (buf[CHECKSUM_INDEX] + delta) & 0xFF
+
+
+class PacketCodec:
+    """
+    Encodes controller packets into reused templates.
+
+    The returned bytearray is the template itself: it stays valid until the
+    next encode of the same command byte. Copy it (bytes(pkt)) if it has to
+    outlive that. Not thread-safe; give each writer thread its own codec.
+    """
+
+    def __init__(self):
+        self._templates = {}
+
+    def template(self, cmd, param):
+        byte1 = command_byte(cmd, param)
+        tpl = self._templates.get(byte1)
+        if tpl is None:
+            data_size = 0 if cmd == CMD_PERFORMANCE else COLOR_DATA_SIZE
+            tpl = self._templates[byte1] = PacketTemplate(byte1, data_size)
+        return tpl
+
+    def encode(self, cmd, param, r=0, g=0, b=0, brightness=0):
+        tpl = self.template(cmd, param)
+        tpl.set_color(r, g, b, brightness)
+        return tpl.buf
+
+    def keyboard(self, mode, r, g, b, brightness):
+        """Global keyboard light (cmd 0x1x)."""
+        return self.encode(CMD_KEYBOARD, mode, r, g, b, brightness)
+
+    def zone(self, zone_id, mode, r, g, b, brightness):
+        """Zone 0-4 via ZONE_MAPPING; unknown zones fall back to global."""
+        cmd, offset = ZONE_MAPPING.get(zone_id, ZONE_MAPPING[0])
+        return self.encode(cmd, offset | mode, r, g, b, brightness)
+
+    def performance(self, mode_byte):
+        """Performance / back zone packet; mode_byte is the full 0x40-0x42 value."""
+        return self.encode(mode_byte >> 4, mode_byte & 0xF)
+
+    def encode_batch(self, frames, out=None):
+        """
+        Encodes (cmd, param, r, g, b, brightness) frames back to back into one
+        contiguous buffer (reused when `out` is large enough). Frame i lives at
+        out[i * PACKET_SIZE:(i + 1) * PACKET_SIZE].
+        """
+        if not isinstance(frames, (list, tuple)):
+            frames = list(frames)
+        size = len(frames) * PACKET_SIZE
+        if out is None or len(out) < size:
+            out = bytearray(size)
+        offset = 0
+        for cmd, param, r, g, b, brightness in frames:
+            out[offset:offset + PACKET_SIZE] = self.encode(cmd, param, r, g, b, brightness)
+            offset += PACKET_SIZE
+        return out
+
+
+# --- Micro-benchmarks ---
+
+def _legacy_packet(cmd, mode, r, g, b, brightness):
+    # Builder as previously duplicated across the scripts
+    packet = [0] * 65
+    packet[0] = 0x06
+    packet[1] = ((cmd & 0xF) << 4) | (mode & 0xF)
+    packet[2] = 0x04
+    packet[7] = r
+    packet[8] = g
+    packet[9] = b
+    packet[10] = brightness
+    packet[63] = sum(packet[1:63]) & 0xFF
+    return packet
+
+
+def benchmark(number=200000):
+    codec = PacketCodec()
+    zones = [ZONE_MAPPING[z] for z in (1, 2, 3, 4)]
+    frames = [(cmd, off, 255, 100, 0, 100) for cmd, off in zones]
+    out = bytearray(len(frames) * PACKET_SIZE)
+    reds = itertools.cycle(range(256))
+
+    # Sanity: both builders must agree byte for byte
+    for i in range(256):
+        c = (i, 255 - i, i // 2, i % 101)
+        if bytes(codec.encode(CMD_KEYBOARD, 1, *c)) != bytes(_legacy_packet(CMD_KEYBOARD, 1, *c)):
+            raise AssertionError("codec output differs from legacy builder")
+
+    cases = [
+        ("legacy single", lambda: _legacy_packet(CMD_KEYBOARD, 1, 255, 100, 0, 100)),
+        ("codec single (same)", lambda: codec.keyboard(1, 255, 100, 0, 100)),
+        ("codec single (changed)", lambda: codec.keyboard(1, next(reds), 100, 0, 100)),
+        ("legacy 4 zones", lambda: [_legacy_packet(cmd, off, 255, 100, 0, 100) for cmd, off in zones]),
+        ("codec batch 4 zones", lambda: codec.encode_batch(frames, out)),
+    ]
+    print(f"{'case':<26}{'ns/op':>10}")
+    for name, fn in cases:
+        t = min(timeit.repeat(fn, number=number, repeat=3))
+        print(f"{name:<26}{t / number * 1e9:>10.0f}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+from infinix_hid_session import default_session
+from infinix_protocol import PacketCodec, ZONE_MAPPING
+
+# Registers in the order they are written on commit. The global light goes
+# first because it repaints every zone on the controller.
+LIGHT = "light"
+ZONE_KEYS = ("zone1", "zone2", "zone3", "zone4")
+PERFORMANCE = "performance"
+REGISTERS = (LIGHT,) + ZONE_KEYS + (PERFORMANCE,)
+
+
+def _check_light(mode, r, g, b, brightness):
+    if not 0 <= mode <= 0xF:
+        raise ValueError(f"mode out of range 0-15: {mode}")
+    for value in (r, g, b, brightness):
+        if not 0 <= value <= 0xFF:
+            raise ValueError(f"color/brightness out of range 0-255: {(r, g, b, brightness)}")
+
+
+class ShadowState:
+    """
+    Desired vs last-acknowledged controller state.
+
+    Setters only record the desired value. commit() diffs it against the
+    shadow copy of what the device last accepted and sends just the packets
+    that differ, all in one open session. After resume or replug call
+    invalidate() (or commit(force=True)) since the device state is unknown.
+    """
+
+    def __init__(self, session=None):
+        self.session = session or default_session()
+        self.codec = PacketCodec()
+        self.desired = {}
+        self.shadow = {}
+        self.last_sent = 0
+
+    def set_light(self, mode, r, g, b, brightness):
+        """Global light; replaces any per-zone colors. Raises ValueError (nothing changed) on bad values."""
+        _check_light(mode, r, g, b, brightness)
+        self.desired[LIGHT] = (mode, r, g, b, brightness)
+        for zone_key in ZONE_KEYS:
+            self.desired.pop(zone_key, None)
+
+    def set_zone(self, zone_id, mode, r, g, b, brightness):
+        """Zone 1-4; zone 0 is the global light."""
+        if zone_id == 0:
+            self.set_light(mode, r, g, b, brightness)
+        elif zone_id in ZONE_MAPPING:
+            _check_light(mode, r, g, b, brightness)
+            self.desired[ZONE_KEYS[zone_id - 1]] = (mode, r, g, b, brightness)
+        else:
+            raise ValueError(f"Invalid zone {zone_id}")
+
+    def set_performance(self, mode_byte):
+        if not 0 <= mode_byte <= 0xFF:
+            raise ValueError(f"performance byte out of range: {mode_byte}")
+        self.desired[PERFORMANCE] = mode_byte
+
+    def invalidate(self):
+        self.shadow = {}
+
+    def pending(self, force=False):
+        """Registers that commit() would write, in write order."""
+        shadow = {} if force else self.shadow
+        return [k for k in REGISTERS if k in self.desired and shadow.get(k) != self.desired[k]]
+
+    def packet(self, key):
+        value = self.desired[key]
+        if key == PERFORMANCE:
+            return self.codec.performance(value)
+        if key == LIGHT:
+            return self.codec.keyboard(*value)
+        return self.codec.zone(ZONE_KEYS.index(key) + 1, *value)
+
+    def commit(self, force=False):
+        """Sends the minimal packet set. Returns (success, message)."""
+        keys = self.pending(force)
+        self.last_sent = 0
+        if not keys:
+            return True, "Up to date"
+        try:
+            packets = [(key, bytes(self.packet(key))) for key in keys]
+        except (ValueError, TypeError) as e:
+            # Never leave an unencodable value behind to fail every later commit
+            for key in keys:
+                try:
+                    self.packet(key)
+                except (ValueError, TypeError):
+                    self.desired.pop(key, None)
+            return False, str(e)
+        try:
+            with self.session.transaction() as tx:
+                for key, packet in packets:
+                    tx.write(packet)
+                    self.last_sent += 1
+                    self.shadow[key] = self.desired[key]
+                    if key == LIGHT:
+                        # Global light overwrote whatever the zones showed
+                        for zone_key in ZONE_KEYS:
+                            self.shadow.pop(zone_key, None)
+        except IOError as e:
+            self.invalidate()
+            return False, str(e)
+        return True, "Success"
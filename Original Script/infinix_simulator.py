@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Simulated GT Book controller and EC, for running and benchmarking the
+scripts without the 340e:8002 device or /dev/port.
+
+SimulatedBackend has hidapi's enumerate()/device() interface, so it
+plugs into HIDSession(backend=...) or every script via
+INFINIX_HID_BACKEND=sim. Each packet is decoded and checked (report ID,
+command/mode nibbles, data size, checksum). Bad packets are recorded in
+`errors` and fail the write. SimulatedEC has ECPort's interface
+(write_index/read_index/ops/close) and executes the EC RAM protocol from
+maxfan.py, including the busy trigger register that wait_ec_ready()
+polls.
+
+Latency and failures are drawn from a seeded RNG, so runs repeat.
+
+    python infinix_simulator.py bench [--save base.json] [--compare base.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from infinix_hid_session import HIDSession, VENDOR_ID, PRODUCT_ID, INTERFACE_NUM
+from infinix_protocol import (REPORT_ID, PACKET_SIZE, DATA_SIZE_INDEX, COLOR_INDEX, CHECKSUM_INDEX,
+                              COLOR_DATA_SIZE, CMD_KEYBOARD, CMD_PERFORMANCE, CMD_KEYBOARD_12,
+                              CMD_KEYBOARD_34, PERFORMANCE_MODES, checksum, PacketCodec)
+
+SIM_PATH = b"sim://340e:8002/1"
+
+
+def _maxfan():
+    # EC protocol constants live with maxfan.py in the experimental folder
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Experimental Script"))
+    import maxfan
+    return maxfan
+
+
+class FaultModel:
+    """Per-operation latency (base + uniform jitter) and failure probability."""
+
+    def __init__(self, latency=0.0, jitter=0.0, fail_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+
+    def delay(self):
+        d = self.latency + (self.rng.random() * self.jitter if self.jitter else 0.0)
+        if d > 0:
+            # sleep() overshoots by ~50 us; spin for short delays
+            end = time.perf_counter() + d
+            if d > 0.001:
+                time.sleep(d - 0.0005)
+            while time.perf_counter() < end:
+                pass
+
+    def fails(self):
+        return self.fail_rate > 0 and self.rng.random() < self.fail_rate
+
+
+# --- HID ---
+
+def decode_packet(buf):
+    """Returns (key, value) for a valid controller packet, raises ValueError otherwise."""
+    if len(buf) != PACKET_SIZE:
+        raise ValueError(f"length {len(buf)} != {PACKET_SIZE}")
+    if buf[0] != REPORT_ID:
+        raise ValueError(f"report id {buf[0]:#04x} != {REPORT_ID:#04x}")
+    if buf[CHECKSUM_INDEX] != checksum(buf):
+        raise ValueError(f"checksum {buf[CHECKSUM_INDEX]:#04x} != {checksum(buf):#04x}")
+    cmd, param = buf[1] >> 4, buf[1] & 0xF
+    if cmd == CMD_PERFORMANCE:
+        if buf[1] not in PERFORMANCE_MODES.values():
+            raise ValueError(f"unknown performance byte {buf[1]:#04x}")
+        if buf[DATA_SIZE_INDEX] != 0:
+            raise ValueError("performance packet with data size")
+        return "performance", buf[1]
+    if buf[DATA_SIZE_INDEX] != COLOR_DATA_SIZE:
+        raise ValueError(f"data size {buf[DATA_SIZE_INDEX]} != {COLOR_DATA_SIZE}")
+    color = tuple(buf[COLOR_INDEX:COLOR_INDEX + 4])
+    if cmd == CMD_KEYBOARD:
+        return "light", (param,) + color
+    if cmd in (CMD_KEYBOARD_12, CMD_KEYBOARD_34):
+        zone = (1 if cmd == CMD_KEYBOARD_12 else 3) + (1 if param & 0x4 else 0)
+        return f"zone{zone}", (param & 0x3,) + color
+    raise ValueError(f"unknown command nibble {cmd:#x}")
+
+
+class SimulatedController:
+    """What the controller would hold after the packets it accepted."""
+
+    def __init__(self, faults=None, strict=True):
+        self.faults = faults or FaultModel()
+        self.strict = strict
+        self.present = True
+        self.state = {}
+        self.accepted = 0
+        self.failed = 0
+        self.errors = []
+
+    def receive(self, buf):
+        self.faults.delay()
+        if not self.present:
+            raise OSError(19, "No such device")
+        if self.faults.fails():
+            self.failed += 1
+            raise OSError(32, "Broken pipe (simulated)")
+        try:
+            key, value = decode_packet(buf)
+        except ValueError as e:
+            self.errors.append(str(e))
+            if self.strict:
+                return -1
+            return len(buf)
+        self.state[key] = value
+        if key == "light":
+            # Global light repaints the zones
+            for zone in ("zone1", "zone2", "zone3", "zone4"):
+                self.state.pop(zone, None)
+        self.accepted += 1
+        return len(buf)
+
+
+class SimulatedBackend:
+    """hidapi-shaped module: enumerate() and device()."""
+
+    def __init__(self, controller=None, enum_faults=None, open_faults=None):
+        self.controller = controller or SimulatedController()
+        self.enum_faults = enum_faults or FaultModel()
+        self.open_faults = open_faults or FaultModel()
+        self.enumerations = 0
+        self.opens = 0
+
+    def enumerate(self, vendor_id=0, product_id=0):
+        self.enumerations += 1
+        self.enum_faults.delay()
+        if not self.controller.present or (vendor_id, product_id) not in ((0, 0), (VENDOR_ID, PRODUCT_ID)):
+            return []
+        # Same shape as the real device: keyboard interface 0 plus the shared interface 1
+        return [{"path": b"sim://340e:8002/0", "vendor_id": VENDOR_ID, "product_id": PRODUCT_ID, "interface_number": 0},
+                {"path": SIM_PATH, "vendor_id": VENDOR_ID, "product_id": PRODUCT_ID, "interface_number": INTERFACE_NUM}]
+
+    def device(self):
+        return SimulatedDevice(self)
+
+
+class SimulatedDevice:
+    def __init__(self, backend):
+        self.backend = backend
+        self.is_open = False
+
+    def open_path(self, path):
+        backend = self.backend
+        backend.opens += 1
+        backend.open_faults.delay()
+        if path != SIM_PATH or not backend.controller.present or backend.open_faults.fails():
+            raise OSError("open failed")
+        self.is_open = True
+
+    def write(self, buff):
+        if not self.is_open:
+            raise ValueError("not open")
+        return self.backend.controller.receive(buff)
+
+    def close(self):
+        self.is_open = False
+
+
+_default_backend = None
+
+
+def default_backend():
+    """Shared instance used by INFINIX_HID_BACKEND=sim."""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = SimulatedBackend()
+    return _default_backend
+
+
+# --- EC ---
+
+class SimulatedEC:
+    """
+    ECPort stand-in running the EC RAM protocol on a 256-byte RAM.
+
+    A trigger (0xA1 write / 0xA0 read) on index 0x93 executes after the
+    fault model's latency; until then reading 0x93 returns the trigger
+    value, so wait_ec_ready() polls as it would on hardware. A trigger
+    before the init sequence or with a failure draw is recorded and never
+    completes.
+    """
+
+    def __init__(self, faults=None):
+        mf = _maxfan()
+        self._addr, self._value, self._trigger = mf.EC_REG_ADDR, mf.EC_REG_VALUE, mf.EC_REG_TRIGGER
+        self._write_cmd, self._read_cmd = mf.CMD_TRIGGER_WRITE, mf.CMD_TRIGGER_READ
+        self._init = list(mf.EC_RAM_INIT)
+        self.faults = faults or FaultModel()
+        self.ram = bytearray(256)
+        self.regs = bytearray(256)
+        self.ops = 0
+        self.writes = 0
+        self.errors = []
+        self._recent = []
+        self._initialized = False
+        self._done_at = None
+        self._stuck = False
+
+    def write_index(self, index, value):
+        self.ops += 2
+        self.regs[index] = value
+        self._recent = (self._recent + [(index, value)])[-len(self._init):]
+        if self._recent == self._init:
+            self._initialized = True
+        if index != self._trigger:
+            return
+        if value not in (self._write_cmd, self._read_cmd):
+            self.errors.append(f"unknown trigger {value:#04x}")
+            return
+        if not self._initialized:
+            self.errors.append("trigger before init sequence")
+            self._stuck = True
+            return
+        if self.faults.fails():
+            self._stuck = True
+            return
+        self._stuck = False
+        addr = self.regs[self._addr]
+        if value == self._write_cmd:
+            self.ram[addr] = self.regs[self._value]
+            self.writes += 1
+        else:
+            self.regs[self._value] = self.ram[addr]
+        d = self.faults.latency + (self.faults.rng.random() * self.faults.jitter if self.faults.jitter else 0.0)
+        self._done_at = time.perf_counter() + d
+
+    def read_index(self, index):
+        self.ops += 2
+        if index == self._trigger:
+            if self._stuck or (self._done_at is not None and time.perf_counter() < self._done_at):
+                return self.regs[index]
+            self.regs[index] = 0
+        return self.regs[index]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Benchmarks ---
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def _timed(fn, number):
+    samples = []
+    for _ in range(number):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    samples.sort()
+    return samples
+
+
+def bench_hid(name, backend, writes):
+    session = HIDSession(backend=backend)
+    codec = PacketCodec()
+    enum = _timed(lambda: backend.enumerate(VENDOR_ID, PRODUCT_ID), max(1, writes // 100))
+
+    def open_close():
+        session.invalidate()
+        session.open()
+    opens = _timed(open_close, max(1, writes // 100))
+
+    packets = [bytes(codec.zone(z, 0, 255, z * 40, 0, 100)) for z in (1, 2, 3, 4)]
+    lat = []
+    errors = 0
+    start = time.perf_counter()
+    for i in range(writes):
+        t = time.perf_counter()
+        ok, _ = session.write(packets[i & 3])
+        lat.append(time.perf_counter() - t)
+        errors += not ok
+    elapsed = time.perf_counter() - start
+    session.close()
+    lat.sort()
+    return {
+        "backend": name,
+        "packets_per_s": writes / elapsed,
+        "write_p50_us": _percentile(lat, 0.5) * 1e6,
+        "write_p99_us": _percentile(lat, 0.99) * 1e6,
+        "enumerate_us": _percentile(enum, 0.5) * 1e6,
+        "open_us": _percentile(opens, 0.5) * 1e6,
+        "failed_writes": errors,
+    }
+
+
+def bench_ec(name, port, transactions, writes=None, **options):
+    """options go to ec_ram_transaction (settle, wait)."""
+    mf = _maxfan()
+    if writes is None:
+        writes = [(mf.PERF_MODE_ADDR, mf.MODE_GAMING), (mf.FAN_BOOST_ADDR, 1)]
+    lat = sorted(mf.ec_ram_transaction(port, writes, **options)["latency_ms"] for _ in range(transactions))
+    return {
+        "backend": name,
+        "ec_tx_p50_ms": _percentile(lat, 0.5),
+        "ec_tx_p99_ms": _percentile(lat, 0.99),
+        "ec_port_ops": port.ops // transactions,
+    }
+
+
+def run_benchmarks(writes=20000, latency=0.0, jitter=0.0, fail_rate=0.0, ec_latency=0.0002, seed=0,
+                   hardware=False, hardware_writes=None):
+    """
+    Simulated backends always. Real devices only on request: hardware=True
+    adds hidraw/hidapi (overwrites the zone colors), hardware_writes
+    ([(addr, value)]) adds /dev/port and ioperm, writing exactly those
+    values so the EC ends where the caller says it already was.
+    """
+    results = []
+    ideal = SimulatedBackend()
+    results.append(bench_hid("sim", ideal, writes))
+    if latency or jitter or fail_rate:
+        faulty = SimulatedBackend(SimulatedController(FaultModel(latency, jitter, fail_rate, seed)))
+        results.append(bench_hid("sim+faults", faulty, max(1, writes // 10)))
+    if hardware:
+        import infinix_hidraw
+        if infinix_hidraw.find_hidraw():
+            results.append(bench_hid("hidraw", infinix_hidraw, writes))
+        try:
+            import hid
+            if any(d["interface_number"] == INTERFACE_NUM for d in hid.enumerate(VENDOR_ID, PRODUCT_ID)):
+                results.append(bench_hid("hidapi", hid, writes))
+        except ImportError:
+            pass
+
+    ec = SimulatedEC(FaultModel(ec_latency, 0.0, 0.0, seed))
+    # No settle on the simulator; its trigger latency is exercised by the poll
+    results.append(bench_ec("sim-ec", ec, 200, settle=0, wait=True))
+    if hardware_writes:
+        mf = _maxfan()
+        with mf.ECPort() as port:
+            results.append(bench_ec("/dev/port", port, 50, hardware_writes))
+        try:
+            with mf.open_port(backend="ioperm") as port:
+                results.append(bench_ec("ioperm", port, 50, hardware_writes))
+        except OSError:
+            pass
+
+    # Protocol regressions: every packet the codec produces must validate
+    errors = ideal.controller.errors + ec.errors
+    return results, errors
+
+
+# Lower is better for everything except throughput
+_HIGHER_IS_BETTER = {"packets_per_s"}
+
+
+def compare(results, baseline, tolerance):
+    """Returns human-readable regressions beyond `tolerance` (fraction)."""
+    base = {r["backend"]: r for r in baseline}
+    regressions = []
+    for r in results:
+        old = base.get(r["backend"])
+        if not old:
+            continue
+        for key, value in r.items():
+            if key == "backend" or key not in old or not old[key]:
+                continue
+            change = (value - old[key]) / old[key]
+            if key in _HIGHER_IS_BETTER:
+                change = -change
+            if change > tolerance:
+                regressions.append(f"{r['backend']} {key}: {old[key]:.2f} -> {value:.2f} ({change * 100:+.0f}%)")
+    return regressions
+
+
+def print_results(results):
+    for r in results:
+        fields = ", ".join(f"{k} {v:.2f}" if isinstance(v, float) else f"{k} {v}"
+                           for k, v in r.items() if k != "backend")
+        print(f"[*] {r['backend']:<11} {fields}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - Simulated device and benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_bench = sub.add_parser("bench", help="Benchmark the simulated (and, with --hardware, real) backends")
+    p_bench.add_argument("--writes", type=int, default=20000)
+    p_bench.add_argument("--latency-us", type=float, default=0.0, help="Simulated per-write latency")
+    p_bench.add_argument("--jitter-us", type=float, default=0.0, help="Uniform extra latency per write")
+    p_bench.add_argument("--fail-rate", type=float, default=0.0, help="Probability a write fails")
+    p_bench.add_argument("--ec-latency-us", type=float, default=200.0, help="Time until the EC clears the trigger")
+    p_bench.add_argument("--seed", type=int, default=0)
+    p_bench.add_argument("--save", help="Write results as JSON (baseline for --compare)")
+    p_bench.add_argument("--compare", help="Baseline JSON; exit 1 on regressions")
+    p_bench.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown for --compare")
+    p_bench.add_argument("--hardware", action="store_true",
+                         help="Also bench the real keyboard over hidraw/hidapi (leaves the bench zone colors)")
+    p_bench.add_argument("--hardware-write", action="append", metavar="ADDR=VALUE",
+                         help="Also bench the real EC (root), repeatedly writing ADDR=VALUE. "
+                              "Use the values already set, e.g. 0x40=1 0x41=0 after 'maxfan.py off'")
+    args = parser.parse_args()
+
+    try:
+        hardware_writes = [_maxfan().parse_ec_write(w) for w in args.hardware_write or ()]
+    except ValueError as e:
+        parser.error(str(e))
+    results, errors = run_benchmarks(args.writes, args.latency_us / 1e6, args.jitter_us / 1e6,
+                                     args.fail_rate, args.ec_latency_us / 1e6, args.seed,
+                                     args.hardware, hardware_writes)
+    print_results(results)
+    status = 0
+    if errors:
+        print(f"[-] {len(errors)} protocol errors, first: {errors[0]}")
+        status = 1
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[+] Saved to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"[!] Regression: {line}")
+        if regressions:
+            status = 1
+        else:
+            print(f"[+] No regressions beyond {args.tolerance * 100:.0f}%")
+    sys.exit(status)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+HID / EC traffic recorder and replay.
+
+Every outgoing HID packet and EC index/value write can be captured into a
+preallocated ring of fixed 80-byte records (monotonic ns timestamp, kind,
+payload); recording copies bytes into the ring and allocates nothing per
+packet, so it can stay on. Set INFINIX_TRAFFIC_RECORD=/path/capture.bin
+(a "{pid}" in the path is expanded) and every script records both paths
+and writes the capture on exit.
+
+    python infinix_traffic.py dump capture.bin
+    python infinix_traffic.py replay capture.bin [--speed 2 | --max] [--hid-only | --ec-only]
+"""
+import argparse
+import atexit
+import os
+import struct
+import sys
+import threading
+import time
+
+from infinix_hid_session import RECORD_ENV
+
+FILE_MAGIC = b"GTTR"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHII")  # magic, version, record size, count, overwritten
+
+# Record: u64 t_ns, u8 kind, u8 length, u8 ec index, u8 ec value, payload[65], pad
+RECORD = struct.Struct("<QBBBB")
+RECORD_SIZE = 80
+PAYLOAD_OFFSET = RECORD.size
+MAX_PAYLOAD = RECORD_SIZE - PAYLOAD_OFFSET
+KIND_HID = 1
+KIND_EC = 2
+DEFAULT_CAPACITY = 65536  # records (5 MiB)
+
+
+class TrafficRecorder:
+    """Thread-safe ring of fixed-size records in one bytearray."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.buf = bytearray(capacity * RECORD_SIZE)
+        self.head = 0
+        self.count = 0
+        self.overwritten = 0
+        self._lock = threading.Lock()
+
+    def _slot(self):
+        off = self.head * RECORD_SIZE
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.overwritten += 1
+        return off
+
+    def record_hid(self, packet):
+        n = min(len(packet), MAX_PAYLOAD)
+        with self._lock:
+            off = self._slot()
+            RECORD.pack_into(self.buf, off, time.monotonic_ns(), KIND_HID, n, 0, 0)
+            self.buf[off + PAYLOAD_OFFSET:off + PAYLOAD_OFFSET + n] = packet[:n] if n < len(packet) else packet
+
+    def record_ec(self, index, value):
+        with self._lock:
+            RECORD.pack_into(self.buf, self._slot(), time.monotonic_ns(), KIND_EC, 0, index, value)
+
+    def snapshot(self):
+        """Records oldest first, as one bytes object."""
+        with self._lock:
+            if self.count < self.capacity:
+                return bytes(self.buf[:self.count * RECORD_SIZE])
+            split = self.head * RECORD_SIZE
+            return bytes(self.buf[split:] + self.buf[:split])
+
+    def save(self, path):
+        data = self.snapshot()
+        with open(path, "wb") as f:
+            f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, RECORD_SIZE, len(data) // RECORD_SIZE, self.overwritten))
+            f.write(data)
+
+
+def load_capture(path):
+    """Yields (t_ns, kind, payload memoryview, ec index, ec value) per record."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, size, count, _ = FILE_HEADER.unpack_from(data)
+    if magic != FILE_MAGIC or version != FILE_VERSION or size != RECORD_SIZE:
+        raise ValueError("not a traffic capture")
+    view = memoryview(data)[FILE_HEADER.size:]
+    for i in range(count):
+        off = i * RECORD_SIZE
+        t_ns, kind, length, index, value = RECORD.unpack_from(view, off)
+        yield t_ns, kind, view[off + PAYLOAD_OFFSET:off + PAYLOAD_OFFSET + length], index, value
+
+
+# --- Hooks ---
+
+class RecordingBackend:
+    """Wraps a hidapi-shaped backend; every successful open handle records its writes."""
+
+    def __init__(self, backend, recorder):
+        self.backend = backend
+        self.recorder = recorder
+
+    def enumerate(self, *args):
+        return self.backend.enumerate(*args)
+
+    def device(self):
+        return _RecordingDevice(self.backend.device(), self.recorder)
+
+
+class _RecordingDevice:
+    def __init__(self, handle, recorder):
+        self._handle = handle
+        self._recorder = recorder
+
+    def open_path(self, path):
+        self._handle.open_path(path)
+
+    def write(self, buff):
+        self._recorder.record_hid(buff)
+        return self._handle.write(buff)
+
+    def close(self):
+        self._handle.close()
+
+
+_shared = None
+
+
+def shared_recorder():
+    """Process-wide recorder if INFINIX_TRAFFIC_RECORD is set, else None. Saved at exit."""
+    global _shared
+    path = os.environ.get(RECORD_ENV)
+    if not path:
+        return None
+    if _shared is None:
+        _shared = TrafficRecorder()
+        atexit.register(_shared.save, path.replace("{pid}", str(os.getpid())))
+    return _shared
+
+
+# --- Dump / replay ---
+
+def describe(kind, payload, index, value):
+    if kind == KIND_EC:
+        return f"EC  index {index:#04x} <- {value:#04x}"
+    from infinix_simulator import decode_packet
+    try:
+        key, fields = decode_packet(payload)
+    except ValueError as e:
+        return f"HID INVALID ({e}): {bytes(payload[:12]).hex()}"
+    if key == "performance":
+        return f"HID performance {fields:#04x}"
+    mode, r, g, b, bri = fields
+    return f"HID {key:<5} byte1 {payload[1]:#04x} mode {mode} rgb ({r}, {g}, {b}) bri {bri}"
+
+
+def replay(path, speed=1.0, hid=True, ec=True, port_path="/dev/port", session=None):
+    """
+    Re-sends a capture. speed=None sends as fast as possible. Returns a
+    report with achieved rate and timing error against the scaled schedule.
+    EC records are never closer together than maxfan's EC_WRITE_SETTLE, at
+    any speed: the EC needs that gap between port writes.
+    """
+    # bytes up front: hidapi does not take memoryviews, and the timed loop should not copy
+    records = [(t, kind, bytes(payload), index, value) for t, kind, payload, index, value in load_capture(path)
+               if (hid and kind == KIND_HID) or (ec and kind == KIND_EC)]
+    if not records:
+        return None
+    if hid and session is None:
+        from infinix_hid_session import HIDSession
+        session = HIDSession()
+    port = None
+    ec_settle = 0.0
+    if ec and any(r[1] == KIND_EC for r in records):
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Experimental Script"))
+        from maxfan import open_port, EC_WRITE_SETTLE
+        port = open_port(port_path, recorder=False)
+        ec_settle = EC_WRITE_SETTLE
+
+    t0 = records[0][0]
+    errors = []
+    failed = 0
+    last_ec = float("-inf")
+    start = time.perf_counter()
+    try:
+        for t_ns, kind, payload, index, value in records:
+            if speed is not None:
+                target = start + (t_ns - t0) / 1e9 / speed
+                delay = target - time.perf_counter()
+                if delay > 0.0005:
+                    time.sleep(delay - 0.0005)
+                while time.perf_counter() < target:
+                    pass
+                errors.append(time.perf_counter() - target)
+            if kind == KIND_HID:
+                ok, _ = session.write(payload)
+                failed += not ok
+            else:
+                settle = last_ec + ec_settle - time.perf_counter()
+                if settle > 0:
+                    time.sleep(settle)
+                port.write_index(index, value)
+                last_ec = time.perf_counter()
+    finally:
+        if port is not None:
+            port.close()
+    elapsed = time.perf_counter() - start
+    span = (records[-1][0] - t0) / 1e9
+    errors.sort()
+    return {
+        "records": len(records),
+        "failed": failed,
+        "elapsed_s": elapsed,
+        "original_rate": len(records) / span if span else float("inf"),
+        "achieved_rate": len(records) / elapsed if elapsed else float("inf"),
+        "error_mean_us": sum(errors) / len(errors) * 1e6 if errors else 0.0,
+        "error_p99_us": errors[min(len(errors) - 1, int(len(errors) * 0.99))] * 1e6 if errors else 0.0,
+        "error_max_us": errors[-1] * 1e6 if errors else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Infinix GT Book - HID/EC traffic capture tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_dump = sub.add_parser("dump", help="Print a capture")
+    p_dump.add_argument("capture")
+    p_replay = sub.add_parser("replay", help="Re-send a capture")
+    p_replay.add_argument("capture")
+    speed = p_replay.add_mutually_exclusive_group()
+    speed.add_argument("--speed", type=float, default=1.0, help="Time scale (2 = twice as fast)")
+    speed.add_argument("--max", action="store_true", help="Send as fast as possible (EC writes still keep the settle gap)")
+    only = p_replay.add_mutually_exclusive_group()
+    only.add_argument("--hid-only", action="store_true")
+    only.add_argument("--ec-only", action="store_true")
+    p_replay.add_argument("--port", default="/dev/port", help="EC port file")
+    args = parser.parse_args()
+
+    if args.command == "dump":
+        t0 = None
+        for t_ns, kind, payload, index, value in load_capture(args.capture):
+            t0 = t_ns if t0 is None else t0
+            print(f"{(t_ns - t0) / 1e6:>12.3f} ms  {describe(kind, payload, index, value)}")
+    else:
+        report = replay(args.capture, None if args.max else args.speed,
+                        hid=not args.ec_only, ec=not args.hid_only, port_path=args.port)
+        if report is None:
+            print("[-] Nothing to replay")
+            sys.exit(1)
+        print(f"[+] {report['records']} records in {report['elapsed_s']:.3f} s "
+              f"({report['achieved_rate']:.0f}/s, original {report['original_rate']:.0f}/s), "
+              f"{report['failed']} failed")
+        if not args.max:
+            print(f"[*] Timing error: mean {report['error_mean_us']:.0f} us, "
+                  f"p99 {report['error_p99_us']:.0f} us, max {report['error_max_us']:.0f} us")
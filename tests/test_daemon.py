@@ -0,0 +1,40 @@
+import os
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "Original Script"))
+os.environ.setdefault("INFINIX_HID_BACKEND", "sim")
+
+from infinix_daemon import ControlState, parse_request
+
+
+class ParseRequestTest(unittest.TestCase):
+
+    def test_zone_request_is_sorted(self):
+        calls = parse_request({"cmd": "zone", "colors": {"4": [0, 0, 255], "1": [255, 0, 0]}, "brightness": 50})
+        self.assertEqual([args[0] for _, args in calls], [1, 4])
+
+    def test_bad_input_rejected(self):
+        for req in ({"cmd": "zone", "colors": {"1": [255, 0, 0], "7": [0, 0, 0]}},
+                    {"cmd": "zone", "colors": {"1": [256, 0, 0]}},
+                    {"cmd": "zone", "colors": {"x": [0, 0, 0]}},
+                    {"cmd": "light", "rgb": [1, 2]},
+                    {"cmd": "light", "rgb": [1, 2, 3], "mode": 16},
+                    {"cmd": "perf", "mode": "turbo"}):
+            with self.assertRaises(ValueError, msg=req):
+                parse_request(req)
+
+
+class ControlStateTest(unittest.TestCase):
+
+    def test_bad_zone_leaves_state_untouched(self):
+        control = ControlState()
+        reply = control.handle({"cmd": "zone", "colors": {"1": [255, 0, 0], "9": [0, 0, 0]}})
+        self.assertFalse(reply["ok"])
+        self.assertEqual(control.state.desired, {})
+        control.session.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
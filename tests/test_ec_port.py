@@ -0,0 +1,120 @@
+import math
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "Original Script"))
+sys.path.insert(0, os.path.join(HERE, "..", "Experimental Script"))
+
+import maxfan
+from maxfan import (ECPort, ECReadDisabled, ec_ram_read, ec_ram_transaction, EC_DATA_PORT,
+                    EC_RAM_INIT, EC_REG_ADDR, EC_REG_TRIGGER, EC_REG_VALUE, CMD_TRIGGER_WRITE,
+                    FAN_BOOST_ADDR, PERF_MODE_ADDR)
+from infinix_ec_telemetry import SysfsChannel, TelemetrySampler
+
+
+class ListRecorder:
+    def __init__(self):
+        self.ec = []
+
+    def record_ec(self, index, value):
+        self.ec.append((index, value))
+
+
+class FakePortTest(unittest.TestCase):
+    """ECPort on a plain file standing in for /dev/port."""
+
+    def setUp(self):
+        self.file = tempfile.NamedTemporaryFile()
+        self.file.truncate(EC_DATA_PORT + 1)
+        self.recorder = ListRecorder()
+        self.port = ECPort(self.file.name, recorder=self.recorder)
+
+    def tearDown(self):
+        self.port.close()
+        self.file.close()
+
+    def test_transaction_write_sequence(self):
+        writes = [(PERF_MODE_ADDR, 2), (FAN_BOOST_ADDR, 1)]
+        report = ec_ram_transaction(self.port, writes, wait=False, settle=0)
+        expected = []
+        for address, value in writes:
+            expected += list(EC_RAM_INIT)
+            expected += [(EC_REG_ADDR, address), (EC_REG_VALUE, value), (EC_REG_TRIGGER, CMD_TRIGGER_WRITE)]
+        self.assertEqual(self.recorder.ec, expected)
+        self.assertEqual(report["writes"], 2)
+        self.assertEqual(report["port_ops"], 2 * len(expected))
+        self.assertEqual(report["poll_timeouts"], 0)
+
+    def test_init_once_on_request(self):
+        ec_ram_transaction(self.port, [(PERF_MODE_ADDR, 0), (FAN_BOOST_ADDR, 0)], init_each=False,
+                           wait=False, settle=0)
+        inits = [w for w in self.recorder.ec if w == EC_RAM_INIT[0]]
+        self.assertEqual(len(inits), 1)
+
+    def test_poll_timeout_falls_back_to_settle(self):
+        # The file keeps the trigger byte forever: the first poll times out,
+        # the rest of the transaction uses the fixed settle instead of polling
+        writes = [(PERF_MODE_ADDR, 0), (FAN_BOOST_ADDR, 0), (PERF_MODE_ADDR, 1)]
+        start = time.monotonic()
+        report = ec_ram_transaction(self.port, writes, settle=0)
+        self.assertEqual(report["poll_timeouts"], 1)
+        self.assertLess(time.monotonic() - start, 3 * maxfan.EC_POLL_TIMEOUT)
+
+    def test_settle_without_wait(self):
+        sleeps = []
+        with mock.patch.object(maxfan.time, "sleep", sleeps.append):
+            ec_ram_transaction(self.port, [(PERF_MODE_ADDR, 0)], wait=False)
+        self.assertEqual(sleeps, [maxfan.EC_WRITE_SETTLE] * (len(EC_RAM_INIT) + 3))
+
+    def test_read_disabled_by_default(self):
+        os.environ.pop(maxfan.EC_READ_ENV, None)
+        with self.assertRaises(ECReadDisabled):
+            ec_ram_read(self.port, [PERF_MODE_ADDR])
+        self.assertEqual(self.recorder.ec, [])
+
+    def test_read_experimental(self):
+        values = ec_ram_read(self.port, [PERF_MODE_ADDR], experimental=True, wait=False, settle=0)
+        self.assertEqual(len(values), 1)
+        self.assertEqual(self.recorder.ec, list(EC_RAM_INIT) + [(EC_REG_ADDR, PERF_MODE_ADDR),
+                                                                (EC_REG_TRIGGER, maxfan.CMD_TRIGGER_READ)])
+
+    def test_read_settles_like_writes(self):
+        sleeps = []
+        with mock.patch.object(maxfan.time, "sleep", sleeps.append):
+            ec_ram_read(self.port, [PERF_MODE_ADDR], experimental=True, wait=False)
+        self.assertEqual(sleeps, [maxfan.EC_WRITE_SETTLE] * (len(EC_RAM_INIT) + 2))
+
+    def test_error_names_index(self):
+        os.close(self.port.fd)
+        self.port.fd = os.open(self.file.name, os.O_RDONLY)
+        with self.assertRaisesRegex(OSError, "index 0x91"):
+            self.port.write_index(EC_REG_ADDR, 0)
+
+
+class SysfsChannelTest(unittest.TestCase):
+
+    def test_oserror_is_nan(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "temp1_input")
+            with open(path, "w") as f:
+                f.write("42000\n")
+            channel = SysfsChannel("temp", path, 0.001)
+            self.assertEqual(channel.read(), 42.0)
+            os.close(channel.fd)
+            channel.fd = os.open(root, os.O_RDONLY)  # pread on a directory: EISDIR
+            self.assertTrue(math.isnan(channel.read()))
+            channel.close()
+
+    def test_sampler_is_sysfs_only_by_default(self):
+        with tempfile.TemporaryDirectory() as root, tempfile.NamedTemporaryFile() as port:
+            sampler = TelemetrySampler(sysfs_root=root, port_path=port.name)
+            self.assertIsNone(sampler.port)
+
+
+if __name__ == "__main__":
+    unittest.main()
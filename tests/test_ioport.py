@@ -0,0 +1,140 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "Original Script"))
+sys.path.insert(0, os.path.join(HERE, "..", "Experimental Script"))
+
+import infinix_ioport
+import maxfan
+from infinix_ioport import IoPermPort, MockPortIO
+from maxfan import ECPort, ec_ram_transaction, open_port, EC_DATA_PORT, FAN_BOOST_ADDR, PERF_MODE_ADDR, MODE_GAMING
+
+
+class CountingIO(MockPortIO):
+    """MockPortIO that records grant/release per thread."""
+
+    def __init__(self):
+        super().__init__()
+        self.grants = []
+        self.releases = []
+
+    def grant(self):
+        self.grants.append(threading.current_thread().name)
+
+    def release(self):
+        self.releases.append(threading.current_thread().name)
+
+
+class IoPermPortTest(unittest.TestCase):
+
+    def test_transaction_reaches_ec(self):
+        io = MockPortIO()
+        with IoPermPort(io, recorder=False) as port:
+            report = ec_ram_transaction(port, [(PERF_MODE_ADDR, MODE_GAMING), (FAN_BOOST_ADDR, 1)],
+                                        wait=True, settle=0)
+        self.assertEqual(report["poll_timeouts"], 0)
+        self.assertEqual(io.ec.ram[PERF_MODE_ADDR], MODE_GAMING)
+        self.assertEqual(io.ec.ram[FAN_BOOST_ADDR], 1)
+        self.assertEqual(io.ec.errors, [])
+
+    def test_grant_once_per_thread(self):
+        io = CountingIO()
+        port = IoPermPort(io, recorder=False)
+        port.write_index(0x91, 0)
+        port.write_index(0x91, 0)
+        t = threading.Thread(target=port.write_index, args=(0x91, 0), name="worker")
+        t.start()
+        t.join()
+        self.assertEqual(sorted(io.grants), sorted([threading.current_thread().name, "worker"]))
+        port.close()
+        self.assertEqual(io.releases, [threading.current_thread().name])
+
+    def test_close_without_use_does_not_release(self):
+        io = CountingIO()
+        IoPermPort(io, recorder=False).close()
+        self.assertEqual(io.releases, [])
+
+    def test_native_grants_are_counted(self):
+        calls = []
+        native = object.__new__(infinix_ioport.NativePortIO)
+        native._ioperm = calls.append
+        native.grant()
+        native.grant()
+        native.release()
+        self.assertEqual(calls, [1])
+        native.release()
+        self.assertEqual(calls, [1, 0])
+        native.release()  # unbalanced release is ignored
+        self.assertEqual(calls, [1, 0])
+
+    def test_bench_keeps_settle_by_default(self):
+        calls = []
+
+        def transaction(port, writes, wait, settle):
+            calls.append((wait, settle))
+            return {"latency_ms": 0.0}
+        port = IoPermPort(MockPortIO(), recorder=False)
+        with mock.patch.object(infinix_ioport, "ec_ram_transaction", transaction):
+            infinix_ioport.bench_port("ioperm", port, [(PERF_MODE_ADDR, 0)], 2)
+        self.assertEqual(calls, [(True, maxfan.EC_WRITE_SETTLE)] * 2)
+
+
+class OpenPortTest(unittest.TestCase):
+
+    def setUp(self):
+        self.file = tempfile.NamedTemporaryFile()
+        self.file.truncate(EC_DATA_PORT + 1)
+
+    def tearDown(self):
+        self.file.close()
+
+    def test_devport_backend(self):
+        with open_port(self.file.name, backend="devport", recorder=False) as port:
+            self.assertIsInstance(port, ECPort)
+
+    def test_auto_uses_file_for_test_paths(self):
+        with open_port(self.file.name, backend="auto", recorder=False) as port:
+            self.assertIsInstance(port, ECPort)
+
+    def test_env_selects_backend(self):
+        with mock.patch.dict(os.environ, {maxfan.EC_BACKEND_ENV: "devport"}):
+            with open_port(self.file.name, recorder=False) as port:
+                self.assertIsInstance(port, ECPort)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            open_port(self.file.name, backend="bogus")
+
+    def test_ioperm_backend(self):
+        with mock.patch.object(infinix_ioport, "NativePortIO", MockPortIO):
+            with open_port(self.file.name, backend="ioperm", recorder=False) as port:
+                self.assertIsInstance(port, IoPermPort)
+
+    def test_auto_prefers_ioperm_for_dev_port(self):
+        with mock.patch.object(infinix_ioport, "NativePortIO", MockPortIO):
+            with open_port("/dev/port", backend="auto", recorder=False) as port:
+                self.assertIsInstance(port, IoPermPort)
+
+    def test_auto_falls_back_without_ioperm(self):
+        def denied():
+            raise PermissionError(1, "ioperm denied")
+        with mock.patch.object(infinix_ioport, "NativePortIO", denied), \
+                mock.patch.object(maxfan, "ECPort") as ecport:
+            open_port("/dev/port", backend="auto", recorder=False)
+        ecport.assert_called_once_with("/dev/port", False)
+
+    def test_forced_ioperm_raises(self):
+        def denied():
+            raise PermissionError(1, "ioperm denied")
+        with mock.patch.object(infinix_ioport, "NativePortIO", denied):
+            with self.assertRaises(PermissionError):
+                open_port(self.file.name, backend="ioperm")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "Original Script"))
+sys.path.insert(0, os.path.join(HERE, "..", "Experimental Script"))
+os.environ.setdefault("INFINIX_HID_BACKEND", "sim")
+
+from infinix_hid_session import HIDSession
+from infinix_multi_sync import KeyboardDevice, MultiDeviceSync, PtyMouse, SerialPool, XM01Device, xm01_frame
+
+
+def ramp(t):
+    """New red level every tick so every device has something to send."""
+    return [(int(t * 60) % 256, 0, 0)] * 4
+
+
+class FrameTest(unittest.TestCase):
+
+    def test_checksum(self):
+        frame = xm01_frame(1, 2, 3, 100)
+        self.assertEqual(len(frame), 7)
+        self.assertEqual(frame[6], (0x01 + 1 + 2 + 3 + 100) & 0xFF)
+
+
+class PtySyncTest(unittest.TestCase):
+
+    def test_keyboard_and_pty_mouse(self):
+        mouse = PtyMouse(ack=True)
+        session = HIDSession(backend="sim")
+        devices = [KeyboardDevice(session, max_rate=60),
+                   XM01Device(mouse.path, max_rate=30, ack_timeout=0.5, pool=SerialPool())]
+        try:
+            report = MultiDeviceSync(ramp, devices, fps=60).run(duration=0.3)
+        finally:
+            for dev in devices:
+                dev.close()
+            session.close()
+            mouse.close()
+        stats = report["devices"]
+        self.assertEqual(set(stats), {"keyboard", "mouse"})
+        self.assertEqual(stats["mouse"]["errors"], 0)
+        self.assertGreater(stats["mouse"]["frames"], 0)
+        self.assertEqual(len(mouse.frames), stats["mouse"]["frames"])
+        self.assertEqual(mouse.errors, 0)
+        self.assertGreater(report["skew"]["ticks"], 0)
+
+    def test_missing_pyserial_fails_at_construction(self):
+        with mock.patch.dict(sys.modules, {"serial": None}):
+            with self.assertRaises(ImportError):
+                XM01Device("/dev/null")
+
+    def test_import_error_is_counted(self):
+        class NoSerial:
+            name = "mouse"
+            max_rate = 60
+
+            def send(self, frame):
+                raise ImportError("No module named 'serial'")
+
+            def close(self):
+                pass
+
+        report = MultiDeviceSync(ramp, [NoSerial()], fps=60).run(duration=0.1)
+        self.assertGreater(report["devices"]["mouse"]["errors"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "Original Script"))
+
+from infinix_protocol import (PacketCodec, PERFORMANCE_MODES, PACKET_SIZE, REPORT_ID, CHECKSUM_INDEX,
+                              ZONE_MAPPING, checksum, command_byte, _legacy_packet)
+from infinix_simulator import decode_packet
+
+
+class CodecTest(unittest.TestCase):
+
+    def setUp(self):
+        self.codec = PacketCodec()
+
+    def test_layout(self):
+        pkt = self.codec.keyboard(1, 255, 100, 0, 80)
+        self.assertEqual(len(pkt), PACKET_SIZE)
+        self.assertEqual(pkt[0], REPORT_ID)
+        self.assertEqual(pkt[1], 0x11)
+        self.assertEqual(pkt[2], 0x04)
+        self.assertEqual(list(pkt[7:11]), [255, 100, 0, 80])
+        self.assertEqual(pkt[CHECKSUM_INDEX], checksum(pkt))
+
+    def test_matches_legacy_builder(self):
+        for zone, (cmd, offset) in ZONE_MAPPING.items():
+            for c in ((0, 0, 0, 0), (255, 255, 255, 255), (1, 2, 3, 4), (200, 17, 99, 100)):
+                self.assertEqual(bytes(self.codec.encode(cmd, offset, *c)),
+                                 bytes(_legacy_packet(cmd, offset, *c)), (zone, c))
+
+    def test_incremental_checksum(self):
+        # The template is patched in place; the checksum must follow every change
+        for i in range(512):
+            pkt = self.codec.zone(1 + i % 4, 0, i % 256, (i * 7) % 256, 255 - i % 256, (i * 3) % 256)
+            self.assertEqual(pkt[CHECKSUM_INDEX], checksum(pkt))
+
+    def test_zone_bytes(self):
+        self.assertEqual(self.codec.zone(1, 0, 1, 2, 3, 4)[1], command_byte(0x06, 0x0))
+        self.assertEqual(self.codec.zone(2, 0, 1, 2, 3, 4)[1], command_byte(0x06, 0x4))
+        self.assertEqual(self.codec.zone(3, 0, 1, 2, 3, 4)[1], command_byte(0x07, 0x0))
+        self.assertEqual(self.codec.zone(4, 0, 1, 2, 3, 4)[1], command_byte(0x07, 0x4))
+
+    def test_performance(self):
+        for byte in PERFORMANCE_MODES.values():
+            pkt = self.codec.performance(byte)
+            self.assertEqual(decode_packet(pkt), ("performance", byte))
+            self.assertEqual(pkt[2], 0)
+
+    def test_round_trip(self):
+        self.assertEqual(decode_packet(self.codec.keyboard(2, 10, 20, 30, 40)), ("light", (2, 10, 20, 30, 40)))
+        self.assertEqual(decode_packet(self.codec.zone(4, 0, 10, 20, 30, 40)), ("zone4", (0, 10, 20, 30, 40)))
+
+    def test_out_of_range_leaves_template_intact(self):
+        before = bytes(self.codec.keyboard(1, 1, 2, 3, 4))
+        with self.assertRaises(ValueError):
+            self.codec.keyboard(1, 256, 2, 3, 4)
+        with self.assertRaises(ValueError):
+            self.codec.keyboard(1, 1, -1, 3, 4)
+        self.assertEqual(bytes(self.codec.template(0x01, 1).buf), before)
+
+    def test_batch(self):
+        frames = [(cmd, off, 9, 8, 7, 6) for cmd, off in (ZONE_MAPPING[z] for z in (1, 2, 3, 4))]
+        out = self.codec.encode_batch(frames)
+        self.assertEqual(len(out), 4 * PACKET_SIZE)
+        for i, frame in enumerate(frames):
+            self.assertEqual(bytes(out[i * PACKET_SIZE:(i + 1) * PACKET_SIZE]), bytes(_legacy_packet(*frame)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "Original Script"))
+
+from infinix_hid_session import HIDSession
+from infinix_protocol import PERFORMANCE_MODES
+from infinix_shadow_state import LIGHT, PERFORMANCE, ShadowState
+from infinix_simulator import SimulatedBackend
+
+
+class ShadowStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = SimulatedBackend()
+        self.controller = self.backend.controller
+        self.state = ShadowState(HIDSession(backend=self.backend))
+
+    def tearDown(self):
+        self.state.session.close()
+
+    def test_only_changes_are_sent(self):
+        self.state.set_light(1, 255, 0, 0, 100)
+        self.state.set_performance(PERFORMANCE_MODES["gaming"])
+        self.assertEqual(self.state.commit(), (True, "Success"))
+        self.assertEqual(self.state.last_sent, 2)
+
+        self.state.set_light(1, 255, 0, 0, 100)
+        self.assertEqual(self.state.commit(), (True, "Up to date"))
+        self.assertEqual(self.state.last_sent, 0)
+
+        self.state.set_performance(PERFORMANCE_MODES["office"])
+        self.state.commit()
+        self.assertEqual(self.state.last_sent, 1)
+        self.assertEqual(self.controller.state[PERFORMANCE], PERFORMANCE_MODES["office"])
+        self.assertEqual(self.controller.accepted, 3)
+
+    def test_pending_order(self):
+        self.state.set_performance(PERFORMANCE_MODES["balance"])
+        self.state.set_zone(3, 0, 1, 2, 3, 4)
+        self.state.set_zone(1, 0, 1, 2, 3, 4)
+        self.assertEqual(self.state.pending(), ["zone1", "zone3", PERFORMANCE])
+
+    def test_force_resends_everything(self):
+        self.state.set_light(1, 0, 255, 0, 50)
+        self.state.set_performance(PERFORMANCE_MODES["balance"])
+        self.state.commit()
+        self.controller.state.clear()  # e.g. the controller lost power
+        self.assertEqual(self.state.commit(force=True), (True, "Success"))
+        self.assertEqual(self.state.last_sent, 2)
+        self.assertEqual(self.controller.state[LIGHT], (1, 0, 255, 0, 50))
+
+    def test_light_clears_zones(self):
+        self.state.set_zone(2, 0, 9, 9, 9, 9)
+        self.state.commit()
+        self.state.set_light(1, 1, 1, 1, 1)
+        self.assertNotIn("zone2", self.state.desired)
+        self.state.commit()
+        self.assertNotIn("zone2", self.state.shadow)
+        self.assertNotIn("zone2", self.controller.state)
+
+    def test_failed_write_invalidates(self):
+        self.state.set_light(1, 1, 2, 3, 4)
+        self.state.commit()
+        self.controller.present = False
+        self.state.set_performance(PERFORMANCE_MODES["gaming"])
+        ok, _ = self.state.commit()
+        self.assertFalse(ok)
+        self.assertEqual(self.state.shadow, {})
+        self.controller.present = True
+        self.state.commit()
+        self.assertEqual(self.state.last_sent, 2)
+
+    def test_bad_values_rejected(self):
+        with self.assertRaises(ValueError):
+            self.state.set_light(1, 256, 0, 0, 0)
+        with self.assertRaises(ValueError):
+            self.state.set_zone(5, 0, 0, 0, 0, 0)
+        self.assertEqual(self.state.desired, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "Original Script"))
+sys.path.insert(0, os.path.join(HERE, "..", "Experimental Script"))
+
+import infinix_traffic
+import maxfan
+from infinix_protocol import PacketCodec
+from infinix_traffic import TrafficRecorder, load_capture, replay, KIND_EC, KIND_HID, RECORD_SIZE
+
+
+class RecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".bin")
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_round_trip(self):
+        rec = TrafficRecorder(capacity=8)
+        packet = bytes(PacketCodec().keyboard(1, 255, 0, 0, 100))
+        rec.record_hid(packet)
+        rec.record_ec(0x91, 0x40)
+        rec.save(self.path)
+        records = list(load_capture(self.path))
+        self.assertEqual([r[1] for r in records], [KIND_HID, KIND_EC])
+        self.assertEqual(bytes(records[0][2]), packet)
+        self.assertEqual(records[1][3:], (0x91, 0x40))
+        self.assertLessEqual(records[0][0], records[1][0])
+
+    def test_wrap_keeps_newest_in_order(self):
+        rec = TrafficRecorder(capacity=4)
+        for value in range(6):
+            rec.record_ec(0x91, value)
+        self.assertEqual(len(rec.snapshot()), 4 * RECORD_SIZE)
+        self.assertEqual(rec.overwritten, 2)
+        rec.save(self.path)
+        self.assertEqual([r[4] for r in load_capture(self.path)], [2, 3, 4, 5])
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            list(load_capture(self.path))
+
+
+class ReplayTest(unittest.TestCase):
+
+    def test_max_speed_keeps_ec_settle(self):
+        rec = TrafficRecorder(capacity=8)
+        for value in range(3):
+            rec.record_ec(0x91, value)
+        with tempfile.NamedTemporaryFile(suffix=".bin") as capture, tempfile.NamedTemporaryFile() as port:
+            port.truncate(maxfan.EC_DATA_PORT + 1)
+            rec.save(capture.name)
+            sleeps = []
+            with mock.patch.object(infinix_traffic.time, "sleep", sleeps.append):
+                report = replay(capture.name, speed=None, hid=False, port_path=port.name)
+        self.assertEqual(report["records"], 3)
+        self.assertEqual(len(sleeps), 2)
+        for s in sleeps:
+            self.assertGreater(s, 0)
+            self.assertLessEqual(s, maxfan.EC_WRITE_SETTLE)
+
+
+if __name__ == "__main__":
+    unittest.main()